@@ -0,0 +1,248 @@
+"""
+Small caches shared by the services that front slow or rate-limited APIs.
+
+LRUCache is a thread-safe in-memory LRU with per-entry expiry.
+PersistentCache puts one in front of an SQLite key/value table so entries
+survive restarts; values are stored as JSON, and None is a valid cached
+value (negative caching), so lookups return MISSING on a miss. Its a*
+methods are for async callers: memory hits are answered inline and the
+SQLite tier runs in a worker thread so it never blocks the event loop.
+VersionedMemo memoises functions of static data until a version probe
+(such as a database file's mtime) changes.
+"""
+
+import asyncio
+import functools
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import text
+
+from .sqlite_engine import create_sqlite_engine
+
+MISSING = object()
+
+
+class LRUCache:
+    def __init__(self, max_entries: int, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._entries[key]
+                return MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None, expires_at=None):
+        ttl = self.ttl if ttl is None else ttl
+        if expires_at is None and ttl is not None:
+            expires_at = time.time() + ttl
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class PersistentCache:
+    """
+    In-memory LRU over an SQLite table (key TEXT PRIMARY KEY, value JSON,
+    expires_at REAL). Several caches may share one database file.
+    """
+
+    def __init__(self, path: str, table: str, max_entries: int, ttl: float):
+        self.table = table
+        self.ttl = ttl
+        self.memory = LRUCache(max_entries, ttl)
+        self.engine = create_sqlite_engine(path)
+        with self.engine.begin() as conn:
+            conn.execute(
+                text(
+                    f"CREATE TABLE IF NOT EXISTS {table} ("
+                    " key TEXT PRIMARY KEY,"
+                    " value TEXT,"
+                    " expires_at REAL NOT NULL"
+                    ") WITHOUT ROWID"
+                )
+            )
+
+    def get(self, key: str):
+        value = self.memory.get(key)
+        if value is not MISSING:
+            return value
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                text(f"SELECT value, expires_at FROM {self.table} WHERE key = :key"),
+                {"key": key},
+            ).first()
+        if row is None or row[1] <= time.time():
+            return MISSING
+        value = json.loads(row[0])
+        self.memory.set(key, value, expires_at=row[1])
+        return value
+
+    def get_many(self, keys):
+        """{key: value} for the keys that are cached"""
+        found = {}
+        missing = []
+        for key in keys:
+            value = self.memory.get(key)
+            if value is MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        if not missing:
+            return found
+        now = time.time()
+        with self.engine.connect() as conn:
+            # SQLite limits host parameters per statement
+            for start in range(0, len(missing), 400):
+                chunk = missing[start : start + 400]
+                params = {f"k{i}": k for i, k in enumerate(chunk)}
+                placeholders = ", ".join(f":k{i}" for i in range(len(chunk)))
+                rows = conn.execute(
+                    text(
+                        f"SELECT key, value, expires_at FROM {self.table}"
+                        f" WHERE key IN ({placeholders}) AND expires_at > :now"
+                    ),
+                    {**params, "now": now},
+                )
+                for key, value, expires_at in rows:
+                    found[key] = json.loads(value)
+                    self.memory.set(key, found[key], expires_at=expires_at)
+        return found
+
+    def set(self, key: str, value, ttl=None):
+        self.set_many({key: value}, ttl)
+
+    def set_many(self, items: dict, ttl=None):
+        if not items:
+            return
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        for key, value in items.items():
+            self.memory.set(key, value, expires_at=expires_at)
+        with self.engine.begin() as conn:
+            conn.execute(
+                text(
+                    f"INSERT INTO {self.table} (key, value, expires_at)"
+                    " VALUES (:key, :value, :expires_at)"
+                    " ON CONFLICT (key) DO UPDATE SET"
+                    " value = excluded.value, expires_at = excluded.expires_at"
+                ),
+                [
+                    {
+                        "key": key,
+                        "value": json.dumps(value, ensure_ascii=False),
+                        "expires_at": expires_at,
+                    }
+                    for key, value in items.items()
+                ],
+            )
+
+    async def aget(self, key: str):
+        value = self.memory.get(key)
+        if value is not MISSING:
+            return value
+        return await asyncio.to_thread(self.get, key)
+
+    async def aget_many(self, keys):
+        found = {}
+        missing = []
+        for key in keys:
+            value = self.memory.get(key)
+            if value is MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        if missing:
+            found.update(await asyncio.to_thread(self.get_many, missing))
+        return found
+
+    async def aset(self, key: str, value, ttl=None):
+        await self.aset_many({key: value}, ttl)
+
+    async def aset_many(self, items: dict, ttl=None):
+        if items:
+            await asyncio.to_thread(self.set_many, items, ttl)
+
+    def purge(self):
+        """Delete expired rows from the table"""
+        with self.engine.begin() as conn:
+            conn.execute(
+                text(f"DELETE FROM {self.table} WHERE expires_at <= :now"),
+                {"now": time.time()},
+            )
+
+
+class VersionedMemo:
+    """
+    Memo for results derived from data that only changes as a whole, e.g.
+    lookups over the places catalogue. Every entry is dropped as soon as
+    version() returns something else. Cached values are shared between
+    callers and must not be mutated.
+    """
+
+    def __init__(self, version, max_entries: int = 1024):
+        self.version = version
+        self._entries = LRUCache(max_entries)
+        self._version = MISSING
+        self._lock = threading.Lock()
+
+    def _current(self):
+        version = self.version()
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+        return version
+
+    def get_or_compute(self, key, compute):
+        version = self._current()
+        value = self._entries.get(key)
+        if value is MISSING:
+            value = compute()
+            # Not stored if the data changed while it was being computed
+            if self._version == version:
+                self._entries.set(key, value)
+        return value
+
+    def cached(self, key):
+        """
+        Decorator; key(*args, **kwargs) gives the memo key for a call, so
+        arguments such as a database session can be left out of it.
+        """
+
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                return self.get_or_compute(
+                    (func.__qualname__, key(*args, **kwargs)),
+                    lambda: func(*args, **kwargs),
+                )
+
+            wrapper.memo = self
+            return wrapper
+
+        return decorate
@@ -0,0 +1,48 @@
+import math
+
+EARTH_RADIUS_M = 6371000
+METERS_PER_DEGREE = 111320.0
+
+
+def bounding_box(latitude: float, longitude: float, radius_m: float):
+    """
+    Smallest lat/lng box containing the circle of radius_m around a point.
+
+    Returns:
+        (south, north, west, east) in degrees
+    """
+    delta_lat = radius_m / METERS_PER_DEGREE
+    # Longitude degrees shrink towards the poles; clamp to avoid dividing by ~0
+    cos_lat = max(math.cos(math.radians(latitude)), 0.01)
+    delta_lng = radius_m / (METERS_PER_DEGREE * cos_lat)
+    return (
+        latitude - delta_lat,
+        latitude + delta_lat,
+        longitude - delta_lng,
+        longitude + delta_lng,
+    )
+
+
+def haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two points in meters"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = (
+        math.sin(d_phi / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bearing_deg(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Initial compass bearing from the first point to the second, 0-360"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_lambda = math.radians(lng2 - lng1)
+    x = math.sin(d_lambda) * math.cos(phi2)
+    y = math.cos(phi1) * math.sin(phi2) - math.sin(phi1) * math.cos(phi2) * math.cos(
+        d_lambda
+    )
+    return (math.degrees(math.atan2(x, y)) + 360) % 360
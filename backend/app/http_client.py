@@ -0,0 +1,133 @@
+"""
+Shared async HTTP client for outbound API calls.
+
+One httpx.AsyncClient is opened at startup and closed at shutdown (see the
+lifespan in main.py), so connections are kept alive and reused across
+requests. Settings:
+
+    HTTP_MAX_CONNECTIONS       100   total open connections
+    HTTP_MAX_KEEPALIVE         20    idle connections kept for reuse
+    HTTP_PER_HOST_CONNECTIONS  10    concurrent requests per upstream host
+    HTTP_TIMEOUT               10    seconds, per request phase
+    HTTP_RETRIES               2     retries on connection errors, 429 and 5xx
+
+HTTP/2 is negotiated when the optional h2 package is installed.
+"""
+
+import asyncio
+import logging
+import os
+import random
+from urllib.parse import urlsplit
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_PER_HOST_CONNECTIONS = int(os.getenv("HTTP_PER_HOST_CONNECTIONS", "10"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_BACKOFF_BASE = 0.25
+HTTP_BACKOFF_MAX = 4.0
+
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+try:
+    import h2  # noqa: F401
+
+    _HTTP2 = True
+except ImportError:  # h2 is optional, HTTP/1.1 keep-alive still applies
+    _HTTP2 = False
+
+_client = None
+_client_loop = None
+_host_limits = {}
+
+
+def _create_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=_HTTP2,
+        timeout=httpx.Timeout(HTTP_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=30,
+        ),
+        follow_redirects=True,
+    )
+
+
+async def start():
+    get_client()
+
+
+async def close():
+    global _client, _client_loop
+    if _client is not None:
+        await _client.aclose()
+    _client = _client_loop = None
+    _host_limits.clear()
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    The shared client. Created on first use outside the app lifespan, and
+    recreated if a script runs several event loops one after another, since
+    connections cannot move between loops.
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        _client = _create_client()
+        _client_loop = loop
+        _host_limits.clear()
+    return _client
+
+
+def _host_limit(url: str) -> asyncio.Semaphore:
+    host = urlsplit(url).netloc
+    limit = _host_limits.get(host)
+    if limit is None:
+        limit = _host_limits[host] = asyncio.Semaphore(HTTP_PER_HOST_CONNECTIONS)
+    return limit
+
+
+def _backoff(attempt: int, response=None) -> float:
+    if response is not None:
+        retry_after = response.headers.get("retry-after", "")
+        if retry_after.isdigit():
+            return min(float(retry_after), HTTP_BACKOFF_MAX)
+    # Full jitter keeps retrying clients from synchronising
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * 2**attempt))
+
+
+async def request(method: str, url: str, retries: int = HTTP_RETRIES, **kwargs):
+    """
+    Send a request through the shared client.
+
+    Connection errors, timeouts, 429 and 5xx responses are retried with
+    jittered exponential backoff. The final response is returned as is;
+    callers decide whether to raise_for_status().
+    """
+    client = get_client()
+    async with _host_limit(url):
+        for attempt in range(retries + 1):
+            try:
+                response = await client.request(method, url, **kwargs)
+            except (httpx.TransportError, httpx.TimeoutException):
+                if attempt == retries:
+                    raise
+                delay = _backoff(attempt)
+            else:
+                if response.status_code not in _RETRY_STATUSES or attempt == retries:
+                    return response
+                delay = _backoff(attempt, response)
+                await response.aclose()
+            logger.debug("Retrying %s %s in %.2fs", method, url, delay)
+            await asyncio.sleep(delay)
+
+
+async def get(url: str, **kwargs):
+    return await request("GET", url, **kwargs)
@@ -0,0 +1,324 @@
+"""
+Build a places catalogue database from raw SerpAPI Google Maps dumps.
+
+    python -m app.ingest --out app/merged.db \\
+        "HCMC, Vietnam=dumps/hcmc" "Dalat, Vietnam=dumps/dalat" "Hue, Vietnam=dumps/hue"
+
+Every input is CITY=PATH, where PATH is a dump file or a directory that is
+searched recursively for *.json / *.jsonl files. Dump files are parsed in
+parallel by a process pool, places are deduplicated on place_id, scored, and
+written in bulk to a fresh database that replaces --out atomically. The same
+inputs always produce the same rows and ids.
+
+The server opens the catalogue in WAL mode, and a WAL left next to the new
+file would be replayed into it. Stop the server before ingesting into the
+file it serves; ingestion refuses to replace a database that another
+process still has open in WAL mode, and restarting the server afterwards
+picks up the new catalogue.
+"""
+
+import argparse
+import json
+import math
+import os
+import sqlite3
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.types import JSON
+
+from .json_codec import dumps
+from .place_migrations import index_places, upgrade_places_schema
+from .place_models import Place, PlaceBase
+
+
+# Bayesian prior for POI_score: a place needs about this many reviews before
+# its own rating outweighs the city average
+RATING_PRIOR_REVIEWS = 50
+
+_COLUMNS = [c.name for c in Place.__table__.columns if c.name != "id"]
+_JSON_COLUMNS = {
+    c.name for c in Place.__table__.columns if isinstance(c.type, JSON)
+}
+
+PLACES_SEARCH_DDL = """
+CREATE VIRTUAL TABLE places_search USING fts5(
+    title, place_id UNINDEXED, city_name UNINDEXED
+)
+"""
+TYPES_SEARCH_DDL = """
+CREATE VIRTUAL TABLE types_search USING fts5(
+    type_id, type_id_en, type_id_vi, city_name UNINDEXED
+)
+"""
+
+
+def _iter_results(path):
+    # SerpAPI search responses, bare result lists, or one result per line
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
+        data = json.load(f)
+    if isinstance(data, list):
+        yield from data
+    elif "local_results" in data:
+        yield from data["local_results"]
+    elif "place_results" in data:
+        yield data["place_results"]
+    else:
+        yield data
+
+
+def _normalize(result: dict, city_name: str):
+    place_id = result.get("place_id")
+    if not place_id:
+        return None
+    type_ids = result.get("type_ids")
+    if not type_ids and result.get("type_id"):
+        type_ids = [result["type_id"]]
+    row = {c: result.get(c) for c in _COLUMNS}
+    row["type_ids"] = type_ids or []
+    row["city_name"] = city_name
+    gps = result.get("gps_coordinates") or {}
+    row["latitude"] = gps.get("latitude")
+    row["longitude"] = gps.get("longitude")
+    return row
+
+
+def parse_dump(job):
+    """Worker: parse one dump file into normalized place rows"""
+    city_name, path = job
+    rows = []
+    labels = {}
+    for result in _iter_results(path):
+        row = _normalize(result, city_name)
+        if row is None:
+            continue
+        rows.append(row)
+        # SerpAPI lists human-readable types parallel to type_ids
+        for type_id, label in zip(row["type_ids"], result.get("types") or []):
+            labels.setdefault(type_id, label)
+    return rows, labels
+
+
+def collect_jobs(inputs):
+    jobs = []
+    for spec in inputs:
+        city_name, sep, path = spec.partition("=")
+        if not sep or not city_name or not path:
+            raise SystemExit(f"Expected CITY=PATH, got: {spec}")
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in files:
+                    if name.endswith((".json", ".jsonl")):
+                        jobs.append((city_name, os.path.join(root, name)))
+        else:
+            jobs.append((city_name, path))
+    # Sorted input order keeps rebuilds reproducible
+    return sorted(jobs)
+
+
+def _better(candidate, current):
+    # Duplicates across dumps: keep the record backed by more reviews
+    return (candidate.get("reviews") or 0) > (current.get("reviews") or 0)
+
+
+def score_places(places):
+    """Fill POI_score from a Bayesian average rating weighted by review volume"""
+    by_city = defaultdict(list)
+    for row in places:
+        by_city[row["city_name"]].append(row)
+    for rows in by_city.values():
+        rated = [r["rating"] for r in rows if r.get("rating") is not None]
+        city_mean = sum(rated) / len(rated) if rated else 0.0
+        for row in rows:
+            reviews = row.get("reviews") or 0
+            rating = row.get("rating")
+            if rating is None:
+                rating, reviews = city_mean, 0
+            bayes = (reviews * rating + RATING_PRIOR_REVIEWS * city_mean) / (
+                reviews + RATING_PRIOR_REVIEWS
+            )
+            row["POI_score"] = round(bayes * math.log1p(reviews), 4)
+
+
+def build_type_stats(places, labels_en, labels_vi):
+    """
+    Rank types per city by the summed POI_score of their places and assign
+    each place its best (highest ranked) type.
+    """
+    totals = defaultdict(float)
+    for row in places:
+        for type_id in row["type_ids"]:
+            totals[(row["city_name"], type_id)] += row["POI_score"] or 0.0
+
+    type_stats = []
+    for (city_name, type_id), score in sorted(totals.items()):
+        label_en = labels_en.get(type_id) or type_id.replace("_", " ")
+        type_stats.append(
+            {
+                "city_name": city_name,
+                "type_id": type_id,
+                "type_score": round(score, 4),
+                "type_id_en": label_en,
+                "type_id_vi": labels_vi.get(type_id) or label_en,
+            }
+        )
+
+    for row in places:
+        if not row["type_ids"]:
+            continue
+        best = max(row["type_ids"], key=lambda t: totals[(row["city_name"], t)])
+        label_en = labels_en.get(best) or best.replace("_", " ")
+        row["best_type_id"] = best
+        row["best_type_id_en"] = label_en
+        row["best_type_id_vi"] = labels_vi.get(best) or label_en
+    return type_stats
+
+
+def _db_value(row, column):
+    value = row.get(column)
+    if value is not None and column in _JSON_COLUMNS:
+        return dumps(value)
+    return value
+
+
+def write_database(path, places, type_stats):
+    engine = create_engine(f"sqlite:///{path}")
+    PlaceBase.metadata.create_all(bind=engine)
+    upgrade_places_schema(engine)
+    with engine.begin() as conn:
+        # A fresh file is discarded on failure, so durability is not needed
+        conn.exec_driver_sql("PRAGMA journal_mode=OFF")
+        conn.exec_driver_sql("PRAGMA synchronous=OFF")
+        placeholders = ", ".join("?" for _ in _COLUMNS)
+        conn.exec_driver_sql(
+            f"INSERT INTO places ({', '.join(_COLUMNS)}) VALUES ({placeholders})",
+            [tuple(_db_value(row, c) for c in _COLUMNS) for row in places],
+        )
+        conn.execute(
+            text(
+                "INSERT INTO type_stats"
+                " (city_name, type_id, type_score, type_id_en, type_id_vi)"
+                " VALUES (:city_name, :type_id, :type_score, :type_id_en, :type_id_vi)"
+            ),
+            type_stats,
+        )
+        conn.execute(
+            text(
+                "INSERT INTO city_types (city_name, type_name)"
+                " SELECT city_name, type_id FROM type_stats"
+            )
+        )
+        index_places(conn)
+        conn.execute(text(PLACES_SEARCH_DDL))
+        conn.execute(
+            text(
+                "INSERT INTO places_search (title, place_id, city_name)"
+                " SELECT title, place_id, city_name FROM places"
+            )
+        )
+        conn.execute(text(TYPES_SEARCH_DDL))
+        conn.execute(
+            text(
+                "INSERT INTO types_search (type_id, type_id_en, type_id_vi, city_name)"
+                " SELECT type_id, type_id_en, type_id_vi, city_name FROM type_stats"
+            )
+        )
+    with engine.connect() as conn:
+        conn.exec_driver_sql("ANALYZE")
+    engine.dispose()
+
+
+def _retire_wal(path: str):
+    """
+    Fold an existing database's WAL back into it and switch it out of WAL
+    mode, so no -wal/-shm files outlive the file they belong to.
+
+    Raises:
+        SystemExit: If another process still has the database open
+    """
+    sidecars = [path + "-wal", path + "-shm"]
+    if not any(os.path.exists(p) for p in sidecars):
+        return
+    conn = sqlite3.connect(path)
+    try:
+        # Only succeeds without other connections; otherwise it stays "wal"
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.execute("PRAGMA journal_mode=DELETE")
+    except sqlite3.OperationalError:
+        pass
+    finally:
+        conn.close()
+    if any(os.path.exists(p) for p in sidecars):
+        raise SystemExit(
+            f"{path} is open in WAL mode by another process;"
+            " stop the server before replacing its catalogue"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m app.ingest",
+        description="Build a places catalogue database from SerpAPI dumps",
+    )
+    parser.add_argument("inputs", nargs="+", metavar="CITY=PATH")
+    parser.add_argument("--out", default=os.path.join("app", "merged.db"))
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument(
+        "--labels-vi", help="JSON object mapping type_id to its Vietnamese label"
+    )
+    args = parser.parse_args(argv)
+
+    # Fail before the parse rather than after it
+    if os.path.exists(args.out):
+        _retire_wal(args.out)
+
+    started = time.perf_counter()
+    jobs = collect_jobs(args.inputs)
+    labels_vi = {}
+    if args.labels_vi:
+        with open(args.labels_vi, "r", encoding="utf-8") as f:
+            labels_vi = json.load(f)
+
+    places = {}
+    labels_en = {}
+    raw_count = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for rows, labels in pool.map(parse_dump, jobs, chunksize=4):
+            raw_count += len(rows)
+            for type_id, label in labels.items():
+                labels_en.setdefault(type_id, label)
+            for row in rows:
+                current = places.get(row["place_id"])
+                if current is None or _better(row, current):
+                    places[row["place_id"]] = row
+
+    ordered = [places[pid] for pid in sorted(places)]
+    ordered.sort(key=lambda r: r["city_name"])
+    score_places(ordered)
+    type_stats = build_type_stats(ordered, labels_en, labels_vi)
+
+    tmp_path = args.out + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    write_database(tmp_path, ordered, type_stats)
+    if os.path.exists(args.out):
+        _retire_wal(args.out)
+    os.replace(tmp_path, args.out)
+
+    print(
+        f"{len(jobs)} files, {raw_count} results -> {len(ordered)} places,"
+        f" {len(type_stats)} city types in {time.perf_counter() - started:.1f}s"
+        f" ({args.out})"
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
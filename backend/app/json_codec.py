@@ -0,0 +1,23 @@
+"""
+JSON encoding for hot paths (catalogue rows, bulk upserts, ingestion).
+
+dumps() returns str and loads() accepts str or bytes. orjson is used when it
+is installed; it is optional, and the stdlib json module is the fallback.
+"""
+
+import json
+
+try:
+    import orjson
+
+    def dumps(value) -> str:
+        return orjson.dumps(value).decode()
+
+    loads = orjson.loads
+
+except ImportError:
+
+    def dumps(value) -> str:
+        return json.dumps(value, ensure_ascii=False)
+
+    loads = json.loads
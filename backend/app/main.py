@@ -1,4 +1,6 @@
 # main.py
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -21,8 +23,26 @@ from .routers import gtranslate_router
 from .routers import places
 from .routers import categories
 from .routers import groq_router
+from . import http_client
+from .services.candidate_pools import start_candidate_pools
+from .services.exchangerate_service import start_rate_refresh
+from .services.gtranslate_service import close_translator
+from .services.matrix_service import start_precompute
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await http_client.start()
+    start_precompute()
+    start_candidate_pools()
+    rate_refresh = start_rate_refresh()
+    yield
+    rate_refresh.cancel()
+    await close_translator()
+    await http_client.close()
 
-app = FastAPI(debug=True)
+
+app = FastAPI(debug=True, lifespan=lifespan)
 
 origins = [
     "http://localhost:5173",
@@ -52,5 +72,6 @@ app.include_router(places.router)
 app.include_router(categories.router)
 app.include_router(groq_router.router)
 
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -1,10 +1,28 @@
-from sqlalchemy import create_engine, MetaData
+import logging
+import os
+import sqlite3
+import threading
+import time
+from sqlalchemy import MetaData, create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+from .cache import VersionedMemo
 from .place_models import PlaceBase
+from .place_migrations import upgrade_places_schema
+from .sqlite_engine import create_sqlite_engine
 
-DATABASE_URL = "sqlite:///app/merged.db"
+logger = logging.getLogger(__name__)
 
-engine = create_engine(DATABASE_URL)
+DATABASE_PATH = "app/merged.db"
+# The catalogue is static at serve time; "1" opens it read-only and immutable
+PLACES_DB_READONLY = os.getenv("PLACES_DB_READONLY", "0") == "1"
+# "1" serves read endpoints from an in-memory copy that follows file changes
+PLACES_DB_IN_MEMORY = os.getenv("PLACES_DB_IN_MEMORY", "0") == "1"
+PLACES_DB_RELOAD_INTERVAL = float(os.getenv("PLACES_DB_RELOAD_INTERVAL", "5"))
+
+engine = create_sqlite_engine(
+    DATABASE_PATH, read_only=PLACES_DB_READONLY, immutable=PLACES_DB_READONLY
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 metadata = MetaData()
 
@@ -17,4 +35,117 @@ def get_db():
         db.close()
 
 
-PlaceBase.metadata.create_all(bind=engine)
+def file_version(path: str):
+    # A WAL-mode writer only touches the -wal file until it checkpoints
+    return tuple(
+        os.stat(p).st_mtime_ns if os.path.exists(p) else 0
+        for p in (path, path + "-wal")
+    )
+
+
+class MemoryCatalogue:
+    """
+    Shared-cache in-memory copy of the catalogue database.
+
+    The file is copied with the SQLite backup API, so every table, index,
+    R*Tree and FTS table is available. A reload builds a complete new copy
+    and then swaps it in with a single assignment; sessions that are already
+    open keep reading the previous copy until they close.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.version = None
+        self._generation = 0
+        self._current = None
+        self._lock = threading.Lock()
+
+    def _build(self):
+        self._generation += 1
+        uri = f"file:places_catalogue_{self._generation}?mode=memory&cache=shared"
+
+        def connect():
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            conn.execute("PRAGMA query_only=1")
+            return conn
+
+        # Keeps the in-memory database alive while no session is open
+        keeper = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        source = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        try:
+            source.backup(keeper)
+        finally:
+            source.close()
+        mem_engine = create_engine("sqlite://", creator=connect, poolclass=QueuePool)
+        sessions = sessionmaker(autocommit=False, autoflush=False, bind=mem_engine)
+        return keeper, mem_engine, sessions
+
+    def load(self):
+        with self._lock:
+            version = file_version(self.path)
+            started = time.perf_counter()
+            built = self._build()
+            previous, self._current = self._current, built
+            self.version = version
+        logger.info(
+            "Loaded places catalogue into memory in %.2fs",
+            time.perf_counter() - started,
+        )
+        if previous:
+            keeper, old_engine, _ = previous
+            old_engine.dispose()
+            keeper.close()
+
+    def reload_if_changed(self):
+        if file_version(self.path) != self.version:
+            self.load()
+
+    def session(self):
+        return self._current[2]()
+
+    def watch(self, interval: float):
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.reload_if_changed()
+                except Exception:
+                    logger.exception("Reloading the places catalogue failed")
+
+        threading.Thread(target=run, name="places-catalogue", daemon=True).start()
+
+
+memory_catalogue = MemoryCatalogue(DATABASE_PATH) if PLACES_DB_IN_MEMORY else None
+
+
+def catalogue_version():
+    """Version of the catalogue that get_read_db() sessions read"""
+    if memory_catalogue is not None:
+        # The in-memory copy trails the file until the watcher reloads it
+        return memory_catalogue.version
+    return file_version(DATABASE_PATH)
+
+
+# Lookups derived from the catalogue, kept until the data read changes
+catalogue_memo = VersionedMemo(catalogue_version)
+
+
+def get_read_db():
+    """Session for read-only catalogue lookups, memory-resident when enabled"""
+    if memory_catalogue is None:
+        yield from get_db()
+        return
+    db = memory_catalogue.session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+if not PLACES_DB_READONLY:
+    PlaceBase.metadata.create_all(bind=engine)
+    upgrade_places_schema(engine)
+
+if memory_catalogue is not None:
+    memory_catalogue.load()
+    memory_catalogue.watch(PLACES_DB_RELOAD_INTERVAL)
@@ -0,0 +1,139 @@
+"""
+Derived indexes for the places catalogue.
+
+The catalogue databases are built offline, so structures that the API relies
+on are added to existing files in place. upgrade_places_schema() is idempotent
+and runs when place_database is imported; running this module rebuilds every
+derived index from scratch:
+
+    python -m app.place_migrations
+"""
+
+from sqlalchemy import text
+
+# Bounding-box index over places.latitude / places.longitude, keyed by places.id
+PLACES_RTREE_DDL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS places_rtree USING rtree(
+    id, min_lat, max_lat, min_lng, max_lng
+)
+"""
+
+# Covers the per-city type rankings (unique-top-types, itinerary categories),
+# so they are answered from the index in type_score order without a sort
+TYPE_STATS_INDEX_COLUMNS = ("city_name", "type_score", "type_id", "type_id_en", "type_id_vi")
+TYPE_STATS_INDEX_DDL = """
+CREATE INDEX IF NOT EXISTS ix_type_stats_city_score
+ON type_stats (city_name, type_score DESC, type_id, type_id_en, type_id_vi)
+"""
+
+
+def table_columns(conn, table: str):
+    return {row[1] for row in conn.execute(text(f"PRAGMA table_info({table})"))}
+
+
+def table_exists(conn, table: str) -> bool:
+    row = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE name = :name"), {"name": table}
+    ).fetchone()
+    return row is not None
+
+
+def _place_filter(place_ids, column="place_id"):
+    if place_ids is None:
+        return "", {}
+    params = {f"pid{i}": pid for i, pid in enumerate(place_ids)}
+    placeholders = ", ".join(f":{key}" for key in params)
+    return f" WHERE {column} IN ({placeholders})", params
+
+
+def index_places(conn, place_ids=None):
+    """
+    Materialize coordinates and refresh the spatial and type indexes.
+
+    Args:
+        conn: SQLAlchemy Connection or Session on the places database
+        place_ids: Google place_id values to refresh, or None for every row
+    """
+    if place_ids is not None and not place_ids:
+        return
+    where, params = _place_filter(place_ids)
+    conn.execute(
+        text(
+            "UPDATE places SET"
+            " latitude = json_extract(gps_coordinates, '$.latitude'),"
+            " longitude = json_extract(gps_coordinates, '$.longitude')" + where
+        ),
+        params,
+    )
+    id_where, _ = _place_filter(place_ids, "places.place_id")
+    conn.execute(
+        text(
+            "DELETE FROM places_rtree WHERE id IN (SELECT id FROM places"
+            + id_where
+            + ")"
+        ),
+        params,
+    )
+    conn.execute(
+        text(
+            "INSERT INTO places_rtree (id, min_lat, max_lat, min_lng, max_lng)"
+            " SELECT id, latitude, latitude, longitude, longitude FROM places"
+            + (id_where + " AND" if id_where else " WHERE")
+            + " latitude IS NOT NULL AND longitude IS NOT NULL"
+        ),
+        params,
+    )
+    conn.execute(text("DELETE FROM place_types" + where), params)
+    conn.execute(
+        text(
+            "INSERT OR IGNORE INTO place_types (place_id, type_id)"
+            " SELECT places.place_id, json_each.value"
+            " FROM places, json_each(places.type_ids)"
+            + (id_where + " AND" if id_where else " WHERE")
+            + " json_each.value IS NOT NULL"
+        ),
+        params,
+    )
+
+
+def upgrade_places_schema(engine, rebuild: bool = False):
+    """Add missing derived columns/tables and backfill them when created"""
+    with engine.begin() as conn:
+        needs_backfill = rebuild
+        columns = table_columns(conn, "places")
+        for column in ("latitude", "longitude"):
+            if column not in columns:
+                conn.execute(text(f"ALTER TABLE places ADD COLUMN {column} FLOAT"))
+                needs_backfill = True
+        if not table_exists(conn, "places_rtree"):
+            conn.execute(text(PLACES_RTREE_DDL))
+            needs_backfill = True
+        # place_types is created by create_all(), so an empty table next to a
+        # populated catalogue means it has never been backfilled
+        if conn.execute(
+            text(
+                "SELECT NOT EXISTS (SELECT 1 FROM place_types)"
+                " AND EXISTS (SELECT 1 FROM places)"
+            )
+        ).scalar():
+            needs_backfill = True
+        if rebuild:
+            conn.execute(text("DELETE FROM places_rtree"))
+            conn.execute(text("DELETE FROM place_types"))
+        if needs_backfill:
+            index_places(conn)
+        # Older catalogue snapshots predate the bilingual type_stats columns
+        if table_exists(conn, "type_stats") and set(TYPE_STATS_INDEX_COLUMNS) <= (
+            table_columns(conn, "type_stats")
+        ):
+            conn.execute(text(TYPE_STATS_INDEX_DDL))
+
+
+if __name__ == "__main__":
+    from .place_database import engine
+
+    upgrade_places_schema(engine, rebuild=True)
+    with engine.connect() as conn:
+        count = conn.execute(text("SELECT count(*) FROM places_rtree")).scalar()
+        links = conn.execute(text("SELECT count(*) FROM place_types")).scalar()
+    print(f"Indexed {count} places and {links} place types")
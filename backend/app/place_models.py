@@ -5,6 +5,7 @@ from sqlalchemy import (
     String,
     Float,
     JSON,
+    Index,
     UniqueConstraint,
 )
 from sqlalchemy.orm import relationship
@@ -58,6 +59,9 @@ class Place(PlaceBase):
     best_type_id = Column(String)
     best_type_id_en = Column(String)
     best_type_id_vi = Column(String)
+    # Materialized from gps_coordinates and indexed by places_rtree
+    latitude = Column(Float)
+    longitude = Column(Float)
 
 
 class CityType(PlaceBase):
@@ -66,3 +70,22 @@ class CityType(PlaceBase):
     city_name = Column(String, index=True)
     type_name = Column(String, index=True)
     __table_args__ = (UniqueConstraint("city_name", "type_name", name="_city_type_uc"),)
+
+
+class TypeStat(PlaceBase):
+    # Per-city ranking of place types, built by app.ingest
+    __tablename__ = "type_stats"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    city_name = Column(String, index=True)
+    type_id = Column(String)
+    type_score = Column(Float)
+    type_id_en = Column(String)
+    type_id_vi = Column(String)
+
+
+class PlaceTypeLink(PlaceBase):
+    # Normalized copy of places.type_ids, maintained by place_migrations.index_places
+    __tablename__ = "place_types"
+    place_id = Column(String, primary_key=True)
+    type_id = Column(String, primary_key=True)
+    __table_args__ = (Index("ix_place_types_type_place", "type_id", "place_id"),)
@@ -0,0 +1,165 @@
+"""
+Row decoding for raw SQL results on catalogue tables.
+
+Routers and services query the places database with text() SQL, so rows come
+back with JSON columns still serialized. A RowDecoder is compiled once per
+model (and per column projection) and maps each column index straight to its
+converter, instead of inspecting column types on every row.
+"""
+
+from sqlalchemy.types import JSON, Float, Integer
+from .cache import MISSING, LRUCache
+from .json_codec import loads
+from .place_models import Place
+
+
+def _decode_json(value):
+    if value is None:
+        return None
+    try:
+        return loads(value)
+    except Exception:
+        return value
+
+
+def _decode_float(value):
+    return float(value) if value is not None else None
+
+
+def _decode_int(value):
+    return int(value) if value is not None else None
+
+
+def _converter_for(col_type):
+    if isinstance(col_type, JSON):
+        return _decode_json
+    if isinstance(col_type, Float):
+        return _decode_float
+    if isinstance(col_type, Integer):
+        return _decode_int
+    # Otherwise, leave as is (String, etc.)
+    return None
+
+
+# Distinct column projections kept compiled per decoder
+PROJECTION_CACHE_SIZE = 256
+
+
+class RowDecoder:
+    """
+    Converts result rows of a model's table into JSON-ready dicts.
+
+    Args:
+        model: Declarative model whose table the rows come from
+        columns: Column names in the order they appear in the row;
+            defaults to every column of the table (SELECT *)
+    """
+
+    def __init__(self, model, columns=None):
+        table_columns = model.__table__.columns
+        self.model = model
+        self.columns = tuple(columns or (c.name for c in table_columns))
+        self._fields = tuple(
+            (idx, name, _converter_for(table_columns[name].type))
+            for idx, name in enumerate(self.columns)
+        )
+        # Projections come from client fields= values, so the cache is bounded
+        self._projections = LRUCache(PROJECTION_CACHE_SIZE)
+
+    def project(self, columns) -> "RowDecoder":
+        """Decoder for rows that select only the given columns, in that order"""
+        key = tuple(columns)
+        if key == self.columns:
+            return self
+        decoder = self._projections.get(key)
+        if decoder is MISSING:
+            decoder = RowDecoder(self.model, key)
+            self._projections.set(key, decoder)
+        return decoder
+
+    def select_list(self, table: str = None) -> str:
+        """Comma-separated column list for the SELECT clause of this projection"""
+        prefix = f"{table}." if table else ""
+        return ", ".join(f"{prefix}{name}" for name in self.columns)
+
+    def __call__(self, row) -> dict:
+        return {
+            name: converter(row[idx]) if converter else row[idx]
+            for idx, name, converter in self._fields
+        }
+
+    def decode_all(self, rows) -> list:
+        return [self(row) for row in rows]
+
+
+PLACE_DECODER = RowDecoder(Place)
+
+# Named field sets for the place endpoints, smallest first
+_MARKER_FIELDS = (
+    "id",
+    "place_id",
+    "title",
+    "latitude",
+    "longitude",
+    "POI_score",
+    "best_type_id",
+)
+_CARD_FIELDS = _MARKER_FIELDS + (
+    "gps_coordinates",
+    "rating",
+    "reviews",
+    "price",
+    "type",
+    "address",
+    "open_state",
+    "thumbnail",
+    "city_name",
+    "en_names",
+    "vi_names",
+    "best_type_id_en",
+    "best_type_id_vi",
+)
+PLACE_FIELD_PRESETS = {
+    "marker": _MARKER_FIELDS,
+    "card": _CARD_FIELDS,
+    "full": PLACE_DECODER.columns,
+}
+
+
+def place_decoder_for_fields(fields: str = None) -> RowDecoder:
+    """
+    Resolve a fields= value into a projected Place decoder.
+
+    Args:
+        fields: Comma-separated preset names and/or column names,
+            e.g. "marker" or "card,phone,website"; None selects every column.
+            The projection lists the columns in table order.
+
+    Raises:
+        ValueError: If a name is neither a preset nor a places column
+    """
+    if not fields:
+        return PLACE_DECODER
+    selected = []
+    for name in (part.strip() for part in fields.split(",")):
+        if not name:
+            continue
+        if name in PLACE_FIELD_PRESETS:
+            selected.extend(PLACE_FIELD_PRESETS[name])
+        elif name in PLACE_DECODER.columns:
+            selected.append(name)
+        else:
+            raise ValueError(f"Unknown place field: {name}")
+    # Table order, so every spelling of the same field set shares a decoder
+    wanted = set(selected)
+    return PLACE_DECODER.project(c for c in PLACE_DECODER.columns if c in wanted)
+
+
+_DECODERS = {Place: PLACE_DECODER}
+
+
+def decoder_for(model) -> RowDecoder:
+    decoder = _DECODERS.get(model)
+    if decoder is None:
+        decoder = _DECODERS[model] = RowDecoder(model)
+    return decoder
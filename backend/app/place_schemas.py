@@ -57,3 +57,7 @@ class PlaceIn(BaseModel):
 
 class PlacesPayload(BaseModel):
     places: List[PlaceIn]
+
+
+class PlaceIdsPayload(BaseModel):
+    ids: List[str]
@@ -0,0 +1,79 @@
+"""
+Helpers for Google encoded polylines (precision 5, as OSRM returns them).
+"""
+
+import math
+import re
+
+import polyline
+
+from .geo import METERS_PER_DEGREE
+
+# Each encoded value ends with the first character below the continuation
+# range, i.e. one of chr(63) .. chr(94)
+_VALUE_END = re.compile(r"[\x3f-\x5e]")
+
+
+def _first_point_length(encoded: str) -> int:
+    ends = _VALUE_END.finditer(encoded)
+    next(ends)
+    return next(ends).end()
+
+
+def join_polylines(parts):
+    """
+    Concatenate polylines where each part starts at the point the previous
+    one ended, as OSRM step geometries do, without decoding them.
+
+    A part's first point is absolute and everything after it is a delta from
+    that point, so dropping it leaves deltas that continue the previous part.
+    """
+    parts = [p for p in parts if p]
+    if not parts:
+        return None
+    joined = [parts[0]]
+    for part in parts[1:]:
+        rest = part[_first_point_length(part):]
+        # "?" encodes a zero delta; an arrive step adds nothing but a repeat
+        if rest.strip("?"):
+            joined.append(rest)
+    return "".join(joined)
+
+
+def douglas_peucker(coords, tolerance_m: float):
+    """Keep the points of a (lat, lng) line that deviate more than tolerance_m"""
+    if len(coords) < 3:
+        return list(coords)
+    # Local equirectangular projection; fine at route scale
+    lng_scale = math.cos(math.radians(coords[0][0]))
+    xy = [(lng * lng_scale * METERS_PER_DEGREE, lat * METERS_PER_DEGREE) for lat, lng in coords]
+    keep = [False] * len(coords)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(coords) - 1)]
+    while stack:
+        first, last = stack.pop()
+        ax, ay = xy[first]
+        bx, by = xy[last]
+        dx, dy = bx - ax, by - ay
+        length_sq = dx * dx + dy * dy
+        worst, worst_dist = None, tolerance_m
+        for i in range(first + 1, last):
+            px, py = xy[i]
+            if length_sq == 0:
+                dist = math.hypot(px - ax, py - ay)
+            else:
+                t = max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length_sq))
+                dist = math.hypot(px - ax - t * dx, py - ay - t * dy)
+            if dist > worst_dist:
+                worst, worst_dist = i, dist
+        if worst is not None:
+            keep[worst] = True
+            stack.append((first, worst))
+            stack.append((worst, last))
+    return [c for c, k in zip(coords, keep) if k]
+
+
+def simplify_polyline(encoded, tolerance_m: float):
+    if not encoded:
+        return encoded
+    return polyline.encode(douglas_peucker(polyline.decode(encoded), tolerance_m))
@@ -1,22 +1,39 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Body, Query
 from decimal import Decimal
-from ..services.exchangerate_service import convertVNDtoUSD, convertUSDtoVND
+from ..services.exchangerate_service import convert, convert_many, rate_table
 
 router = APIRouter(prefix="/api/exchangerate", tags=["exchangerate"])
 
 
 @router.get("/")
-def convert_currency(
+async def convert_currency(
     amount: float = Query(...), source: str = Query(...), target: str = Query(...)
 ):
     try:
-        decimal_amount = Decimal(str(amount))
-        if source == "vnd" and target == "usd":
-            result = convertVNDtoUSD(decimal_amount)
-        elif source == "usd" and target == "vnd":
-            result = convertUSDtoVND(decimal_amount)
-        else:
-            return {"error": "Unsupported currency pair"}
+        result = await convert(Decimal(str(amount)), source, target)
         return {"amount": float(result), "source": source, "target": target}
     except Exception as e:
         return {"error": str(e)}
+
+
+@router.post("/batch")
+async def convert_batch(
+    items: list = Body(...),
+    target: str = Body(...),
+):
+    """
+    Convert many amounts into one currency, e.g. every cost of a trip.
+
+    Body: {"target": "vnd", "items": [{"amount": 12.5, "source": "usd"}, ...]}
+    Returns the converted amounts in the order given.
+    """
+    try:
+        pairs = [(Decimal(str(item["amount"])), item["source"]) for item in items]
+        results = await convert_many(pairs, target)
+        return {
+            "amounts": [float(result) for result in results],
+            "target": target,
+            "date": rate_table.date,
+        }
+    except Exception as e:
+        return {"error": str(e)}
@@ -1,12 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import or_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 from typing import List, Optional
-import json
+from datetime import datetime
+import heapq
 
+from ..json_codec import dumps
+from ..geo import bounding_box, haversine_m
 from ..user_database import get_db
 from ..user_schemas import FoursquarePlaceCreate, FoursquarePlaceResponse
 from ..user_models import FoursquarePlace
-from ..services.foursquare_service import search_places, get_place_details
+from ..services.foursquare_service import search_places, get_place_details, cache_stats
+
 
 router = APIRouter(prefix="/api/foursquare", tags=["Foursquare"])
 
@@ -37,24 +44,18 @@ def determine_place_type(categories: list) -> str:
     return "travel"  # Default
 
 
-def save_place_to_db(place_data: dict, place_type: str, db: Session) -> FoursquarePlace:
-    """Save or update a Foursquare place in the database"""
-    fsq_place_id = place_data.get("fsq_place_id")
+def _dumps_or_none(value):
+    return dumps(value) if value else None
 
-    # Check if place already exists
-    existing_place = (
-        db.query(FoursquarePlace)
-        .filter(FoursquarePlace.fsq_place_id == fsq_place_id)
-        .first()
-    )
 
+def place_row(place_data: dict, place_type: str, cached_at: datetime) -> dict:
+    """Column values of a foursquare_places row for one API result"""
     # Extract location data
     location = place_data.get("location", {})
     address = location.get("formatted_address") or location.get("address")
 
-    # Prepare place data
-    place_dict = {
-        "fsq_place_id": fsq_place_id,
+    return {
+        "fsq_place_id": place_data.get("fsq_place_id"),
         "place_type": place_type,
         "name": place_data.get("name"),
         "address": address,
@@ -65,38 +66,83 @@ def save_place_to_db(place_data: dict, place_type: str, db: Session) -> Foursqua
         "phone": place_data.get("tel"),
         "website": place_data.get("website"),
         "description": place_data.get("description"),
-        "hours": (
-            json.dumps(place_data.get("hours")) if place_data.get("hours") else None
-        ),
-        "categories": (
-            json.dumps(place_data.get("categories"))
-            if place_data.get("categories")
-            else None
-        ),
-        "photos": (
-            json.dumps(place_data.get("photos")) if place_data.get("photos") else None
-        ),
+        "hours": _dumps_or_none(place_data.get("hours")),
+        "categories": _dumps_or_none(place_data.get("categories")),
+        "photos": _dumps_or_none(place_data.get("photos")),
+        "cached_at": cached_at,
     }
 
-    if existing_place:
-        # Update existing place
-        for key, value in place_dict.items():
-            if key != "fsq_place_id":  # Don't update PK
-                setattr(existing_place, key, value)
-        db.commit()
-        db.refresh(existing_place)
-        return existing_place
-    else:
-        # Create new place
-        new_place = FoursquarePlace(**place_dict)
-        db.add(new_place)
-        db.commit()
-        db.refresh(new_place)
-        return new_place
+
+def upsert_places(rows: List[dict], db: Session) -> List[FoursquarePlace]:
+    """
+    Insert or update place rows in one statement and one transaction, then
+    load them back with a single SELECT, in the order given. Existing rows
+    whose cached_at is at least as recent are left untouched.
+    """
+    if not rows:
+        return []
+    # A place repeated within one batch: the last copy wins
+    unique = list({row["fsq_place_id"]: row for row in rows}.values())
+    table = FoursquarePlace.__table__
+    stmt = sqlite_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.fsq_place_id],
+        set_={
+            column: stmt.excluded[column]
+            for column in unique[0]
+            if column != "fsq_place_id"
+        },
+        where=or_(
+            table.c.cached_at.is_(None), table.c.cached_at < stmt.excluded.cached_at
+        ),
+    )
+    db.execute(stmt, unique)
+    db.commit()
+
+    places = (
+        db.query(FoursquarePlace)
+        .filter(FoursquarePlace.fsq_place_id.in_([row["fsq_place_id"] for row in unique]))
+        .all()
+    )
+    by_id = {place.fsq_place_id: place for place in places}
+    return [by_id[row["fsq_place_id"]] for row in rows]
+
+
+def save_place_to_db(
+    place_data: dict,
+    place_type: str,
+    db: Session,
+    cached_at: Optional[datetime] = None,
+) -> FoursquarePlace:
+    """
+    Save or update a Foursquare place in the database. cached_at is when the
+    data was fetched from Foursquare; rows at least that recent are kept.
+    """
+    row = place_row(place_data, place_type, cached_at or datetime.utcnow())
+    return upsert_places([row], db)[0]
+
+
+def save_search_results(
+    results: list, place_type: str, db: Session, cached_at: Optional[datetime] = None
+) -> List[FoursquarePlace]:
+    cached_at = cached_at or datetime.utcnow()
+    rows = []
+
+    for place_data in results:
+        # Determine actual type from categories
+        actual_type = determine_place_type(place_data.get("categories", []))
+
+        # Use the requested type if categories don't match
+        final_type = actual_type if actual_type else place_type
+
+        rows.append(place_row(place_data, final_type, cached_at))
+
+    # One transaction for the whole page of results
+    return upsert_places(rows, db)
 
 
 @router.post("/search", response_model=List[FoursquarePlaceResponse])
-def search_and_save_places(
+async def search_and_save_places(
     place_type: str = Query(..., description="Place type: stay, eat, or travel"),
     ll: Optional[str] = Query(
         None, description="Latitude,Longitude (e.g., '10.7769,106.7009')"
@@ -126,7 +172,7 @@ def search_and_save_places(
         )
 
     # Search Foursquare
-    search_result = search_places(ll=ll, near=near, query=query, limit=limit)
+    search_result = await search_places(ll=ll, near=near, query=query, limit=limit)
 
     if not search_result.get("success"):
         raise HTTPException(
@@ -135,20 +181,52 @@ def search_and_save_places(
         )
 
     results = search_result["data"].get("results", [])
-    saved_places = []
+    fetched_at = datetime.utcfromtimestamp(search_result["fetched_at"])
+    # Database writes are blocking; keep them off the event loop
+    return await run_in_threadpool(
+        save_search_results, results, place_type, db, fetched_at
+    )
 
-    # Save each place to database
-    for place_data in results:
-        # Determine actual type from categories
-        actual_type = determine_place_type(place_data.get("categories", []))
 
-        # Use the requested type if categories don't match
-        final_type = actual_type if actual_type else place_type
+@router.get("/cache/stats")
+def get_cache_stats():
+    """Foursquare response cache hit/miss counters per resource"""
+    return cache_stats()
 
-        saved_place = save_place_to_db(place_data, final_type, db)
-        saved_places.append(saved_place)
 
-    return saved_places
+def nearby_places(
+    query, db: Session, lat: float, lon: float, radius_m: float, limit: int
+) -> List[FoursquarePlace]:
+    """
+    Places from query within radius_m of (lat, lon), nearest first and by
+    rating among equally near ones.
+
+    The bounding box is a range scan on ix_foursquare_places_lat_lng that
+    reads only ids, coordinates and ratings; exact distances are computed for
+    those candidates alone, and full rows are loaded for the final page.
+    """
+    south, north, west, east = bounding_box(lat, lon, radius_m)
+    candidates = query.with_entities(
+        FoursquarePlace.fsq_place_id,
+        FoursquarePlace.latitude,
+        FoursquarePlace.longitude,
+        FoursquarePlace.rating,
+    ).filter(
+        FoursquarePlace.latitude.between(south, north),
+        FoursquarePlace.longitude.between(west, east),
+    )
+    nearby = []
+    for fsq_place_id, latitude, longitude, rating in candidates:
+        distance = haversine_m(lat, lon, latitude, longitude)
+        if distance <= radius_m:
+            nearby.append((distance, -(rating or 0.0), fsq_place_id))
+    ids = [fsq_place_id for _, _, fsq_place_id in heapq.nsmallest(limit, nearby)]
+    if not ids:
+        return []
+
+    places = db.query(FoursquarePlace).filter(FoursquarePlace.fsq_place_id.in_(ids))
+    by_id = {place.fsq_place_id: place for place in places}
+    return [by_id[fsq_place_id] for fsq_place_id in ids]
 
 
 @router.get("/places", response_model=List[FoursquarePlaceResponse])
@@ -184,27 +262,14 @@ def get_places(
     if max_price:
         query = query.filter(FoursquarePlace.price_level <= max_price)
 
+    # Proximity search: nearest first, then by rating; limit applied last
+    if lat is not None and lon is not None and radius_km:
+        return nearby_places(query, db, lat, lon, radius_km * 1000, limit)
+
     # Apply limit
     query = query.limit(limit)
 
-    places = query.all()
-
-    # If location provided, filter by distance (simple bounding box for now)
-    if lat and lon and radius_km:
-        # Simple bounding box filter (approximate)
-        # 1 degree lat/lon ≈ 111 km
-        delta = radius_km / 111.0
-        filtered_places = [
-            p
-            for p in places
-            if p.latitude
-            and p.longitude
-            and abs(p.latitude - lat) <= delta
-            and abs(p.longitude - lon) <= delta
-        ]
-        return filtered_places
-
-    return places
+    return query.all()
 
 
 @router.get("/places/{fsq_place_id}", response_model=FoursquarePlaceResponse)
@@ -1,6 +1,6 @@
 import os
 from fastapi import APIRouter, Body, Depends
-from ..place_database import get_db
+from ..place_database import get_read_db
 from sqlalchemy.orm import Session
 from google import genai
 from ..services.gemini_service import list_tourist_recommendations
@@ -10,7 +10,7 @@ router = APIRouter(prefix="/api/itinerary", tags=["gemini"])
 
 @router.post("/")
 def get_itinerary(
-    paragraph: str = Body(..., embed=True), db: Session = Depends(get_db)
+    paragraph: str = Body(..., embed=True), db: Session = Depends(get_read_db)
 ):
     try:
         api_key = os.getenv("GEMINI_API_KEY")
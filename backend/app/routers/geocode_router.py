@@ -6,9 +6,9 @@ router = APIRouter(prefix="/api/geocode", tags=["Geocode"])
 
 
 @router.get("/")
-def get_geocode(q: str = Query(..., description="Search location")):
+async def get_geocode(q: str = Query(..., description="Search location")):
     try:
-        result = geocode_location(q)
+        result = await geocode_location(q)
         if not result:
             raise HTTPException(status_code=404, detail="Location not found")
         return result
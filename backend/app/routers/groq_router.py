@@ -1,6 +1,6 @@
 import os
 from fastapi import APIRouter, Body, Depends
-from ..place_database import get_db
+from ..place_database import get_read_db
 from sqlalchemy.orm import Session
 from groq import Groq
 from ..services.groq_service import (
@@ -15,7 +15,7 @@ router = APIRouter(prefix="/api/groq", tags=["groq"])
 
 @router.post("/")
 def get_itinerary(
-    paragraph: str = Body(..., embed=True), db: Session = Depends(get_db)
+    paragraph: str = Body(..., embed=True), db: Session = Depends(get_read_db)
 ):
     try:
         api_key = os.getenv("GROQ_API_KEY")
@@ -32,7 +32,7 @@ class DetectCommandRequest(BaseModel):
 
 
 @router.post("/detect-command")
-def detect_command(body: DetectCommandRequest, db: Session = Depends(get_db)):
+def detect_command(body: DetectCommandRequest, db: Session = Depends(get_read_db)):
     try:
         api_key = os.getenv("GROQ_API_KEY")
         client = Groq(api_key=api_key)
@@ -3,6 +3,7 @@ from ..services.gtranslate_service import (
     translateEnToVi,
     translateViToEn,
     detect_language,
+    translate_many,
 )
 
 router = APIRouter(prefix="/api/translate", tags=["translate"])
@@ -27,3 +28,16 @@ async def detect_lang(data: dict = Body(...)):
     text = data.get("text", "")
     lang = await detect_language(text)
     return {"language": lang}
+
+
+@router.post("/batch")
+async def translate_batch(data: dict = Body(...)):
+    """
+    Body: {"texts": [...], "src": "en", "dest": "vi"}
+    Returns {"translations": [...]} in input order, null where translation failed.
+    """
+    texts = data.get("texts", [])
+    translations = await translate_many(
+        texts, data.get("src", "en"), data.get("dest", "vi")
+    )
+    return {"translations": translations}
@@ -1,12 +1,31 @@
-from fastapi import APIRouter, Body
-from ..services.geocode_service import route_osrm
+from typing import List, Optional
+from fastapi import APIRouter, Body, Query
+from ..services.geocode_service import route_optimized, route_osrm
+from ..services.matrix_service import compute_matrix
 
 router = APIRouter(prefix="/api/route", tags=["Route"])
 
+# Wall-clock cap on annealing per request, so one call cannot hold a worker
+ANNEAL_MAX_BUDGET_MS = 10_000
+
 
 @router.post("/optimize")
-def get_route(destinations: list = Body(...)):
-    # destinations: [{"lat": ..., "lon": ...}, ...]
+def get_route(
+    destinations: list = Body(...),
+    solver: str = Query("native", pattern="^(native|osrm)$"),
+    days: int = Query(1, ge=1, le=14),
+    end_index: Optional[int] = None,
+    day_start: str = Query("08:00", pattern=r"^\d{1,2}:\d{2}$"),
+    max_day_minutes: Optional[int] = Query(None, gt=0),
+    weekday: Optional[str] = None,
+    visit_minutes: float = Query(0, ge=0),
+    seed: int = 0,
+    anneal_iterations: int = Query(0, ge=0, le=1_000_000),
+    time_budget_ms: int = Query(2000, gt=0, le=ANNEAL_MAX_BUDGET_MS),
+    geometry: str = Query("full", pattern="^(full|simplified|none)$"),
+    tolerance_m: float = Query(10.0, gt=0),
+):
+    # destinations: [{"lat": ..., "lon": ..., "operating_hours": {...}, "visit_minutes": ...}, ...]
     try:
         points = [
             {
@@ -16,10 +35,54 @@ def get_route(destinations: list = Body(...)):
             }
             for d in destinations
         ]
-        result = route_osrm(points)
+        if solver == "osrm":
+            return route_osrm(points, geometry, tolerance_m)
+        for point, d in zip(points, destinations):
+            if d.get("operating_hours"):
+                point["operating_hours"] = d["operating_hours"]
+            if d.get("visit_minutes") is not None:
+                point["visit_minutes"] = d["visit_minutes"]
+        hours, minutes = day_start.split(":")
+        result = route_optimized(
+            points,
+            days=days,
+            end_index=end_index,
+            day_start=(int(hours) * 60 + int(minutes)) * 60,
+            max_day=max_day_minutes * 60 if max_day_minutes else None,
+            weekday=weekday.lower() if weekday else None,
+            visit_minutes=visit_minutes,
+            seed=seed,
+            anneal_iterations=anneal_iterations,
+            time_limit=time_budget_ms / 1000,
+            geometry=geometry,
+            tolerance_m=tolerance_m,
+        )
         return result
     except Exception as e:
         return {
             "success": False,
             "error": str(e),
         }
+
+
+@router.post("/matrix")
+def get_matrix(
+    destinations: list = Body(...),
+    sources: Optional[List[int]] = Body(None),
+    targets: Optional[List[int]] = Body(None),
+):
+    """
+    Travel durations (s) and distances (m) between destinations.
+
+    Body: {"destinations": [{"lat": ..., "lon": ...}, ...],
+           "sources": [row indices], "targets": [column indices]}
+    """
+    try:
+        points = [{"lat": d["lat"], "lon": d["lon"]} for d in destinations]
+        result = compute_matrix(points, sources, targets)
+        return {"success": True, **result}
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+        }
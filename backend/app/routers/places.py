@@ -1,90 +1,394 @@
+import hashlib
 import json
-from fastapi import APIRouter, Depends, Query
+import os
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from ..place_models import Place, CityType, PlaceBase
-from ..place_schemas import PlaceIn, PlacesPayload, GPSCoordinates
-from ..place_database import get_db
+from ..place_schemas import PlaceIn, PlacesPayload, PlaceIdsPayload, GPSCoordinates
+from ..cache import VersionedMemo
+from ..place_database import catalogue_memo, get_db, get_read_db
+from ..place_migrations import index_places
+from ..place_rows import PLACE_DECODER, RowDecoder, place_decoder_for_fields
+from ..geo import bounding_box
+from ..services.candidate_pools import CANDIDATE_POOL_SIZE, candidate_pools
+from ..services.gazetteer import canonical_city
 from ..services.gtranslate_service import translateEnToVi, translateViToEn
+from ..services.place_ranker import DEFAULT_WEIGHTS, place_ranker
 from sqlalchemy.orm import Session
-from sqlalchemy import Integer, desc, func, text, JSON, Float
+from sqlalchemy import desc, func, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 import asyncio
+from typing import List, Optional
 
 router = APIRouter()
 
 
+# Rows per INSERT ... ON CONFLICT statement when saving places
+PLACES_SAVE_BATCH_SIZE = int(os.getenv("PLACES_SAVE_BATCH_SIZE", "500"))
+_PLACE_COLUMNS = [c.name for c in Place.__table__.columns if c.name != "id"]
+
+
+def _upsert_place_batch(db: Session, places: List[PlaceIn], update: bool):
+    """
+    Insert one batch of places with a single set-based statement.
+
+    Returns:
+        (inserted, updated, skipped) counts for the batch
+    """
+    rows = {}
+    for place in places:
+        # Repeated place_ids within a payload are skipped after the first
+        if place.place_id not in rows:
+            data = place.dict()
+            rows[place.place_id] = {c: data.get(c) for c in _PLACE_COLUMNS}
+    skipped = len(places) - len(rows)
+    if not rows:
+        return 0, 0, skipped
+
+    existing = {
+        row[0]
+        for row in db.execute(
+            select(Place.place_id).where(Place.place_id.in_(list(rows)))
+        )
+    }
+    stmt = sqlite_insert(Place.__table__)
+    if update:
+        # Incoming NULLs keep the stored value instead of erasing it
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["place_id"],
+            set_={
+                c: func.coalesce(stmt.excluded[c], Place.__table__.c[c])
+                for c in _PLACE_COLUMNS
+                if c != "place_id"
+            },
+        )
+        touched = list(rows)
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=["place_id"])
+        touched = [pid for pid in rows if pid not in existing]
+    db.execute(stmt, list(rows.values()))
+    # Keep the materialized coordinates and spatial/type indexes in sync
+    index_places(db, touched)
+
+    inserted = len(rows) - len(existing)
+    if update:
+        return inserted, len(existing), skipped
+    return inserted, 0, skipped + len(existing)
+
+
+def _save_result(counts):
+    inserted, updated, skipped = counts
+    return {
+        "status": "success",
+        "count": inserted + updated,
+        "inserted": inserted,
+        "updated": updated,
+        "skipped": skipped,
+    }
+
+
 @router.post("/api/places/save")
-async def save_places(payload: PlacesPayload, db: Session = Depends(get_db)):
+async def save_places(
+    payload: PlacesPayload,
+    on_conflict: str = Query("skip", pattern="^(skip|update)$"),
+    db: Session = Depends(get_db),
+):
     try:
-        columns = {c.name for c in Place.__table__.columns}
-        for place in payload.places:
-            exists = db.query(Place).filter_by(place_id=place.place_id).first()
-            if exists:
-                continue  # Skip if already exists
-            place_data = {k: v for k, v in place.dict().items() if k in columns}
-            db.add(Place(**place_data))
+        counts = [0, 0, 0]
+        update = on_conflict == "update"
+        # All batches share one transaction
+        for start in range(0, len(payload.places), PLACES_SAVE_BATCH_SIZE):
+            batch = payload.places[start : start + PLACES_SAVE_BATCH_SIZE]
+            for i, n in enumerate(_upsert_place_batch(db, batch, update)):
+                counts[i] += n
         db.commit()
-        return {"status": "success", "count": len(payload.places)}
+        return _save_result(counts)
     except Exception as e:
         db.rollback()
         return {"status": "error", "message": str(e)}
 
 
+@router.post("/api/places/save/ndjson")
+async def save_places_ndjson(
+    request: Request,
+    on_conflict: str = Query("skip", pattern="^(skip|update)$"),
+    db: Session = Depends(get_db),
+):
+    """
+    Streaming variant of /api/places/save: one place JSON object per line.
+    The body is consumed incrementally, so only one batch is held in memory.
+    """
+    counts = [0, 0, 0]
+    update = on_conflict == "update"
+    line_no = 0
+    try:
+        batch = []
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                line_no += 1
+                if line.strip():
+                    batch.append(PlaceIn.model_validate_json(line))
+                if len(batch) >= PLACES_SAVE_BATCH_SIZE:
+                    for i, n in enumerate(_upsert_place_batch(db, batch, update)):
+                        counts[i] += n
+                    batch = []
+        if buffer.strip():
+            line_no += 1
+            batch.append(PlaceIn.model_validate_json(buffer))
+        if batch:
+            for i, n in enumerate(_upsert_place_batch(db, batch, update)):
+                counts[i] += n
+        db.commit()
+        return _save_result(counts)
+    except Exception as e:
+        db.rollback()
+        return {"status": "error", "line": line_no, "message": str(e)}
+
+
+def place_fields(
+    fields: Optional[str] = Query(
+        None,
+        description="Preset (marker, card, full) and/or comma-separated column names",
+    ),
+) -> RowDecoder:
+    try:
+        return place_decoder_for_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# Default search radius when only a center point is given (city scale)
+SEARCH_RADIUS_M = 15000
+SEARCH_PAGE_SIZE = 50
+SEARCH_MAX_PAGE_SIZE = 200
+
+
+def _parse_cursor(cursor: str):
+    score, place_row_id = cursor.split(":", 1)
+    return float(score), int(place_row_id)
+
+
 @router.get("/api/places/search")
 async def search_places(
     type: str = Query(...),
-    latitude: float = Query(...),
-    longitude: float = Query(...),
-    db: Session = Depends(get_db),
+    latitude: Optional[float] = Query(None),
+    longitude: Optional[float] = Query(None),
+    radius_m: float = Query(SEARCH_RADIUS_M, gt=0),
+    south: Optional[float] = Query(None),
+    north: Optional[float] = Query(None),
+    west: Optional[float] = Query(None),
+    east: Optional[float] = Query(None),
+    limit: int = Query(SEARCH_PAGE_SIZE, ge=1, le=SEARCH_MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    decoder: RowDecoder = Depends(place_fields),
+    db: Session = Depends(get_read_db),
 ):
     try:
-        lat_int = int(latitude)
+        # Either an explicit bounding box or a center point plus radius
+        params = {"type": type, "limit": limit + 1}
+        distance_filter = ""
+        if None not in (south, north, west, east):
+            params.update(south=south, north=north, west=west, east=east)
+        elif latitude is not None and longitude is not None:
+            box = bounding_box(latitude, longitude, radius_m)
+            params.update(zip(("south", "north", "west", "east"), box))
+            params.update(lat=latitude, lng=longitude, radius=radius_m)
+            distance_filter = """
+            AND 6371000 * acos(min(1.0,
+                cos(radians(:lat)) * cos(radians(places.latitude))
+                * cos(radians(places.longitude) - radians(:lng))
+                + sin(radians(:lat)) * sin(radians(places.latitude))
+            )) < :radius"""
+        else:
+            return {
+                "status": "error",
+                "message": "Provide latitude/longitude or south/north/west/east",
+            }
+
+        # Keyset pagination on (POI_score, id), both descending
+        keyset_filter = ""
+        if cursor:
+            params["cursor_score"], params["cursor_id"] = _parse_cursor(cursor)
+            keyset_filter = """
+            AND (IFNULL(places.POI_score, 0) < :cursor_score
+                OR (IFNULL(places.POI_score, 0) = :cursor_score
+                    AND places.id < :cursor_id))"""
+
+        # The sort key is selected after the projected columns for the cursor
         sql = text(
-            """
-            SELECT * FROM places
-            WHERE EXISTS (
-                SELECT 1 FROM json_each(places.type_ids)
-                WHERE json_each.value = :type
-            )
-            AND CAST(json_extract(gps_coordinates, '$.latitude') AS INTEGER) = :lat_int
-            ORDER BY POI_score DESC
+            f"""
+            SELECT {decoder.select_list("places")},
+                IFNULL(places.POI_score, 0) AS sort_score, places.id AS sort_id
+            FROM places_rtree
+            JOIN places ON places.id = places_rtree.id
+            WHERE places_rtree.max_lat >= :south AND places_rtree.min_lat <= :north
+            AND places_rtree.max_lng >= :west AND places_rtree.min_lng <= :east
+            AND places.place_id IN (
+                SELECT place_id FROM place_types WHERE type_id = :type
+            ){distance_filter}{keyset_filter}
+            ORDER BY IFNULL(places.POI_score, 0) DESC, places.id DESC
+            LIMIT :limit
             """
         )
-        results = db.execute(sql, {"type": type, "lat_int": lat_int}).fetchall()
-        columns = [col.name for col in Place.__table__.columns]
-        types = {col.name: col.type for col in Place.__table__.columns}
+        results = db.execute(sql, params).fetchall()
+        next_cursor = None
+        if len(results) > limit:
+            results = results[:limit]
+            last = results[-1]._mapping
+            next_cursor = f"{last['sort_score']}:{last['sort_id']}"
+        places_json = decoder.decode_all(results)
 
-        places_json = []
-        for row in results:
-            place = {}
-            for idx, col in enumerate(columns):
-                value = row[idx]
-                col_type = types[col]
-                # Handle JSON columns
-                if isinstance(col_type, JSON):
-                    try:
-                        value = json.loads(value) if value is not None else None
-                    except Exception:
-                        pass
-                # Handle Float
-                elif isinstance(col_type, Float):
-                    value = float(value) if value is not None else None
-                # Handle Integer
-                elif isinstance(col_type, Integer):
-                    value = int(value) if value is not None else None
-                # Otherwise, leave as is (String, etc.)
-                place[col] = value
-            places_json.append(place)
+        return {
+            "status": "success",
+            "count": len(places_json),
+            "places": places_json,
+            "next_cursor": next_cursor,
+        }
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
 
-        return {"status": "success", "count": len(places_json), "places": places_json}
+
+# Categories per multi-type search, as many as an itinerary picks and some
+SEARCH_MAX_TYPES = 20
+
+
+@router.get("/api/places/search/types")
+def search_places_by_types(
+    types: str = Query(..., description="Comma-separated type_ids"),
+    match: str = Query("any", pattern="^(any|all)$"),
+    latitude: Optional[float] = Query(None),
+    longitude: Optional[float] = Query(None),
+    radius_m: float = Query(SEARCH_RADIUS_M, gt=0),
+    city: Optional[str] = Query(None, description="city_name, e.g. HCMC, Vietnam"),
+    limit: int = Query(SEARCH_PAGE_SIZE, ge=1, le=SEARCH_MAX_PAGE_SIZE),
+    decoder: RowDecoder = Depends(place_fields),
+    db: Session = Depends(get_read_db),
+):
+    """
+    /api/places/search for several types at once. With match=any the
+    result is grouped by type ("groups": {type_id: [places]}, up to limit
+    each; a place can appear in several groups). With match=all it is one
+    list of places having every type. Rows are loaded with one batched IN
+    lookup for all types.
+    """
+    type_ids = list(dict.fromkeys(t.strip() for t in types.split(",") if t.strip()))
+    if not type_ids:
+        return {"status": "error", "message": "Provide at least one type"}
+    if len(type_ids) > SEARCH_MAX_TYPES:
+        return {"status": "error", "message": f"At most {SEARCH_MAX_TYPES} types"}
+    if (latitude is None) != (longitude is None):
+        return {"status": "error", "message": "Provide both latitude and longitude"}
+    if latitude is None and city is None:
+        return {"status": "error", "message": "Provide latitude/longitude or city"}
+    try:
+        found = place_ranker.by_types(
+            type_ids,
+            match=match,
+            latitude=latitude,
+            longitude=longitude,
+            radius_m=radius_m if latitude is not None else None,
+            city=city,
+            limit=limit,
+        )
+        groups = found if match == "any" else {"all": found}
+        rows = get_places_by_ids(
+            [pid for members in groups.values() for pid, _ in members], db, decoder
+        )
+
+        def resolve(members):
+            places_json = []
+            for place_id, distance in members:
+                if place_id in rows:
+                    # Copied, since a place can be listed under several types
+                    places_json.append({**rows[place_id], "distance_m": distance})
+            return places_json
+
+        if match == "all":
+            places_json = resolve(found)
+            return {"status": "success", "count": len(places_json), "places": places_json}
+        grouped = {type_id: resolve(members) for type_id, members in found.items()}
+        return {"status": "success", "count": len(rows), "groups": grouped}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 
+# Catalogue lookups are revalidated with If-None-Match after max-age
+CATALOGUE_CACHE_CONTROL = f"public, max-age={int(os.getenv('CATALOGUE_MAX_AGE', '300'))}"
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    # Weak comparison, as for GET revalidation
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def catalogue_response(request: Request, payload) -> Response:
+    """
+    JSON response for a (body, etag) payload with validators, or a bodiless
+    304 when the client already has this version.
+    """
+    body, etag = payload
+    headers = {"ETag": etag, "Cache-Control": CATALOGUE_CACHE_CONTROL}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def json_payload(content):
+    """(body, etag) for a JSON-serialisable value, serialised once"""
+    body = json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+    return body, f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+@router.get("/api/places/pool")
+def get_candidate_pool(
+    request: Request,
+    city: str = Query(..., description="city_name or a common spelling of it"),
+    type: str = Query(...),
+    limit: int = Query(CANDIDATE_POOL_SIZE, ge=1, le=CANDIDATE_POOL_SIZE),
+):
+    """
+    Best places of a type in a city by POI_score, with compact fields, from
+    the in-memory candidate pools; the catalogue is not queried.
+    """
+    try:
+        return catalogue_response(
+            request, _candidate_pool_payload(canonical_city(city) or city, type, limit)
+        )
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+
+# Keyed on the pools actually served, which trail the file while rebuilding
+candidate_pool_memo = VersionedMemo(candidate_pools.version)
+
+
+@candidate_pool_memo.cached(key=lambda city_name, type_id, limit: (city_name, type_id, limit))
+def _candidate_pool_payload(city_name: str, type_id: str, limit: int):
+    places_json, version = candidate_pools.lookup(city_name, type_id, limit)
+    return json_payload(
+        {
+            "status": "success",
+            "city": city_name,
+            "version": version,
+            "count": len(places_json),
+            "places": places_json,
+        }
+    )
+
+
 def get_available_categories(city_name: str, db: Session):
     return set(
         t.type_name for t in db.query(CityType).filter_by(city_name=city_name).all()
     )
 
 
+@catalogue_memo.cached(key=lambda city_name, db: city_name)
 def get_types_dict_from_stats(city_name: str, db: Session):
     limit = 330 if city_name == "HCMC, Vietnam" else None
     sql = "SELECT type_id FROM type_stats WHERE city_name = :city_name ORDER BY type_score DESC"
@@ -103,44 +407,96 @@ def get_types_dict_from_stats(city_name: str, db: Session):
 
 
 @router.get("/api/places/manualsearch")
-def search_places(query: str, db=Depends(get_db)):
+def search_places(
+    query: str,
+    fields: Optional[str] = Query(
+        None,
+        description="Preset (marker, card, full) and/or comma-separated column names",
+    ),
+    db=Depends(get_read_db),
+):
+    # Unknown field names are a 400, as on the other place endpoints
+    decoder = place_fields(fields) if fields else None
     try:
-        sql = text("SELECT * FROM places_search WHERE title MATCH :q LIMIT 20")
-        results = db.execute(sql, {"q": query}).mappings().all()
-        return list(results)
+        if decoder is None:
+            sql = text("SELECT * FROM places_search WHERE title MATCH :q LIMIT 20")
+            results = db.execute(sql, {"q": query}).mappings().all()
+            return list(results)
+        # With a field set, resolve the full-text matches against places
+        sql = text(
+            f"""
+            SELECT {decoder.select_list("places")} FROM places_search
+            JOIN places ON places.place_id = places_search.place_id
+            WHERE places_search.title MATCH :q
+            LIMIT 20
+            """
+        )
+        return decoder.decode_all(db.execute(sql, {"q": query}).fetchall())
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 
 @router.get("/api/places/byid")
-def get_place_by_id(id: str, db=Depends(get_db)):
+def get_place_by_id(
+    id: str, decoder: RowDecoder = Depends(place_fields), db=Depends(get_read_db)
+):
     try:
-        sql = text("SELECT * FROM places WHERE place_id = :id")
+        sql = text(
+            f"SELECT {decoder.select_list('places')} FROM places WHERE place_id = :id"
+        )
         row = db.execute(sql, {"id": id}).fetchone()
         if not row:
             return None
 
-        columns = [col.name for col in Place.__table__.columns]
-        types = {col.name: col.type for col in Place.__table__.columns}
-        place = {}
-        for idx, col in enumerate(columns):
-            value = row[idx]
-            col_type = types[col]
-            # Handle JSON columns
-            if isinstance(col_type, JSON):
-                try:
-                    value = json.loads(value) if value is not None else None
-                except Exception:
-                    pass
-            # Handle Float
-            elif isinstance(col_type, Float):
-                value = float(value) if value is not None else None
-            # Handle Integer
-            elif isinstance(col_type, Integer):
-                value = int(value) if value is not None else None
-            # Otherwise, leave as is (String, etc.)
-            place[col] = value
-        return place
+        return decoder(row)
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+
+# Ids per IN (...) query, well below SQLite's bound parameter limit
+PLACE_LOOKUP_CHUNK_SIZE = 500
+PLACE_BATCH_MAX_IDS = 1000
+
+
+def get_places_by_ids(ids, db: Session, decoder: RowDecoder = PLACE_DECODER):
+    """
+    Resolve many place_ids with IN queries instead of one query per id.
+
+    Returns:
+        Dictionary of place_id -> decoded place for the ids that exist
+    """
+    unique_ids = list(dict.fromkeys(ids))
+    found = {}
+    for start in range(0, len(unique_ids), PLACE_LOOKUP_CHUNK_SIZE):
+        chunk = unique_ids[start : start + PLACE_LOOKUP_CHUNK_SIZE]
+        params = {f"id{i}": pid for i, pid in enumerate(chunk)}
+        placeholders = ", ".join(f":{key}" for key in params)
+        # place_id is selected after the projection to key the results
+        sql = text(
+            f"SELECT {decoder.select_list('places')}, places.place_id AS lookup_id"
+            f" FROM places WHERE places.place_id IN ({placeholders})"
+        )
+        for row in db.execute(sql, params):
+            found[row._mapping["lookup_id"]] = decoder(row)
+    return found
+
+
+@router.post("/api/places/batch")
+def get_places_batch(
+    payload: PlaceIdsPayload,
+    decoder: RowDecoder = Depends(place_fields),
+    db=Depends(get_read_db),
+):
+    if len(payload.ids) > PLACE_BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {PLACE_BATCH_MAX_IDS} ids per request",
+        )
+    try:
+        found = get_places_by_ids(payload.ids, db, decoder)
+        # Input order is preserved; unknown ids map to null
+        places = [found.get(pid) for pid in payload.ids]
+        return {"status": "success", "count": len(found), "places": places}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
@@ -190,7 +546,16 @@ def get_place_by_id(id: str, db=Depends(get_db)):
 
 
 @router.get("/api/places/unique-top-types")
-def get_unique_top_types_per_city_json(db=Depends(get_db)):
+def get_unique_top_types_per_city_json(request: Request, db=Depends(get_read_db)):
+    return catalogue_response(request, _unique_top_types_payload(db))
+
+
+@catalogue_memo.cached(key=lambda db: None)
+def _unique_top_types_payload(db):
+    return json_payload(unique_top_types(db))
+
+
+def unique_top_types(db):
     # Get all city names
     city_names = [
         row[0]
@@ -227,59 +592,108 @@ def get_unique_top_types_per_city_json(db=Depends(get_db)):
 
 
 @router.get("/api/places/nearby")
-def find_places_nearby(latitude, longitude, type, radius_m=1000, db=Depends(get_db)):
+def find_places_nearby(
+    latitude: float,
+    longitude: float,
+    type: str,
+    radius_m: float = 1000,
+    decoder: RowDecoder = Depends(place_fields),
+    db=Depends(get_read_db),
+):
+    # The R*Tree prunes to the bounding box first, so the exact distance is
+    # only computed for places that can actually be inside the radius
+    south, north, west, east = bounding_box(latitude, longitude, radius_m)
     sql = text(
         """
-    SELECT *,
-        (
-            6371000 * acos(
-                cos(radians(:lat)) * cos(radians(json_extract(gps_coordinates, '$.latitude')))
-                * cos(radians(json_extract(gps_coordinates, '$.longitude')) - radians(:lng))
-                + sin(radians(:lat)) * sin(radians(json_extract(gps_coordinates, '$.latitude')))
-            )
-        ) AS distance
-    FROM places
-    WHERE EXISTS (
-        SELECT 1 FROM json_each(places.type_ids)
-        WHERE json_each.value = :type
-    )
-    AND (
-        6371000 * acos(
-            cos(radians(:lat)) * cos(radians(json_extract(gps_coordinates, '$.latitude')))
-            * cos(radians(json_extract(gps_coordinates, '$.longitude')) - radians(:lng))
-            + sin(radians(:lat)) * sin(radians(json_extract(gps_coordinates, '$.latitude')))
+    SELECT * FROM (
+        SELECT {columns}, places.POI_score AS sort_score,
+            (
+                6371000 * acos(min(1.0,
+                    cos(radians(:lat)) * cos(radians(places.latitude))
+                    * cos(radians(places.longitude) - radians(:lng))
+                    + sin(radians(:lat)) * sin(radians(places.latitude))
+                ))
+            ) AS distance
+        FROM places_rtree
+        JOIN places ON places.id = places_rtree.id
+        WHERE places_rtree.max_lat >= :south AND places_rtree.min_lat <= :north
+        AND places_rtree.max_lng >= :west AND places_rtree.min_lng <= :east
+        AND places.place_id IN (
+            SELECT place_id FROM place_types WHERE type_id = :type
         )
-    ) < :radius
-    ORDER BY distance ASC, POI_score DESC
+    )
+    WHERE distance < :radius
+    ORDER BY distance ASC, sort_score DESC
     LIMIT 20
-    """
+    """.format(columns=decoder.select_list("places"))
     )
     results = db.execute(
-        sql, {"lat": latitude, "lng": longitude, "type": type, "radius": radius_m}
+        sql,
+        {
+            "lat": latitude,
+            "lng": longitude,
+            "type": type,
+            "radius": radius_m,
+            "south": south,
+            "north": north,
+            "west": west,
+            "east": east,
+        },
     ).fetchall()
-    columns = [col.name for col in Place.__table__.columns]
-    types = {col.name: col.type for col in Place.__table__.columns}
-
-    places_json = []
-    for row in results:
-        place = {}
-        for idx, col in enumerate(columns):
-            value = row[idx]
-            col_type = types[col]
-            # Handle JSON columns
-            if isinstance(col_type, JSON):
-                try:
-                    value = json.loads(value) if value is not None else None
-                except Exception:
-                    pass
-            # Handle Float
-            elif isinstance(col_type, Float):
-                value = float(value) if value is not None else None
-            # Handle Integer
-            elif isinstance(col_type, Integer):
-                value = int(value) if value is not None else None
-            # Otherwise, leave as is (String, etc.)
-            place[col] = value
-        places_json.append(place)
+    places_json = decoder.decode_all(results)
 
     return {"status": "success", "count": len(places_json), "places": places_json}
+
+
+@router.get("/api/places/rank")
+def rank_places(
+    latitude: Optional[float] = Query(None),
+    longitude: Optional[float] = Query(None),
+    radius_m: float = Query(SEARCH_RADIUS_M, gt=0),
+    city: Optional[str] = Query(None, description="city_name, e.g. HCMC, Vietnam"),
+    types: Optional[str] = Query(None, description="Comma-separated type_ids, any of"),
+    min_rating: Optional[float] = Query(None, ge=0),
+    w_distance: float = Query(DEFAULT_WEIGHTS["distance"], ge=0),
+    w_score: float = Query(DEFAULT_WEIGHTS["score"], ge=0),
+    w_rating: float = Query(DEFAULT_WEIGHTS["rating"], ge=0),
+    w_reviews: float = Query(DEFAULT_WEIGHTS["reviews"], ge=0),
+    limit: int = Query(20, ge=1, le=SEARCH_MAX_PAGE_SIZE),
+    decoder: RowDecoder = Depends(place_fields),
+    db=Depends(get_read_db),
+):
+    """
+    Places ranked by a weighted blend of nearness, POI_score, rating and
+    review count, each scaled to 0..1 before weighting.
+    """
+    if latitude is None and longitude is None and city is None:
+        return {"status": "error", "message": "Provide latitude/longitude or city"}
+    if (latitude is None) != (longitude is None):
+        return {"status": "error", "message": "Provide both latitude and longitude"}
+    try:
+        ranked = place_ranker.rank(
+            latitude=latitude,
+            longitude=longitude,
+            radius_m=radius_m if latitude is not None else None,
+            city=city,
+            types=[t.strip() for t in (types or "").split(",") if t.strip()] or None,
+            weights={
+                "distance": w_distance,
+                "score": w_score,
+                "rating": w_rating,
+                "reviews": w_reviews,
+            },
+            min_rating=min_rating,
+            limit=limit,
+        )
+        found = get_places_by_ids([pid for pid, _, _ in ranked], db, decoder)
+        places_json = []
+        for place_id, distance, score in ranked:
+            place = found.get(place_id)
+            if place is None:
+                continue
+            place["distance_m"] = distance
+            place["rank_score"] = score
+            places_json.append(place)
+        return {"status": "success", "count": len(places_json), "places": places_json}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
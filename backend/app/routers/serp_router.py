@@ -6,7 +6,7 @@ router = APIRouter(prefix="/api/serp/locations", tags=["serp"])
 
 
 @router.get("/")
-def get_local_results(
+async def get_local_results(
     query: str = Query(..., description="Search query"),
     ll: str = Query(
         ...,
@@ -15,7 +15,7 @@ def get_local_results(
 ):
     try:
         api_key = os.getenv("SERP_API_KEY")
-        results = search_google_maps(query, ll, api_key)
+        results = await search_google_maps(query, ll, api_key)
         return {"local_results": results}
     except Exception as e:
         return {"error": str(e)}
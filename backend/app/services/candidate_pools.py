@@ -0,0 +1,281 @@
+"""
+Top-K candidate pools per (city, type_id), served from memory.
+
+Itineraries and the planner's category chips ask for the same
+(city_name, type_id) combinations ordered by POI_score, and the answer only
+changes when the catalogue is rebuilt. The pools hold the best
+CANDIDATE_POOL_SIZE places of every combination with a compact field set,
+and are built in one window-function query over the catalogue.
+
+Pools are versioned by a checksum of the catalogue file and written to
+CANDIDATE_POOLS_PATH, so a restart against an unchanged catalogue loads
+the snapshot instead of querying places. The file's mtime is the cheap
+change probe checked on requests; when it moves, the checksum and any
+rebuild run in a background thread and the old pools are served until
+the new ones are ready.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import text
+
+from ..place_database import DATABASE_PATH as PLACES_DATABASE_PATH
+from ..place_database import file_version
+from ..place_database import engine as place_engine
+from ..place_migrations import table_columns, table_exists
+from ..place_rows import place_decoder_for_fields
+
+logger = logging.getLogger(__name__)
+
+CANDIDATE_POOLS_PATH = "app/candidate_pools.json"
+CANDIDATE_POOL_SIZE = int(os.getenv("CANDIDATE_POOL_SIZE", "50"))
+
+# Enough to render a chip result card; the rest is fetched on selection
+POOL_FIELDS = (
+    "place_id",
+    "title",
+    "latitude",
+    "longitude",
+    "POI_score",
+    "rating",
+    "reviews",
+    "address",
+    "thumbnail",
+    "en_names",
+    "vi_names",
+    "best_type_id",
+    "best_type_id_en",
+    "best_type_id_vi",
+)
+
+# Same order as /api/places/search
+_RANKED_SQL = """
+SELECT city_name, type_id, place_id, pool_rank FROM (
+    SELECT places.city_name AS city_name, place_types.type_id AS type_id,
+        places.place_id AS place_id,
+        ROW_NUMBER() OVER (
+            PARTITION BY places.city_name, place_types.type_id
+            ORDER BY {score} DESC, places.id DESC
+        ) AS pool_rank
+    FROM place_types
+    JOIN places ON places.place_id = place_types.place_id
+    WHERE places.city_name IS NOT NULL
+)
+WHERE pool_rank <= :size
+"""
+
+
+def file_checksum(path: str) -> str:
+    """sha256 of the database file and its WAL, if any"""
+    digest = hashlib.sha256()
+    for part in (path, path + "-wal"):
+        if not os.path.exists(part):
+            continue
+        with open(part, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CandidatePools:
+    def __init__(self, engine, db_path: str, snapshot_path: str = None, size: int = 50):
+        """
+        Args:
+            engine: Engine for the places catalogue
+            db_path: Catalogue file, for the mtime probe and the checksum
+            snapshot_path: JSON file the pools are persisted to, or None
+            size: Places kept per (city, type_id)
+        """
+        self.engine = engine
+        self.db_path = db_path
+        self.snapshot_path = snapshot_path
+        self.size = size
+        self._probe = None
+        # (city -> type_id -> [place dict], checksum), swapped as one value so
+        # readers never pair pools with another catalogue's checksum; the
+        # place dicts are shared between pools
+        self._loaded = None
+        self._lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._refreshing = False
+
+    def _build(self):
+        with self.engine.connect() as conn:
+            if not table_exists(conn, "place_types"):
+                return {}
+            columns = table_columns(conn, "places")
+            if "city_name" not in columns:
+                return {}
+            score = "IFNULL(places.POI_score, 0)" if "POI_score" in columns else "0"
+            ranked_sql = _RANKED_SQL.format(score=score)
+            # Older catalogue snapshots lack some of the display columns
+            decoder = place_decoder_for_fields(
+                ",".join(f for f in POOL_FIELDS if f in columns)
+            )
+            # One pass over the window; each place is decoded once and shared
+            rows = conn.execute(
+                text(
+                    f"SELECT {decoder.select_list('places')},"
+                    " ranked.city_name, ranked.type_id, ranked.place_id"
+                    f" FROM ({ranked_sql}) AS ranked"
+                    " JOIN places ON places.place_id = ranked.place_id"
+                    " ORDER BY ranked.city_name, ranked.type_id, ranked.pool_rank"
+                ),
+                {"size": self.size},
+            )
+            places = {}
+            pools = {}
+            for row in rows:
+                city, type_id, place_id = row[-3:]
+                place = places.get(place_id)
+                if place is None:
+                    place = places[place_id] = decoder(row)
+                pools.setdefault(city, {}).setdefault(type_id, []).append(place)
+        return pools
+
+    def _read_snapshot(self, checksum):
+        if not self.snapshot_path:
+            return None
+        try:
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            logger.exception("Could not read candidate pools from %s", self.snapshot_path)
+            return None
+        if (
+            data.get("checksum") != checksum
+            or data.get("size") != self.size
+            or data.get("fields") != list(POOL_FIELDS)
+        ):
+            return None
+        places = data["places"]
+        return {
+            city: {type_id: [places[pid] for pid in ids] for type_id, ids in types.items()}
+            for city, types in data["pools"].items()
+        }
+
+    def _write_snapshot(self, checksum, pools):
+        if not self.snapshot_path:
+            return
+        places = {}
+        ids = {}
+        for city, types in pools.items():
+            ids[city] = {}
+            for type_id, members in types.items():
+                ids[city][type_id] = [place["place_id"] for place in members]
+                for place in members:
+                    places[place["place_id"]] = place
+        data = {
+            "checksum": checksum,
+            "size": self.size,
+            "fields": list(POOL_FIELDS),
+            "pools": ids,
+            "places": places,
+        }
+        # Write then rename, so a crash never leaves a truncated file
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.snapshot_path)
+
+    def ensure_loaded(self):
+        """
+        Load the pools on first use. After that a changed catalogue is only
+        noticed here; the checksum and any rebuild run in a background
+        thread while the current pools keep being served.
+        """
+        if self._loaded is None:
+            self.refresh()
+        elif file_version(self.db_path) != self._probe:
+            self._refresh_in_background()
+
+    def _refresh_in_background(self):
+        with self._state_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Refreshing candidate pools failed")
+            finally:
+                with self._state_lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, name="candidate-pools", daemon=True).start()
+
+    def refresh(self):
+        """Bring the pools up to date with the catalogue, blocking"""
+        with self._lock:
+            version = file_version(self.db_path)
+            if self._loaded is not None and version == self._probe:
+                return
+            started = time.perf_counter()
+            checksum = file_checksum(self.db_path)
+            if self._loaded is not None and checksum == self.checksum:
+                # Touched but not changed
+                self._probe = version
+                return
+            pools = self._read_snapshot(checksum)
+            source = "snapshot"
+            if pools is None:
+                pools = self._build()
+                source = "catalogue"
+                try:
+                    self._write_snapshot(checksum, pools)
+                except OSError:
+                    logger.exception("Could not write candidate pools to %s", self.snapshot_path)
+            self._loaded, self._probe = (pools, checksum), version
+            logger.info(
+                "Loaded candidate pools for %d cities from the %s in %.2fs",
+                len(pools),
+                source,
+                time.perf_counter() - started,
+            )
+
+    @property
+    def checksum(self):
+        """Checksum of the catalogue the served pools were built from"""
+        return self._loaded[1] if self._loaded is not None else None
+
+    def version(self):
+        """checksum, after checking for a catalogue change"""
+        self.ensure_loaded()
+        return self.checksum
+
+    def lookup(self, city: str, type_id: str, limit: int = None):
+        """(get() result, checksum of the pools it was taken from)"""
+        self.ensure_loaded()
+        pools, checksum = self._loaded
+        members = pools.get(city, {}).get(type_id, [])
+        return (members[:limit] if limit is not None else list(members)), checksum
+
+    def get(self, city: str, type_id: str, limit: int = None):
+        """Best places of type_id in city, best first; [] if none"""
+        return self.lookup(city, type_id, limit)[0]
+
+
+candidate_pools = CandidatePools(
+    place_engine, PLACES_DATABASE_PATH, CANDIDATE_POOLS_PATH, CANDIDATE_POOL_SIZE
+)
+
+
+def start_candidate_pools():
+    """Build or load the pools in the background, so startup does not wait"""
+
+    def run():
+        try:
+            candidate_pools.ensure_loaded()
+        except Exception:
+            logger.exception("Building candidate pools failed")
+
+    threading.Thread(target=run, name="candidate-pools", daemon=True).start()
@@ -1,26 +1,187 @@
-import requests, json
-from decimal import Decimal
+"""
+Currency conversion from a locally held rate table.
+
+The table holds the rates of every currency against one base currency (USD
+by default). It is loaded from disk at import, refreshed in the background
+(see start_rate_refresh, run from the app lifespan) and written back after
+every refresh, so conversions never wait on the CDN and survive restarts
+without it. Any pair is served by cross rate through the base:
+
+    amount * rates[target] / rates[source]
+
+Settings:
+
+    EXCHANGE_BASE_CURRENCY       usd
+    EXCHANGE_REFRESH_INTERVAL    21600 seconds; the API publishes daily
+    EXCHANGE_RETRY_INTERVAL      300 seconds between attempts after a failure
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from decimal import Decimal, InvalidOperation
+
+from .. import http_client
+
+logger = logging.getLogger(__name__)
 
 _EXCHANGE_API_URLS = [
-    "https://cdn.jsdelivr.net/npm/@fawazahmed0/currency-api@latest/v1/currencies", 
+    "https://cdn.jsdelivr.net/npm/@fawazahmed0/currency-api@latest/v1/currencies",
     "https://latest.currency-api.pages.dev/v1/currencies"
 ]
 
+EXCHANGE_RATES_PATH = "app/exchange_rates.json"
+EXCHANGE_BASE_CURRENCY = os.getenv("EXCHANGE_BASE_CURRENCY", "usd").lower()
+EXCHANGE_REFRESH_INTERVAL = float(os.getenv("EXCHANGE_REFRESH_INTERVAL", str(6 * 3600)))
+EXCHANGE_RETRY_INTERVAL = float(os.getenv("EXCHANGE_RETRY_INTERVAL", "300"))
+
+
+class UnsupportedCurrencyError(ValueError):
+    pass
+
+
+class RateTable:
+    def __init__(self, path: str, base: str):
+        self.path = path
+        self.base = base
+        # Units of each currency per one unit of base
+        self.rates = {}
+        self.date = None
+        self.fetched_at = 0.0
+        self._refresh_lock = None
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError):
+            logger.exception("Could not read exchange rates from %s", self.path)
+            return
+        if data.get("base") != self.base:
+            return
+        self.rates = {code: Decimal(rate) for code, rate in data["rates"].items()}
+        self.date = data.get("date")
+        self.fetched_at = data.get("fetched_at", 0.0)
+
+    def save(self):
+        data = {
+            "base": self.base,
+            "date": self.date,
+            "fetched_at": self.fetched_at,
+            "rates": {code: str(rate) for code, rate in self.rates.items()},
+        }
+        # Write then rename, so a crash never leaves a truncated file
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def is_stale(self) -> bool:
+        return time.time() - self.fetched_at >= EXCHANGE_REFRESH_INTERVAL
+
+    async def refresh(self) -> bool:
+        """Download the table for the base currency; False if every mirror failed"""
+        for url in _EXCHANGE_API_URLS:
+            try:
+                r = await http_client.get(url + f"/{self.base}.min.json")
+                if r.status_code != 200:
+                    continue
+                data = json.loads(r.text, parse_float=Decimal)
+                rates = {}
+                for code, rate in data[self.base].items():
+                    try:
+                        rate = Decimal(str(rate))
+                    except InvalidOperation:
+                        continue
+                    if rate > 0:
+                        rates[code] = rate
+            except Exception as e:
+                logger.warning("Exchange rate download from %s failed: %r", url, e)
+                continue
+            self.rates = rates
+            self.date = data.get("date")
+            self.fetched_at = time.time()
+            try:
+                self.save()
+            except OSError:
+                logger.exception("Could not write exchange rates to %s", self.path)
+            return True
+        return False
+
+    async def ensure_loaded(self):
+        """Fetch now if there is no table yet (first start without a saved copy)"""
+        if self.rates:
+            return
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        async with self._refresh_lock:
+            if not self.rates and not await self.refresh():
+                raise RuntimeError("Unable to connect to the exchange rate API.")
+
+    def rate(self, source_currency: str, to_currency: str) -> Decimal:
+        try:
+            source = self.rates[source_currency]
+        except KeyError:
+            raise UnsupportedCurrencyError(f"Unsupported currency: {source_currency}")
+        try:
+            target = self.rates[to_currency]
+        except KeyError:
+            raise UnsupportedCurrencyError(f"Unsupported currency: {to_currency}")
+        return target / source
+
+
+rate_table = RateTable(EXCHANGE_RATES_PATH, EXCHANGE_BASE_CURRENCY)
+
+
+async def _refresh_periodically():
+    while True:
+        if rate_table.is_stale():
+            if await rate_table.refresh():
+                logger.info("Exchange rates refreshed (%s)", rate_table.date)
+                delay = EXCHANGE_REFRESH_INTERVAL
+            else:
+                logger.warning("Exchange rate refresh failed, keeping %s", rate_table.date)
+                delay = EXCHANGE_RETRY_INTERVAL
+        else:
+            delay = rate_table.fetched_at + EXCHANGE_REFRESH_INTERVAL - time.time()
+        await asyncio.sleep(max(delay, 1.0))
+
+
+def start_rate_refresh() -> asyncio.Task:
+    return asyncio.create_task(_refresh_periodically())
+
+
 # Source currency and to currency are currency code strings: e.g. "usd", "gbp", ...
 # Read here: https://cdn.jsdelivr.net/npm/@fawazahmed0/currency-api@latest/v1/currencies.json
 # WARNING! Pass a decimal.Decimal in, not a float!
-def _convert(amount: Decimal, source_currency, to_currency):
-    for url in _EXCHANGE_API_URLS:
-        r = requests.get(url + f"/{source_currency}.min.json")
-        if r.status_code != 200: continue
-        
-        return amount * json.loads(r.text, parse_float=Decimal)[source_currency][to_currency]
+async def convert(amount: Decimal, source_currency: str, to_currency: str) -> Decimal:
+    await rate_table.ensure_loaded()
+    return amount * rate_table.rate(source_currency.lower(), to_currency.lower())
+
+
+async def convert_many(items, to_currency: str):
+    """
+    Convert [(amount, source_currency), ...] into to_currency; every currency
+    is checked before anything is converted.
+    """
+    await rate_table.ensure_loaded()
+    to_currency = to_currency.lower()
+    rates = {}
+    for _, source_currency in items:
+        source_currency = source_currency.lower()
+        if source_currency not in rates:
+            rates[source_currency] = rate_table.rate(source_currency, to_currency)
+    return [amount * rates[source.lower()] for amount, source in items]
 
-    raise RuntimeError("Unable to connect to the exchange rate API.")
 
-def convertVNDtoUSD(amount):
-    return _convert(amount, "vnd", "usd")
+async def convertVNDtoUSD(amount):
+    return await convert(amount, "vnd", "usd")
 
-def convertUSDtoVND(amount):
-    return _convert(amount, "usd", "vnd")
 
+async def convertUSDtoVND(amount):
+    return await convert(amount, "usd", "vnd")
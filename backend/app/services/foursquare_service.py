@@ -1,11 +1,48 @@
+import asyncio
+import logging
 import os
-import requests
+import time
+from urllib.parse import urlencode
+
+import httpx
 from typing import Optional, List, Dict, Any
 
+from .. import http_client
+from ..cache import MISSING, PersistentCache
+
+logger = logging.getLogger(__name__)
+
 # Foursquare Places API Configuration
 FOURSQUARE_BASE_URL = "https://places-api.foursquare.com/places"
 FOURSQUARE_API_VERSION = "2025-06-17"
 
+# Read-through response cache. A response is fresh for its resource's TTL,
+# then served stale for up to FOURSQUARE_STALE_TTL while one background
+# request refreshes it. Concurrent misses for the same request share one
+# upstream call.
+FOURSQUARE_CACHE_PATH = "app/foursquare_cache.db"
+FOURSQUARE_CACHE_SIZE = int(os.getenv("FOURSQUARE_CACHE_SIZE", "2000"))
+FOURSQUARE_TTLS = {
+    "search": float(os.getenv("FOURSQUARE_SEARCH_TTL", str(24 * 3600))),
+    "details": float(os.getenv("FOURSQUARE_DETAILS_TTL", str(7 * 24 * 3600))),
+    "tips": float(os.getenv("FOURSQUARE_TIPS_TTL", str(3 * 24 * 3600))),
+    "photos": float(os.getenv("FOURSQUARE_PHOTOS_TTL", str(7 * 24 * 3600))),
+}
+FOURSQUARE_STALE_TTL = float(os.getenv("FOURSQUARE_STALE_TTL", str(7 * 24 * 3600)))
+
+response_cache = PersistentCache(
+    FOURSQUARE_CACHE_PATH,
+    "foursquare_responses",
+    FOURSQUARE_CACHE_SIZE,
+    max(FOURSQUARE_TTLS.values()) + FOURSQUARE_STALE_TTL,
+)
+
+_METRICS = ("hits", "stale_hits", "misses", "coalesced", "refreshes", "errors")
+cache_metrics = {resource: dict.fromkeys(_METRICS, 0) for resource in FOURSQUARE_TTLS}
+
+_inflight = {}
+_refreshes = set()
+
 
 def _get_headers() -> Dict[str, str]:
     """Get headers with API key for Foursquare requests"""
@@ -20,7 +57,107 @@ def _get_headers() -> Dict[str, str]:
     }
 
 
-def search_places(
+def cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters per resource since start, plus in-flight requests"""
+    return {
+        "resources": {resource: dict(counts) for resource, counts in cache_metrics.items()},
+        "in_flight": len(_inflight),
+        "memory_entries": len(response_cache.memory),
+    }
+
+
+async def _fetch(key: str, resource: str, url: str, params) -> Dict[str, Any]:
+    response = await http_client.get(url, headers=_get_headers(), params=params)
+    response.raise_for_status()
+    entry = {"data": response.json(), "fetched_at": time.time()}
+    await response_cache.aset(key, entry, FOURSQUARE_TTLS[resource] + FOURSQUARE_STALE_TTL)
+    return entry
+
+
+def _shared_fetch(key: str, resource: str, url: str, params):
+    """The in-flight request for key, started if there is none; (task, joined)"""
+    loop = asyncio.get_running_loop()
+    task = _inflight.get(key)
+    if task is not None and task.get_loop() is loop:
+        return task, True
+    task = loop.create_task(_fetch(key, resource, url, params))
+    _inflight[key] = task
+
+    def done(finished):
+        if _inflight.get(key) is finished:
+            del _inflight[key]
+
+    task.add_done_callback(done)
+    return task, False
+
+
+def _revalidate(key: str, resource: str, url: str, params):
+    task, joined = _shared_fetch(key, resource, url, params)
+    if joined:
+        return
+    cache_metrics[resource]["refreshes"] += 1
+    # Keep a reference until it finishes, and log failures nobody awaits
+    _refreshes.add(task)
+
+    def done(finished):
+        _refreshes.discard(finished)
+        if not finished.cancelled() and finished.exception() is not None:
+            cache_metrics[resource]["errors"] += 1
+            logger.warning("Foursquare refresh of %s failed: %r", url, finished.exception())
+
+    task.add_done_callback(done)
+
+
+async def _cached_get(resource: str, url: str, params=None) -> Dict[str, Any]:
+    """
+    GET through the response cache. The result has the usual success/data
+    keys plus "cache" ("hit", "stale" or "miss") and "fetched_at" (epoch s).
+    """
+    params = params or {}
+    key = f"{resource}:{url}?{urlencode(sorted(params.items()))}"
+    metrics = cache_metrics[resource]
+    try:
+        entry = await response_cache.aget(key)
+        if entry is not MISSING:
+            if time.time() - entry["fetched_at"] < FOURSQUARE_TTLS[resource]:
+                metrics["hits"] += 1
+                status = "hit"
+            else:
+                metrics["stale_hits"] += 1
+                status = "stale"
+                _revalidate(key, resource, url, params)
+        else:
+            metrics["misses"] += 1
+            task, joined = _shared_fetch(key, resource, url, params)
+            if joined:
+                metrics["coalesced"] += 1
+            # A cancelled caller must not cancel the request others wait on
+            entry = await asyncio.shield(task)
+            status = "miss"
+
+        return {
+            "success": True,
+            "data": entry["data"],
+            "cache": status,
+            "fetched_at": entry["fetched_at"],
+        }
+
+    except httpx.HTTPStatusError as e:
+        metrics["errors"] += 1
+        return {
+            "success": False,
+            "error": f"HTTP error: {e}",
+            "status_code": e.response.status_code
+        }
+    except Exception as e:
+        metrics["errors"] += 1
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
+
+async def search_places(
     ll: Optional[str] = None,
     near: Optional[str] = None,
     query: Optional[str] = None,
@@ -46,52 +183,31 @@ def search_places(
     Returns:
         Dictionary containing search results
     """
-    try:
-        url = f"{FOURSQUARE_BASE_URL}/search"
-        headers = _get_headers()
-
-        params = {"limit": limit}
-
-        # Add location parameters
-        if ll:
-            params["ll"] = ll
-        if near:
-            params["near"] = near
-        if ne:
-            params["ne"] = ne
-        if sw:
-            params["sw"] = sw
-        if radius:
-            params["radius"] = radius
-
-        # Add search filters
-        if query:
-            params["query"] = query
-        if categories:
-            params["categories"] = categories
-
-        response = requests.get(url, headers=headers, params=params, timeout=10)
-        response.raise_for_status()
-
-        return {
-            "success": True,
-            "data": response.json()
-        }
-
-    except requests.exceptions.HTTPError as e:
-        return {
-            "success": False,
-            "error": f"HTTP error: {e}",
-            "status_code": e.response.status_code if e.response else None
-        }
-    except Exception as e:
-        return {
-            "success": False,
-            "error": str(e)
-        }
-
-
-def get_place_details(
+    url = f"{FOURSQUARE_BASE_URL}/search"
+    params = {"limit": limit}
+
+    # Add location parameters
+    if ll:
+        params["ll"] = ll
+    if near:
+        params["near"] = near
+    if ne:
+        params["ne"] = ne
+    if sw:
+        params["sw"] = sw
+    if radius:
+        params["radius"] = radius
+
+    # Add search filters
+    if query:
+        params["query"] = query
+    if categories:
+        params["categories"] = categories
+
+    return await _cached_get("search", url, params)
+
+
+async def get_place_details(
     fsq_place_id: str,
     fields: Optional[List[str]] = None
 ) -> Dict[str, Any]:
@@ -105,36 +221,15 @@ def get_place_details(
     Returns:
         Dictionary containing place details
     """
-    try:
-        url = f"{FOURSQUARE_BASE_URL}/{fsq_place_id}"
-        headers = _get_headers()
+    url = f"{FOURSQUARE_BASE_URL}/{fsq_place_id}"
+    params = {}
+    if fields:
+        params["fields"] = ",".join(fields)
 
-        params = {}
-        if fields:
-            params["fields"] = ",".join(fields)
-
-        response = requests.get(url, headers=headers, params=params, timeout=10)
-        response.raise_for_status()
-
-        return {
-            "success": True,
-            "data": response.json()
-        }
-
-    except requests.exceptions.HTTPError as e:
-        return {
-            "success": False,
-            "error": f"HTTP error: {e}",
-            "status_code": e.response.status_code if e.response else None
-        }
-    except Exception as e:
-        return {
-            "success": False,
-            "error": str(e)
-        }
+    return await _cached_get("details", url, params)
 
 
-def get_place_tips(fsq_place_id: str) -> Dict[str, Any]:
+async def get_place_tips(fsq_place_id: str) -> Dict[str, Any]:
     """
     Get user-generated tips/reviews for a specific place
 
@@ -144,32 +239,11 @@ def get_place_tips(fsq_place_id: str) -> Dict[str, Any]:
     Returns:
         Dictionary containing tips data
     """
-    try:
-        url = f"{FOURSQUARE_BASE_URL}/{fsq_place_id}/tips"
-        headers = _get_headers()
+    url = f"{FOURSQUARE_BASE_URL}/{fsq_place_id}/tips"
+    return await _cached_get("tips", url)
 
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
 
-        return {
-            "success": True,
-            "data": response.json()
-        }
-
-    except requests.exceptions.HTTPError as e:
-        return {
-            "success": False,
-            "error": f"HTTP error: {e}",
-            "status_code": e.response.status_code if e.response else None
-        }
-    except Exception as e:
-        return {
-            "success": False,
-            "error": str(e)
-        }
-
-
-def get_place_photos(fsq_place_id: str) -> Dict[str, Any]:
+async def get_place_photos(fsq_place_id: str) -> Dict[str, Any]:
     """
     Get photos for a specific place
 
@@ -179,26 +253,5 @@ def get_place_photos(fsq_place_id: str) -> Dict[str, Any]:
     Returns:
         Dictionary containing photos data
     """
-    try:
-        url = f"{FOURSQUARE_BASE_URL}/{fsq_place_id}/photos"
-        headers = _get_headers()
-
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-
-        return {
-            "success": True,
-            "data": response.json()
-        }
-
-    except requests.exceptions.HTTPError as e:
-        return {
-            "success": False,
-            "error": f"HTTP error: {e}",
-            "status_code": e.response.status_code if e.response else None
-        }
-    except Exception as e:
-        return {
-            "success": False,
-            "error": str(e)
-        }
+    url = f"{FOURSQUARE_BASE_URL}/{fsq_place_id}/photos"
+    return await _cached_get("photos", url)
@@ -0,0 +1,161 @@
+"""
+Offline gazetteer: resolves city names and catalogue place titles to
+coordinates without leaving the process.
+
+Queries are matched on a normalised form (lowercase, Vietnamese diacritics
+removed, punctuation collapsed, trailing "Vietnam" dropped), so "Đà Lạt",
+"Da Lat, Vietnam" and "dalat" all hit the same entry. The place index is
+rebuilt from the catalogue whenever the database file changes.
+"""
+
+import logging
+import re
+import threading
+import unicodedata
+
+from sqlalchemy import text
+
+from ..place_migrations import table_columns
+
+logger = logging.getLogger(__name__)
+
+# Canonical city names as stored in places.city_name
+CITIES = {
+    "HCMC, Vietnam": {
+        "lat": 10.7769,
+        "lon": 106.7009,
+        "display_name": "Ho Chi Minh City, Vietnam",
+        "aliases": [
+            "hcmc",
+            "ho chi minh",
+            "ho chi minh city",
+            "thanh pho ho chi minh",
+            "tp ho chi minh",
+            "tp hcm",
+            "tphcm",
+            "saigon",
+            "sai gon",
+        ],
+    },
+    "Dalat, Vietnam": {
+        "lat": 11.9404,
+        "lon": 108.4583,
+        "display_name": "Da Lat, Lam Dong, Vietnam",
+        "aliases": ["dalat", "da lat", "thanh pho da lat", "tp da lat"],
+    },
+    "Hue, Vietnam": {
+        "lat": 16.4637,
+        "lon": 107.5909,
+        "display_name": "Hue, Thua Thien Hue, Vietnam",
+        "aliases": ["hue", "thanh pho hue", "tp hue"],
+    },
+}
+
+_COUNTRY_SUFFIX = re.compile(r"(?:\s+(?:vietnam|viet nam|vn))+$")
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_query(query: str) -> str:
+    query = query.replace("đ", "d").replace("Đ", "D")
+    query = unicodedata.normalize("NFKD", query)
+    query = "".join(c for c in query if not unicodedata.combining(c)).lower()
+    query = _NON_WORD.sub(" ", query).strip()
+    return _COUNTRY_SUFFIX.sub("", query).strip()
+
+
+_CITY_BY_ALIAS = {
+    alias: city for city, info in CITIES.items() for alias in info["aliases"]
+}
+# Longest first, so "ho chi minh city" wins over "ho chi minh"
+_ALIASES_BY_LENGTH = sorted(_CITY_BY_ALIAS, key=len, reverse=True)
+
+
+def canonical_city(name: str):
+    """Canonical city for any spelling of it, or None"""
+    return _CITY_BY_ALIAS.get(normalize_query(name or ""))
+
+
+def _city_result(city: str):
+    info = CITIES[city]
+    return {"lat": info["lat"], "lon": info["lon"], "display_name": info["display_name"]}
+
+
+class Gazetteer:
+    def __init__(self, engine, version=None):
+        """
+        Args:
+            engine: Engine for the places catalogue
+            version: Callable returning a value that changes with the data
+        """
+        self.engine = engine
+        self.version = version
+        self._loaded_version = None
+        self._places = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        places = {}
+        with self.engine.connect() as conn:
+            columns = table_columns(conn, "places")
+            # Older catalogue snapshots predate these columns
+            city = "city_name" if "city_name" in columns else "NULL"
+            score = "IFNULL(POI_score, 0)" if "POI_score" in columns else "NULL"
+            rows = conn.execute(
+                text(
+                    f"SELECT title, address, {city}, latitude, longitude FROM places"
+                    " WHERE title IS NOT NULL AND latitude IS NOT NULL"
+                    f" ORDER BY {score} DESC, id"
+                )
+            )
+            for title, address, city_name, lat, lon in rows:
+                key = normalize_query(title)
+                if not key:
+                    continue
+                entry = {
+                    "lat": lat,
+                    "lon": lon,
+                    "display_name": ", ".join(p for p in (title, address) if p),
+                }
+                # Rows arrive best first; keep the best entry per title overall
+                # and per city
+                per_title = places.setdefault(key, {})
+                per_title.setdefault(None, entry)
+                per_title.setdefault(canonical_city(city_name), entry)
+        return places
+
+    def _ensure_loaded(self):
+        version = self.version() if self.version else None
+        if self._places is not None and version == self._loaded_version:
+            return
+        with self._lock:
+            if self._places is None or version != self._loaded_version:
+                self._places = self._load()
+                self._loaded_version = version
+                logger.info("Gazetteer indexed %d place titles", len(self._places))
+
+    def lookup(self, query: str):
+        """Result dict like the geocoder returns, or None if not known offline"""
+        key = normalize_query(query)
+        if not key:
+            return None
+        city = _CITY_BY_ALIAS.get(key)
+        if city:
+            return _city_result(city)
+
+        self._ensure_loaded()
+        match = self._places.get(key)
+        if match:
+            return match[None]
+        # "<place>, <city>": match the title within that city
+        for alias in _ALIASES_BY_LENGTH:
+            if key.endswith(" " + alias):
+                match = self._places.get(key[: -len(alias) - 1].strip())
+                if match:
+                    city = _CITY_BY_ALIAS[alias]
+                    if city in match:
+                        return match[city]
+                    if len(match) == 1:
+                        # Catalogue without city names
+                        return match[None]
+                break
+        return None
@@ -1,49 +1,160 @@
-import requests
-import polyline
+import asyncio
+import logging
+import os
+import time
+
+from fastapi.concurrency import run_in_threadpool
+
+from .. import http_client
+from ..cache import MISSING, PersistentCache
+from ..place_database import DATABASE_PATH as PLACES_DATABASE_PATH
+from ..place_database import file_version
+from ..place_database import engine as place_engine
+from ..polylines import join_polylines, simplify_polyline
+from .gazetteer import Gazetteer, normalize_query
+from .matrix_service import compute_matrix
+from .route_optimizer import RouteProblem, optimize, parse_opening_hours
+from .routing_service import get_routing_backend
+
+logger = logging.getLogger(__name__)
 
 NOMINATIM_URL = "https://nominatim.openstreetmap.org"
-OSRM_URL = "https://router.project-osrm.org"
+
+# Default Douglas-Peucker tolerance for geometry="simplified"
+GEOMETRY_TOLERANCE_M = 10.0
 
 HEADERS = {"User-Agent": "SmartTravel/1.0 (contact: a@gmail.com)"}
 
+# Nominatim's usage policy allows one request per second per application
+NOMINATIM_MIN_INTERVAL_S = float(os.getenv("NOMINATIM_MIN_INTERVAL_S", "1.0"))
+GEOCODE_CACHE_PATH = "app/geocode_cache.db"
+GEOCODE_CACHE_SIZE = int(os.getenv("GEOCODE_CACHE_SIZE", "10000"))
+GEOCODE_TTL = float(os.getenv("GEOCODE_TTL", str(30 * 24 * 3600)))
+GEOCODE_NEGATIVE_TTL = float(os.getenv("GEOCODE_NEGATIVE_TTL", str(24 * 3600)))
+
+
+class RateLimiter:
+    """Spaces calls at least `interval` seconds apart across the process"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._next = 0.0
+
+    async def wait(self):
+        # Reserving the slot never yields, so calls on the loop cannot race
+        now = time.monotonic()
+        slot = max(now, self._next)
+        self._next = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+nominatim_limiter = RateLimiter(NOMINATIM_MIN_INTERVAL_S)
+geocode_cache = PersistentCache(
+    GEOCODE_CACHE_PATH, "geocode_cache", GEOCODE_CACHE_SIZE, GEOCODE_TTL
+)
+gazetteer = Gazetteer(place_engine, lambda: file_version(PLACES_DATABASE_PATH))
 
-def geocode_location(query: str):
+
+async def _nominatim_search(query: str):
+    await nominatim_limiter.wait()
+    response = await http_client.get(
+        f"{NOMINATIM_URL}/search",
+        params={"q": query, "format": "jsonv2", "limit": 1},
+        headers=HEADERS,
+    )
+    response.raise_for_status()
+    data = response.json()
+    if not data:
+        return None
+    item = data[0]
+    return {
+        "lat": float(item["lat"]),
+        "lon": float(item["lon"]),
+        "display_name": item["display_name"],
+    }
+
+
+async def geocode_location(query: str):
+    """
+    Resolve a query via the cache, then the offline gazetteer, then
+    Nominatim. Nominatim answers, including "not found", are cached.
+    """
     try:
-        response = requests.get(
-            f"{NOMINATIM_URL}/search",
-            params={"q": query, "format": "jsonv2", "limit": 1},
-            headers=HEADERS,
-            timeout=10,
-        )
-        response.raise_for_status()
-        data = response.json()
-        if not data:
+        key = normalize_query(query)
+        if not key:
             return None
-        item = data[0]
-        return {
-            "lat": float(item["lat"]),
-            "lon": float(item["lon"]),
-            "display_name": item["display_name"],
-        }
+        cached = await geocode_cache.aget(key)
+        if cached is not MISSING:
+            return cached
+        try:
+            # The first lookup after a catalogue change rebuilds the index
+            result = await run_in_threadpool(gazetteer.lookup, query)
+        except Exception:
+            logger.exception("Gazetteer lookup failed for %r", query)
+            result = None
+        if result is not None:
+            return result
+        result = await _nominatim_search(query)
+        await geocode_cache.aset(key, result, None if result else GEOCODE_NEGATIVE_TTL)
+        return result
     except Exception as e:
         return {"error": str(e)}
 
 
-def route_osrm(points):
+def _route_result(route, optimized_points, geometry="full", tolerance_m=GEOMETRY_TOLERANCE_M):
+    """
+    Response for one OSRM trip/route object visiting optimized_points in order.
+
+    geometry is "full", "simplified" (Douglas-Peucker at tolerance_m) or
+    "none", which drops the overview and leg geometries.
+    """
+    overview = route.get("geometry")
+    if geometry == "none":
+        overview = None
+        segment_geometries = [None] * len(route["legs"])
+    else:
+        segment_geometries = [
+            join_polylines(step.get("geometry") for step in leg.get("steps", []))
+            for leg in route["legs"]
+        ]
+        if geometry == "simplified":
+            overview = simplify_polyline(overview, tolerance_m)
+            segment_geometries = [
+                simplify_polyline(g, tolerance_m) for g in segment_geometries
+            ]
+
+    instructions = []
+    for leg in route["legs"]:
+        leg_instructions = []
+        for step in leg.get("steps", []):
+            maneuver = step.get("maneuver", {})
+            road_name = step.get("name", "")
+            # Separate direction and name
+            direction = f"{maneuver.get('type', '').capitalize()} {maneuver.get('modifier', '')}".strip()
+            leg_instructions.append(
+                {
+                    "type": maneuver.get("type", ""),
+                    "modifier": maneuver.get("modifier", ""),
+                    "name": road_name,
+                }
+            )
+        instructions.append(leg_instructions)
+
+    return {
+        "success": True,
+        "optimized_route": optimized_points,
+        "distance_km": route["distance"] / 1000,
+        "duration_min": route["duration"] / 60,
+        "geometry": overview,
+        "segment_geometries": segment_geometries,
+        "instructions": instructions,
+    }
+
+
+def route_osrm(points, geometry="full", tolerance_m=GEOMETRY_TOLERANCE_M):
     try:
-        coords = ";".join([f"{point['lon']},{point['lat']}" for point in points])
-        r = requests.get(
-            f"{OSRM_URL}/trip/v1/driving/{coords}",
-            params={
-                "overview": "full",
-                "steps": "true",
-                "source": "first",
-                "roundtrip": "false",
-            },
-            timeout=120,
-        )
-        r.raise_for_status()
-        data = r.json()
+        data = get_routing_backend().trip(points, source="first", roundtrip=False)
 
         if "trips" not in data or not data["trips"]:
             return {"success": False, "error": "No trips found"}
@@ -62,48 +173,92 @@ def route_osrm(points):
             ordered_indices = waypoint_order
 
         optimized_points = [points[i] for i in ordered_indices]
+        return _route_result(data["trips"][0], optimized_points, geometry, tolerance_m)
 
-        segment_geometries = []
-        for leg in data["trips"][0]["legs"]:
-            all_coords = []
-            for step in leg.get("steps", []):
-                geom = step.get("geometry")
-                if geom:
-                    coords = polyline.decode(geom)
-                    all_coords.extend(coords)
-            if all_coords:
-                # Encode the full list of coordinates as a polyline string
-                segment_geometries.append(polyline.encode(all_coords))
-            else:
-                segment_geometries.append(None)
-
-        instructions = []
-        for leg in data["trips"][0]["legs"]:
-            leg_instructions = []
-            for step in leg.get("steps", []):
-                maneuver = step.get("maneuver", {})
-                road_name = step.get("name", "")
-                # Separate direction and name
-                direction = f"{maneuver.get('type', '').capitalize()} {maneuver.get('modifier', '')}".strip()
-                leg_instructions.append(
-                    {
-                        "type": maneuver.get("type", ""),
-                        "modifier": maneuver.get("modifier", ""),
-                        "name": road_name,
-                    }
-                )
-            instructions.append(leg_instructions)
-
+    except Exception as e:
         return {
-            "success": True,
-            "optimized_route": optimized_points,
-            "distance_km": data["trips"][0]["distance"] / 1000,
-            "duration_min": data["trips"][0]["duration"] / 60,
-            "geometry": data["trips"][0].get("geometry"),
-            "segment_geometries": segment_geometries,
-            "instructions": instructions,
+            "success": False,
+            "error": str(e),
         }
 
+
+def _clock_text(seconds: float) -> str:
+    minutes = int(round(seconds / 60))
+    return f"{minutes // 60 % 24:02d}:{minutes % 60:02d}"
+
+
+def route_optimized(
+    points,
+    days: int = 1,
+    end_index=None,
+    day_start: int = 8 * 3600,
+    max_day=None,
+    weekday=None,
+    visit_minutes: float = 0,
+    seed: int = 0,
+    anneal_iterations: int = 0,
+    time_limit=None,
+    geometry: str = "full",
+    tolerance_m: float = GEOMETRY_TOLERANCE_M,
+):
+    """
+    Order points with the in-process optimiser and route them.
+
+    The first point is the fixed start of every day. A point may carry
+    "visit_minutes" and "operating_hours" ({"monday": "8 AM–5 PM", ...});
+    opening hours are only enforced when weekday is given. time_limit caps
+    annealing in seconds of wall-clock time.
+
+    Returns:
+        The route_osrm response for a single day, otherwise {"success",
+        "days": [per-day route_osrm responses]}; each day also lists
+        "arrivals" as HH:MM clock times
+    """
+    try:
+        matrix = compute_matrix(points)["durations"]
+        windows = None
+        if weekday:
+            windows = [
+                parse_opening_hours((point.get("operating_hours") or {}).get(weekday))
+                for point in points
+            ]
+        service = [
+            60 * point.get("visit_minutes", visit_minutes) if i else 0
+            for i, point in enumerate(points)
+        ]
+        problem = RouteProblem(
+            matrix,
+            service=service,
+            windows=windows,
+            start=0,
+            end=end_index,
+            day_start=day_start,
+            max_day=max_day,
+        )
+        plan = optimize(
+            problem,
+            days=days,
+            seed=seed,
+            anneal_iterations=anneal_iterations,
+            time_limit=time_limit,
+        )
+
+        backend = get_routing_backend()
+        results = []
+        for day in plan["days"]:
+            ordered = [points[i] for i in day["path"]]
+            data = backend.route(ordered)
+            if not data.get("routes"):
+                return {"success": False, "error": "No route found"}
+            result = _route_result(data["routes"][0], ordered, geometry, tolerance_m)
+            result["arrivals"] = [_clock_text(t) for t in day["arrivals"]]
+            result["late_min"] = day["lateness"] / 60
+            result["overtime_min"] = day["overtime"] / 60
+            results.append(result)
+        if days <= 1:
+            return results[0]
+        return {"success": True, "days": results}
+
     except Exception as e:
         return {
             "success": False,
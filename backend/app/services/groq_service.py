@@ -2,13 +2,17 @@ import datetime
 import json
 import os
 import random
-from ..routers.places import get_available_categories, get_types_dict_from_stats
+from ..routers.places import (
+    get_available_categories,
+    get_places_by_ids,
+    get_types_dict_from_stats,
+)
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from groq import Groq
 from ..place_models import Place
-from sqlalchemy.types import JSON, Float, Integer
+from ..place_rows import decoder_for
 
 # categories_path = os.path.join(os.path.dirname(__file__), "..", "categories.json")
 # with open(categories_path, "r", encoding="utf-8") as f:
@@ -613,20 +617,17 @@ Instruction: {user_prompt}
             return {"error": "No destination found in prompt."}
 
         matches = manual_search_places(destination, db, limit=10)
-        # Optionally, fetch full records from places table as you do now
+        # Fetch full records from places table in one query
+        places = get_places_by_ids(
+            [m.get("place_id") for m in matches if m.get("place_id")], db
+        )
         full_matches = []
         for match in matches:
-            place_id = match.get("place_id")
-            if place_id:
-                place_sql = text("SELECT * FROM places WHERE place_id = :id")
-                place_row = db.execute(place_sql, {"id": place_id}).fetchone()
-                if place_row:
-                    full_matches.append(dict(place_row._mapping))
-                else:
-                    print("No full place record found for match:", match)
-                    full_matches.append(dict(match))
+            place = places.get(match.get("place_id"))
+            if place:
+                full_matches.append(place)
             else:
-                print("No place_id in match:", match)
+                print("No full place record found for match:", match)
                 full_matches.append(dict(match))
         return {"destination": destination, "matches": full_matches}
     except Exception as e:
@@ -971,23 +972,7 @@ Instruction: {user_prompt}
 
 
 def row_to_dict(row, model):
-    columns = [col.name for col in model.__table__.columns]
-    types = {col.name: col.type for col in model.__table__.columns}
-    place = {}
-    for idx, col in enumerate(columns):
-        value = row[idx]
-        col_type = types[col]
-        if isinstance(col_type, JSON):
-            try:
-                value = json.loads(value) if value is not None else None
-            except Exception:
-                pass
-        elif isinstance(col_type, Float):
-            value = float(value) if value is not None else None
-        elif isinstance(col_type, Integer):
-            value = int(value) if value is not None else None
-        place[col] = value
-    return place
+    return decoder_for(model)(row)
 
 
 def replace_destination_in_plan(
@@ -1,4 +1,60 @@
+"""
+Translation through googletrans, behind a translation memory.
+
+Texts are looked up by (src, dest, normalised text) in the catalogue seed,
+then in a persistent cache of earlier translator answers, and only the
+misses go to the translator: deduplicated, concurrently (at most
+TRANSLATE_CONCURRENCY at a time) and over one shared Translator.
+"""
+
+import asyncio
+import logging
+import os
+
 import googletrans
+from fastapi.concurrency import run_in_threadpool
+
+from ..cache import PersistentCache
+from ..place_database import DATABASE_PATH as PLACES_DATABASE_PATH
+from ..place_database import file_version
+from ..place_database import engine as place_engine
+from .translation_memory import TranslationMemory, normalize_text
+
+logger = logging.getLogger(__name__)
+
+TRANSLATION_CACHE_PATH = "app/translation_cache.db"
+TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", "20000"))
+TRANSLATION_TTL = float(os.getenv("TRANSLATION_TTL", str(180 * 24 * 3600)))
+TRANSLATE_CONCURRENCY = int(os.getenv("TRANSLATE_CONCURRENCY", "8"))
+
+translation_cache = PersistentCache(
+    TRANSLATION_CACHE_PATH, "translations", TRANSLATION_CACHE_SIZE, TRANSLATION_TTL
+)
+translation_memory = TranslationMemory(
+    place_engine, lambda: file_version(PLACES_DATABASE_PATH)
+)
+
+_translator = None
+_translator_loop = None
+_translator_slots = None
+
+
+def get_translator() -> googletrans.Translator:
+    """The shared translator, recreated if the event loop changed"""
+    global _translator, _translator_loop, _translator_slots
+    loop = asyncio.get_running_loop()
+    if _translator is None or _translator_loop is not loop:
+        _translator = googletrans.Translator()
+        _translator_loop = loop
+        _translator_slots = asyncio.Semaphore(TRANSLATE_CONCURRENCY)
+    return _translator
+
+
+async def close_translator():
+    global _translator, _translator_loop
+    if _translator is not None:
+        await _translator.client.aclose()
+    _translator = _translator_loop = None
 
 
 async def translateViToEn(txt):
@@ -10,13 +66,62 @@ async def translateEnToVi(txt):
 
 
 async def detect_language(txt):
-    async with googletrans.Translator() as translator:
+    translator = get_translator()
+    async with _translator_slots:
         detection = await translator.detect(txt)
-        return detection.lang
+    return detection.lang
+
+
+def _cache_key(src, dest, value):
+    return f"{src}|{dest}|{value}"
+
+
+async def _fetch(translator, value, src, dest):
+    async with _translator_slots:
+        return (await translator.translate(value, src=src, dest=dest)).text
+
+
+async def translate_many(texts, src, dest):
+    """
+    Translations of texts in order. Each distinct text is translated at most
+    once; an entry is None if the translator failed for it.
+    """
+    keys = [normalize_text(t or "") for t in texts]
+    found = {"": ""}
+    wanted = list(dict.fromkeys(k for k in keys if k))
+    if wanted:
+        # The first lookup after a catalogue change rebuilds the seed index
+        try:
+            found.update(
+                await run_in_threadpool(translation_memory.lookup_many, src, dest, wanted)
+            )
+        except Exception:
+            logger.exception("Translation memory lookup failed")
+        wanted = [k for k in wanted if k not in found]
+    if wanted:
+        cached = await translation_cache.aget_many([_cache_key(src, dest, k) for k in wanted])
+        for k in wanted:
+            value = cached.get(_cache_key(src, dest, k))
+            if value is not None:
+                found[k] = value
+        wanted = [k for k in wanted if k not in found]
+    if wanted:
+        translator = get_translator()
+        results = await asyncio.gather(
+            *(_fetch(translator, k, src, dest) for k in wanted), return_exceptions=True
+        )
+        fresh = {}
+        for k, result in zip(wanted, results):
+            if isinstance(result, Exception):
+                logger.warning("Translation %s->%s failed for %r: %r", src, dest, k, result)
+                continue
+            found[k] = fresh[_cache_key(src, dest, k)] = result
+        await translation_cache.aset_many(fresh)
+    return [found.get(k) for k in keys]
 
 
 async def _translate(txt, _src, _dest):
-    res = ""
-    async with googletrans.Translator() as translator:
-        res = (await translator.translate(txt, src=_src, dest=_dest)).text
+    res = (await translate_many([txt], _src, _dest))[0]
+    if res is None:
+        raise RuntimeError("Translation failed")
     return res
@@ -0,0 +1,277 @@
+"""
+Travel time / distance matrices with a persistent cache.
+
+Cells are cached per (source, destination) pair of snapped point keys from
+the routing backend: graph node ids for the local backend, rounded
+coordinates for OSRM. A bounded in-memory LRU sits in front of an SQLite
+table, and both honour the same TTL.
+
+    ROUTE_MATRIX_TTL              Seconds a cached cell stays valid (7 days)
+    ROUTE_MATRIX_CACHE_SIZE       Cells kept in the in-memory LRU
+    ROUTE_MATRIX_MAX_ROWS         Cells kept on disk, oldest dropped first
+    ROUTE_MATRIX_PRECOMPUTE_TOP_N Top places per city warmed at startup (0 = off);
+                                  defaults to 50 with ROUTING_BACKEND=local and
+                                  to 0 otherwise, so startup never floods OSRM
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import text
+
+from ..sqlite_engine import create_sqlite_engine
+from .routing_service import ROUTING_BACKEND, get_routing_backend
+
+logger = logging.getLogger(__name__)
+
+ROUTE_CACHE_PATH = "app/route_cache.db"
+ROUTE_MATRIX_TTL = float(os.getenv("ROUTE_MATRIX_TTL", str(7 * 24 * 3600)))
+ROUTE_MATRIX_CACHE_SIZE = int(os.getenv("ROUTE_MATRIX_CACHE_SIZE", "200000"))
+ROUTE_MATRIX_MAX_ROWS = int(os.getenv("ROUTE_MATRIX_MAX_ROWS", "2000000"))
+ROUTE_MATRIX_PRECOMPUTE_TOP_N = int(
+    os.getenv("ROUTE_MATRIX_PRECOMPUTE_TOP_N", "50" if ROUTING_BACKEND == "local" else "0")
+)
+
+# SQLite limits host parameters per statement; stay well below it
+_LOOKUP_CHUNK = 400
+
+
+class MatrixCache:
+    def __init__(self, path: str, ttl: float, max_entries: int, max_rows: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.engine = create_sqlite_engine(path)
+        with self.engine.begin() as conn:
+            conn.execute(
+                text(
+                    "CREATE TABLE IF NOT EXISTS route_matrix ("
+                    " source_key TEXT NOT NULL,"
+                    " target_key TEXT NOT NULL,"
+                    " duration REAL,"
+                    " distance REAL,"
+                    " updated_at REAL NOT NULL,"
+                    " PRIMARY KEY (source_key, target_key)"
+                    ") WITHOUT ROWID"
+                )
+            )
+            conn.execute(
+                text(
+                    "CREATE INDEX IF NOT EXISTS ix_route_matrix_updated_at"
+                    " ON route_matrix (updated_at)"
+                )
+            )
+
+    def _remember(self, pair, value):
+        # Caller holds the lock
+        self._memory[pair] = value
+        self._memory.move_to_end(pair)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, pairs):
+        """Cached (duration, distance) for each pair that is present and fresh"""
+        now = time.time()
+        found = {}
+        missing = []
+        with self._lock:
+            for pair in pairs:
+                entry = self._memory.get(pair)
+                if entry is not None and now - entry[2] < self.ttl:
+                    self._memory.move_to_end(pair)
+                    found[pair] = entry[:2]
+                else:
+                    missing.append(pair)
+        if not missing:
+            return found
+
+        # Pairs are fetched per source, which keeps the lookup on the primary key
+        by_source = {}
+        for source, target in missing:
+            by_source.setdefault(source, []).append(target)
+        loaded = []
+        with self.engine.connect() as conn:
+            for source, targets in by_source.items():
+                for start in range(0, len(targets), _LOOKUP_CHUNK):
+                    chunk = targets[start : start + _LOOKUP_CHUNK]
+                    params = {f"t{i}": t for i, t in enumerate(chunk)}
+                    placeholders = ", ".join(f":t{i}" for i in range(len(chunk)))
+                    params.update(source=source, oldest=now - self.ttl)
+                    rows = conn.execute(
+                        text(
+                            "SELECT target_key, duration, distance, updated_at"
+                            " FROM route_matrix WHERE source_key = :source"
+                            f" AND target_key IN ({placeholders})"
+                            " AND updated_at >= :oldest"
+                        ),
+                        params,
+                    )
+                    for target, duration, distance, updated_at in rows:
+                        loaded.append(((source, target), (duration, distance, updated_at)))
+        with self._lock:
+            for pair, entry in loaded:
+                self._remember(pair, entry)
+                found[pair] = entry[:2]
+        return found
+
+    def put_many(self, cells):
+        """Store {(source_key, target_key): (duration, distance)}"""
+        if not cells:
+            return
+        now = time.time()
+        with self._lock:
+            for pair, (duration, distance) in cells.items():
+                self._remember(pair, (duration, distance, now))
+        with self.engine.begin() as conn:
+            conn.execute(
+                text(
+                    "INSERT INTO route_matrix"
+                    " (source_key, target_key, duration, distance, updated_at)"
+                    " VALUES (:source, :target, :duration, :distance, :updated_at)"
+                    " ON CONFLICT (source_key, target_key) DO UPDATE SET"
+                    " duration = excluded.duration, distance = excluded.distance,"
+                    " updated_at = excluded.updated_at"
+                ),
+                [
+                    {
+                        "source": source,
+                        "target": target,
+                        "duration": duration,
+                        "distance": distance,
+                        "updated_at": now,
+                    }
+                    for (source, target), (duration, distance) in cells.items()
+                ],
+            )
+
+    def purge(self):
+        """Drop expired rows, then the oldest ones beyond max_rows"""
+        with self.engine.begin() as conn:
+            conn.execute(
+                text("DELETE FROM route_matrix WHERE updated_at < :oldest"),
+                {"oldest": time.time() - self.ttl},
+            )
+            conn.execute(
+                text(
+                    "DELETE FROM route_matrix WHERE updated_at <= ("
+                    " SELECT updated_at FROM route_matrix"
+                    " ORDER BY updated_at DESC LIMIT 1 OFFSET :keep)"
+                ),
+                {"keep": self.max_rows},
+            )
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_matrix_cache() -> MatrixCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = MatrixCache(
+                    ROUTE_CACHE_PATH,
+                    ROUTE_MATRIX_TTL,
+                    ROUTE_MATRIX_CACHE_SIZE,
+                    ROUTE_MATRIX_MAX_ROWS,
+                )
+    return _cache
+
+
+def compute_matrix(points, sources=None, destinations=None):
+    """
+    Durations (s) and distances (m) between points.
+
+    Args:
+        points: [{"lat": ..., "lon": ...}, ...]
+        sources: Indices of points used as rows, all points by default
+        destinations: Indices of points used as columns, all points by default
+
+    Returns:
+        Dict with "durations" and "distances" tables (None where no route
+        exists) and cache hit/miss counts
+    """
+    sources = list(range(len(points))) if sources is None else sources
+    destinations = list(range(len(points))) if destinations is None else destinations
+    backend = get_routing_backend()
+    cache = get_matrix_cache()
+
+    keys = backend.point_keys(points)
+    pairs = [(keys[i], keys[j]) for i in sources for j in destinations]
+    cached = cache.get_many(pairs)
+
+    # Only rows with at least one missing cell go to the backend
+    stale_rows = [
+        i for i in sources if any((keys[i], keys[j]) not in cached for j in destinations)
+    ]
+    if stale_rows:
+        table = backend.table(
+            [points[i] for i in stale_rows], [points[j] for j in destinations]
+        )
+        fresh = {}
+        for row, i in enumerate(stale_rows):
+            for col, j in enumerate(destinations):
+                fresh[(keys[i], keys[j])] = (
+                    table["durations"][row][col],
+                    table["distances"][row][col],
+                )
+        cache.put_many(fresh)
+        cached.update(fresh)
+
+    return {
+        "durations": [[cached[(keys[i], keys[j])][0] for j in destinations] for i in sources],
+        "distances": [[cached[(keys[i], keys[j])][1] for j in destinations] for i in sources],
+        "cache_hits": len(pairs) - len(stale_rows) * len(destinations),
+        "cache_misses": len(stale_rows) * len(destinations),
+    }
+
+
+def precompute_top_places(top_n: int = ROUTE_MATRIX_PRECOMPUTE_TOP_N):
+    """Warm the cache with the matrix among each city's top-N places"""
+    from ..place_database import engine as place_engine
+
+    with place_engine.connect() as conn:
+        rows = conn.execute(
+            text(
+                "SELECT city_name, latitude, longitude FROM ("
+                " SELECT city_name, latitude, longitude, ROW_NUMBER() OVER ("
+                "  PARTITION BY city_name ORDER BY IFNULL(POI_score, 0) DESC, id"
+                " ) AS rank FROM places"
+                " WHERE latitude IS NOT NULL AND longitude IS NOT NULL"
+                " AND city_name IS NOT NULL"
+                ") WHERE rank <= :top_n"
+            ),
+            {"top_n": top_n},
+        ).fetchall()
+    by_city = {}
+    for city_name, lat, lon in rows:
+        by_city.setdefault(city_name, []).append({"lat": lat, "lon": lon})
+    for city_name, points in by_city.items():
+        started = time.perf_counter()
+        try:
+            result = compute_matrix(points)
+        except Exception:
+            logger.exception("Precomputing the route matrix for %s failed", city_name)
+            continue
+        logger.info(
+            "Route matrix for %s: %d places, %d new cells in %.1fs",
+            city_name,
+            len(points),
+            result["cache_misses"],
+            time.perf_counter() - started,
+        )
+    get_matrix_cache().purge()
+
+
+def start_precompute():
+    if ROUTE_MATRIX_PRECOMPUTE_TOP_N <= 0:
+        return
+    threading.Thread(
+        target=precompute_top_places, name="route-matrix-precompute", daemon=True
+    ).start()
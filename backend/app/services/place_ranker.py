@@ -0,0 +1,351 @@
+"""
+In-memory ranking of catalogue places with NumPy.
+
+Every place with coordinates is held in flat arrays sorted by city, so a
+city is one contiguous slice: latitude/longitude (radians), POI_score,
+rating, review count and a bitset of its type_ids (one uint64 word per 64
+types). A ranking request filters, computes the haversine distance and the
+blended score for the whole slice in one vectorised pass, and selects the
+top k with argpartition instead of sorting every candidate. Multi-type
+queries ("any" or "all" of N type_ids) are answered from the same bitsets,
+one mask test per place regardless of N.
+
+The arrays are rebuilt whenever the catalogue file changes.
+"""
+
+import logging
+import math
+import threading
+import time
+
+import numpy as np
+from sqlalchemy import text
+
+from ..geo import EARTH_RADIUS_M
+from ..place_database import DATABASE_PATH as PLACES_DATABASE_PATH
+from ..place_database import file_version
+from ..place_database import engine as place_engine
+from ..place_migrations import table_columns, table_exists
+
+logger = logging.getLogger(__name__)
+
+# Weights of the blended score; every term is scaled to 0..1 first
+DEFAULT_WEIGHTS = {"distance": 0.4, "score": 0.3, "rating": 0.2, "reviews": 0.1}
+MAX_RATING = 5.0
+
+# Columns that older catalogue snapshots may not have
+_OPTIONAL_COLUMNS = ("city_name", "POI_score", "rating", "reviews")
+
+
+class CatalogueArrays:
+    """Column arrays for every place with coordinates, grouped by city"""
+
+    def __init__(self, rows, type_links, type_order=()):
+        rows = sorted(rows, key=lambda row: (row[2] or "", row[0]))
+        self.place_ids = [row[1] for row in rows]
+        self.row_ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self.lat = np.radians(np.array([row[3] for row in rows], dtype=np.float64))
+        self.lon = np.radians(np.array([row[4] for row in rows], dtype=np.float64))
+        self.cos_lat = np.cos(self.lat)
+        self.poi_score = np.array([row[5] or 0.0 for row in rows], dtype=np.float64)
+        self.rating = np.array([row[6] or 0.0 for row in rows], dtype=np.float64)
+        self.reviews = np.array([row[7] or 0 for row in rows], dtype=np.float64)
+
+        # city -> (start, end) of its slice
+        self.cities = {}
+        for i, row in enumerate(rows):
+            city = row[2] or ""
+            start, _ = self.cities.get(city, (i, i))
+            self.cities[city] = (start, i + 1)
+
+        position = {pid: i for i, pid in enumerate(self.place_ids)}
+        links = [(position[pid], type_id) for pid, type_id in type_links if pid in position]
+        # Dense ids: type_order first (strongest types share the low words),
+        # then types that only appear in place_types
+        ordered = list(dict.fromkeys(type_order))
+        linked = {t for _, t in links}
+        ordered += sorted(linked.difference(ordered))
+        self.type_bits = {type_id: bit for bit, type_id in enumerate(ordered)}
+        words = max(1, math.ceil(len(self.type_bits) / 64))
+        self.types = np.zeros((len(rows), words), dtype=np.uint64)
+        if links:
+            rows_index = np.array([i for i, _ in links], dtype=np.int64)
+            bits = np.array([self.type_bits[t] for _, t in links], dtype=np.int64)
+            np.bitwise_or.at(
+                self.types,
+                (rows_index, bits // 64),
+                np.left_shift(np.uint64(1), (bits % 64).astype(np.uint64)),
+            )
+
+    def __len__(self):
+        return len(self.place_ids)
+
+    def has_type(self, rows, type_id):
+        """Boolean array: which of the given row positions have type_id"""
+        bit = self.type_bits[type_id]
+        word = self.types[rows, bit // 64]
+        return (word >> np.uint64(bit % 64)) & np.uint64(1) == 1
+
+    def type_mask(self, type_ids):
+        """Bitset of the known type_ids, or None if none of them is known"""
+        mask = np.zeros(self.types.shape[1], dtype=np.uint64)
+        known = False
+        for type_id in type_ids:
+            bit = self.type_bits.get(type_id)
+            if bit is not None:
+                mask[bit // 64] |= np.uint64(1) << np.uint64(bit % 64)
+                known = True
+        return mask if known else None
+
+
+def haversine_many(lat, lon, cos_lat, latitude: float, longitude: float):
+    """Distances in meters from one point to arrays of points in radians"""
+    phi = math.radians(latitude)
+    d_phi = lat - phi
+    d_lambda = lon - math.radians(longitude)
+    a = np.sin(d_phi / 2) ** 2 + math.cos(phi) * cos_lat * np.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def top_k(score, limit: int, *tie_breaks):
+    """
+    Positions of the limit highest scores, best first. Ties are broken by
+    the tie_breaks arrays in order, each ascending. Everything tied with the
+    k-th score goes into the final sort, so the result equals a full sort.
+    """
+    if limit < score.size:
+        kth = -np.partition(-score, limit - 1)[limit - 1]
+        top = np.flatnonzero(score >= kth)
+    else:
+        top = np.arange(score.size)
+    keys = tuple(key[top] for key in reversed(tie_breaks)) + (-score[top],)
+    return top[np.lexsort(keys)][:limit]
+
+
+class PlaceRanker:
+    def __init__(self, engine, version=None):
+        """
+        Args:
+            engine: Engine for the places catalogue
+            version: Callable returning a value that changes with the data
+        """
+        self.engine = engine
+        self.version = version
+        self._loaded_version = None
+        self._arrays = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self.engine.connect() as conn:
+            columns = table_columns(conn, "places")
+            select_list = ", ".join(
+                column if column in columns else f"NULL AS {column}"
+                for column in _OPTIONAL_COLUMNS
+            )
+            rows = conn.execute(
+                text(
+                    f"SELECT id, place_id, {select_list}, latitude, longitude FROM places"
+                    " WHERE latitude IS NOT NULL AND longitude IS NOT NULL"
+                )
+            ).fetchall()
+            type_links = []
+            if table_exists(conn, "place_types"):
+                type_links = conn.execute(
+                    text("SELECT place_id, type_id FROM place_types")
+                ).fetchall()
+            type_order = []
+            if table_exists(conn, "type_stats"):
+                type_order = [
+                    row[0]
+                    for row in conn.execute(
+                        text(
+                            "SELECT type_id FROM type_stats GROUP BY type_id"
+                            " ORDER BY MAX(type_score) DESC, type_id"
+                        )
+                    )
+                ]
+        # (id, place_id, city_name, latitude, longitude, POI_score, rating, reviews)
+        return CatalogueArrays(
+            [(r[0], r[1], r[2], r[6], r[7], r[3], r[4], r[5]) for r in rows],
+            type_links,
+            type_order,
+        )
+
+    def arrays(self) -> CatalogueArrays:
+        version = self.version() if self.version else None
+        if self._arrays is not None and version == self._loaded_version:
+            return self._arrays
+        with self._lock:
+            if self._arrays is None or version != self._loaded_version:
+                started = time.perf_counter()
+                self._arrays = self._load()
+                self._loaded_version = version
+                logger.info(
+                    "Place ranker loaded %d places in %.2fs",
+                    len(self._arrays),
+                    time.perf_counter() - started,
+                )
+        return self._arrays
+
+    def rank(
+        self,
+        latitude=None,
+        longitude=None,
+        radius_m=None,
+        city=None,
+        types=None,
+        weights=None,
+        min_rating=None,
+        limit: int = 20,
+    ):
+        """
+        Top places by blended score.
+
+        Args:
+            latitude, longitude: Reference point for the distance term and
+                radius filter; without it the distance weight is ignored
+            radius_m: Only places within this distance of the point
+            city: Only places whose city_name matches exactly
+            types: Only places having any of these type_ids
+            weights: Overrides for DEFAULT_WEIGHTS
+            min_rating: Only places rated at least this
+            limit: Number of places to return
+
+        Returns:
+            List of (place_id, distance_m or None, score), best first
+        """
+        if limit <= 0:
+            return []
+        found = self._area(latitude, longitude, radius_m, city)
+        if found is None:
+            return []
+        data, part, keep, distance = found
+        weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+
+        if types:
+            mask = data.type_mask(types)
+            if mask is None:
+                return []
+            keep &= (data.types[part] & mask).any(axis=1)
+        if min_rating is not None:
+            keep &= data.rating[part] >= min_rating
+
+        candidates = np.flatnonzero(keep)
+        if candidates.size == 0:
+            return []
+
+        # Scale each term to 0..1 over the candidates, then blend
+        poi = data.poi_score[part][candidates]
+        reviews = np.log1p(data.reviews[part][candidates])
+        score = weights["rating"] * np.clip(data.rating[part][candidates] / MAX_RATING, 0, 1)
+        if poi.max() > 0:
+            score += weights["score"] * np.clip(poi / poi.max(), 0, 1)
+        if reviews.max() > 0:
+            score += weights["reviews"] * reviews / reviews.max()
+        if distance is not None:
+            distance = distance[candidates]
+            scale = radius_m or distance.max()
+            if scale > 0:
+                score += weights["distance"] * np.clip(1 - distance / scale, 0, 1)
+
+        # Score descending, then nearest, then lowest row id for stable output
+        order = top_k(
+            score,
+            limit,
+            distance if distance is not None else np.zeros(score.size),
+            data.row_ids[part][candidates],
+        )
+        return [
+            (
+                data.place_ids[part.start + candidates[i]],
+                float(distance[i]) if distance is not None else None,
+                float(score[i]),
+            )
+            for i in order
+        ]
+
+    def _area(self, latitude, longitude, radius_m, city):
+        """
+        (arrays, slice, keep mask, distances or None) for the city slice, or
+        the whole catalogue, with the radius filter applied; None if empty
+        """
+        data = self.arrays()
+        if city is not None:
+            if city not in data.cities:
+                return None
+            start, end = data.cities[city]
+        else:
+            start, end = 0, len(data)
+        if end == start:
+            return None
+        part = slice(start, end)
+        keep = np.ones(end - start, dtype=bool)
+        distance = None
+        if latitude is not None and longitude is not None:
+            distance = haversine_many(
+                data.lat[part], data.lon[part], data.cos_lat[part], latitude, longitude
+            )
+            if radius_m is not None:
+                keep &= distance <= radius_m
+        return data, part, keep, distance
+
+    def by_types(
+        self,
+        types,
+        match: str = "any",
+        latitude=None,
+        longitude=None,
+        radius_m=None,
+        city=None,
+        limit: int = 50,
+    ):
+        """
+        Places having any (grouped per type) or all of the given type_ids,
+        ordered like /api/places/search: POI_score descending, then newest
+        row first. One pass over the area answers every type.
+
+        Returns:
+            match="any": {type_id: [(place_id, distance_m or None), ...]}
+                with a (possibly empty) entry for every requested type
+            match="all": [(place_id, distance_m or None), ...]
+        """
+        types = list(dict.fromkeys(types))
+        empty = {type_id: [] for type_id in types} if match == "any" else []
+        found = self._area(latitude, longitude, radius_m, city)
+        if found is None or limit <= 0:
+            return empty
+        data, part, keep, distance = found
+        known = [type_id for type_id in types if type_id in data.type_bits]
+        mask = data.type_mask(known)
+        if mask is None or (match == "all" and len(known) < len(types)):
+            return empty
+
+        bits = data.types[part]
+        if match == "all":
+            keep &= ((bits & mask) == mask).all(axis=1)
+        else:
+            keep &= (bits & mask).any(axis=1)
+        candidates = np.flatnonzero(keep)
+        poi = data.poi_score[part][candidates]
+        newest = -data.row_ids[part][candidates]
+
+        def rows(positions):
+            return [
+                (
+                    data.place_ids[part.start + candidates[i]],
+                    float(distance[candidates[i]]) if distance is not None else None,
+                )
+                for i in positions
+            ]
+
+        if match == "all":
+            return rows(top_k(poi, limit, newest))
+        grouped = dict(empty)
+        for type_id in known:
+            members = np.flatnonzero(data.has_type(part.start + candidates, type_id))
+            grouped[type_id] = rows(members[top_k(poi[members], limit, newest[members])])
+        return grouped
+
+
+# Shared by the /api/places rank and type endpoints and the itinerary builder
+place_ranker = PlaceRanker(place_engine, lambda: file_version(PLACES_DATABASE_PATH))
@@ -0,0 +1,340 @@
+"""
+Compact road graph for in-process routing.
+
+Graphs are built offline from an OpenStreetMap XML extract (e.g. an
+Overpass or osmium export clipped to one city) and stored as flat CSR
+arrays:
+
+    python -m app.services.road_graph build hcmc.osm app/graphs/hcmc.graph
+
+Edge weights are travel durations in seconds; shortest paths use A* with a
+straight-line heuristic at the graph's fastest edge speed, and one-to-many
+searches (trip ordering, matrices) use plain Dijkstra.
+"""
+
+import heapq
+import json
+import math
+import struct
+import sys
+import xml.etree.ElementTree as ET
+from array import array
+
+from ..geo import bearing_deg, haversine_m
+
+# Default driving speeds in km/h when a way has no usable maxspeed tag
+HIGHWAY_SPEEDS_KMH = {
+    "motorway": 90,
+    "trunk": 70,
+    "primary": 50,
+    "secondary": 40,
+    "tertiary": 35,
+    "unclassified": 30,
+    "residential": 25,
+    "living_street": 10,
+    "service": 15,
+    "motorway_link": 60,
+    "trunk_link": 50,
+    "primary_link": 40,
+    "secondary_link": 35,
+    "tertiary_link": 30,
+}
+MAX_SPEED_MS = max(HIGHWAY_SPEEDS_KMH.values()) / 3.6
+
+_MAGIC = b"RGRAPH1\n"
+# Snapping grid cell size in degrees (~550 m)
+_GRID_DEG = 0.005
+
+
+def _speed_kmh(tags):
+    maxspeed = tags.get("maxspeed", "")
+    if maxspeed.isdigit():
+        return float(maxspeed)
+    return HIGHWAY_SPEEDS_KMH[tags["highway"]]
+
+
+class RoadGraph:
+    """
+    Directed road graph in compressed sparse row form.
+
+    Edges leaving node u are offsets[u] .. offsets[u + 1] - 1; each has a
+    target node, a duration (s), a length (m) and an index into names.
+    """
+
+    def __init__(self, lat, lon, offsets, targets, durations, distances, name_ids, names):
+        self.lat = lat
+        self.lon = lon
+        self.offsets = offsets
+        self.targets = targets
+        self.durations = durations
+        self.distances = distances
+        self.name_ids = name_ids
+        self.names = names
+        # The A* bound must cover maxspeed tags above the highway defaults;
+        # the slack absorbs float32 rounding of the stored edge weights
+        self.max_speed_ms = MAX_SPEED_MS
+        for length, duration in zip(distances, durations):
+            if duration > 0:
+                self.max_speed_ms = max(self.max_speed_ms, length / duration)
+        self.max_speed_ms *= 1.0001
+        self.bbox = (min(lat), max(lat), min(lon), max(lon))
+        self._grid = {}
+        for node in range(len(lat)):
+            key = (int(lat[node] // _GRID_DEG), int(lon[node] // _GRID_DEG))
+            self._grid.setdefault(key, []).append(node)
+
+    @property
+    def node_count(self):
+        return len(self.lat)
+
+    def contains(self, lat: float, lon: float) -> bool:
+        south, north, west, east = self.bbox
+        return south <= lat <= north and west <= lon <= east
+
+    def snap(self, lat: float, lon: float):
+        """Nearest routable node to a coordinate: (node, distance_m)"""
+        cell_lat = int(lat // _GRID_DEG)
+        cell_lon = int(lon // _GRID_DEG)
+        for ring in range(0, 20):
+            best = None
+            for d_lat in range(-ring, ring + 1):
+                for d_lon in range(-ring, ring + 1):
+                    if max(abs(d_lat), abs(d_lon)) != ring:
+                        continue
+                    for node in self._grid.get((cell_lat + d_lat, cell_lon + d_lon), ()):
+                        dist = haversine_m(lat, lon, self.lat[node], self.lon[node])
+                        if best is None or dist < best[1]:
+                            best = (node, dist)
+            # A hit in ring r can still be beaten by a node in ring r + 1
+            if best is not None:
+                for node in self._ring_nodes(cell_lat, cell_lon, ring + 1):
+                    dist = haversine_m(lat, lon, self.lat[node], self.lon[node])
+                    if dist < best[1]:
+                        best = (node, dist)
+                return best
+        return None
+
+    def _ring_nodes(self, cell_lat, cell_lon, ring):
+        for d_lat in range(-ring, ring + 1):
+            for d_lon in range(-ring, ring + 1):
+                if max(abs(d_lat), abs(d_lon)) == ring:
+                    yield from self._grid.get((cell_lat + d_lat, cell_lon + d_lon), ())
+
+    def shortest_path(self, source: int, target: int):
+        """
+        A* search on duration.
+
+        Returns:
+            List of edge indices from source to target, or None if unreachable
+        """
+        lat, lon = self.lat, self.lon
+        target_lat, target_lon = lat[target], lon[target]
+        offsets, targets, durations = self.offsets, self.targets, self.durations
+        max_speed_ms = self.max_speed_ms
+
+        def heuristic(node):
+            return haversine_m(lat[node], lon[node], target_lat, target_lon) / max_speed_ms
+
+        best = {source: 0.0}
+        via = {}
+        heap = [(heuristic(source), 0.0, source)]
+        while heap:
+            _, cost, node = heapq.heappop(heap)
+            if node == target:
+                return self._unwind(via, source, target)
+            if cost > best[node]:
+                continue
+            for edge in range(offsets[node], offsets[node + 1]):
+                nxt = targets[edge]
+                new_cost = cost + durations[edge]
+                if new_cost < best.get(nxt, math.inf):
+                    best[nxt] = new_cost
+                    via[nxt] = (node, edge)
+                    heapq.heappush(heap, (new_cost + heuristic(nxt), new_cost, nxt))
+        return None
+
+    def search_from(self, source: int, targets_wanted):
+        """
+        Dijkstra from source until every wanted node is settled.
+
+        Returns:
+            (durations, via) where durations maps reached nodes to seconds and
+            via can be passed to path_to() to rebuild routes
+        """
+        remaining = set(targets_wanted)
+        remaining.discard(source)
+        offsets, targets, durations = self.offsets, self.targets, self.durations
+        best = {source: 0.0}
+        via = {}
+        settled = set()
+        heap = [(0.0, source)]
+        while heap and remaining:
+            cost, node = heapq.heappop(heap)
+            if node in settled:
+                continue
+            settled.add(node)
+            remaining.discard(node)
+            for edge in range(offsets[node], offsets[node + 1]):
+                nxt = targets[edge]
+                new_cost = cost + durations[edge]
+                if new_cost < best.get(nxt, math.inf):
+                    best[nxt] = new_cost
+                    via[nxt] = (node, edge)
+                    heapq.heappush(heap, (new_cost, nxt))
+        return best, (source, via)
+
+    def path_to(self, search, target: int):
+        source, via = search
+        return self._unwind(via, source, target)
+
+    @staticmethod
+    def _unwind(via, source, target):
+        if source == target:
+            return []
+        if target not in via:
+            return None
+        edges = []
+        node = target
+        while node != source:
+            node, edge = via[node]
+            edges.append(edge)
+        edges.reverse()
+        return edges
+
+    def edge_source(self, edge: int) -> int:
+        # Binary search in offsets: the node whose edge range contains edge
+        lo, hi = 0, self.node_count - 1
+        offsets = self.offsets
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if offsets[mid] <= edge:
+                lo = mid
+            else:
+                hi = mid - 1
+        return lo
+
+    def bearing(self, u: int, v: int) -> float:
+        return bearing_deg(self.lat[u], self.lon[u], self.lat[v], self.lon[v])
+
+    # Serialization ---------------------------------------------------------
+
+    def save(self, path: str):
+        header = json.dumps(
+            {
+                "nodes": self.node_count,
+                "edges": len(self.targets),
+                "names": self.names,
+            },
+            ensure_ascii=False,
+        ).encode()
+        with open(path, "wb") as f:
+            f.write(_MAGIC)
+            f.write(struct.pack("<I", len(header)))
+            f.write(header)
+            for arr in (
+                self.lat,
+                self.lon,
+                self.offsets,
+                self.targets,
+                self.durations,
+                self.distances,
+                self.name_ids,
+            ):
+                arr.tofile(f)
+
+    @classmethod
+    def load(cls, path: str) -> "RoadGraph":
+        with open(path, "rb") as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"{path} is not a road graph file")
+            (size,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(size))
+            nodes, edges = header["nodes"], header["edges"]
+            arrays = []
+            for typecode, count in (
+                ("d", nodes),
+                ("d", nodes),
+                ("I", nodes + 1),
+                ("I", edges),
+                ("f", edges),
+                ("f", edges),
+                ("I", edges),
+            ):
+                arr = array(typecode)
+                arr.fromfile(f, count)
+                arrays.append(arr)
+        return cls(*arrays, header["names"])
+
+    @classmethod
+    def from_osm_xml(cls, path: str) -> "RoadGraph":
+        """Build a driving graph from an OSM XML file"""
+        coords = {}
+        ways = []
+        for _, elem in ET.iterparse(path, events=("end",)):
+            if elem.tag == "node":
+                coords[int(elem.get("id"))] = (float(elem.get("lat")), float(elem.get("lon")))
+                elem.clear()
+            elif elem.tag == "way":
+                tags = {t.get("k"): t.get("v") for t in elem.iter("tag")}
+                if tags.get("highway") in HIGHWAY_SPEEDS_KMH:
+                    refs = [int(nd.get("ref")) for nd in elem.iter("nd")]
+                    ways.append((refs, tags))
+                elem.clear()
+
+        index = {}
+        lat = array("d")
+        lon = array("d")
+        names = [""]
+        name_index = {"": 0}
+        raw_edges = []
+
+        def node_id(ref):
+            if ref not in index:
+                index[ref] = len(lat)
+                lat.append(coords[ref][0])
+                lon.append(coords[ref][1])
+            return index[ref]
+
+        for refs, tags in ways:
+            refs = [r for r in refs if r in coords]
+            name = tags.get("name", "")
+            if name not in name_index:
+                name_index[name] = len(names)
+                names.append(name)
+            speed_ms = _speed_kmh(tags) / 3.6
+            oneway = tags.get("oneway", "no")
+            forward = oneway != "-1"
+            backward = oneway not in ("yes", "true", "1") and tags.get("junction") != "roundabout"
+            for a, b in zip(refs, refs[1:]):
+                u, v = node_id(a), node_id(b)
+                length = haversine_m(lat[u], lon[u], lat[v], lon[v])
+                duration = length / speed_ms
+                if forward:
+                    raw_edges.append((u, v, duration, length, name_index[name]))
+                if backward:
+                    raw_edges.append((v, u, duration, length, name_index[name]))
+
+        raw_edges.sort()
+        offsets = array("I", [0] * (len(lat) + 1))
+        for u, *_ in raw_edges:
+            offsets[u + 1] += 1
+        for i in range(len(lat)):
+            offsets[i + 1] += offsets[i]
+        return cls(
+            lat,
+            lon,
+            offsets,
+            array("I", (e[1] for e in raw_edges)),
+            array("f", (e[2] for e in raw_edges)),
+            array("f", (e[3] for e in raw_edges)),
+            array("I", (e[4] for e in raw_edges)),
+            names,
+        )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4 or sys.argv[1] != "build":
+        sys.exit("usage: python -m app.services.road_graph build INPUT.osm OUTPUT.graph")
+    graph = RoadGraph.from_osm_xml(sys.argv[2])
+    graph.save(sys.argv[3])
+    print(f"{graph.node_count} nodes, {len(graph.targets)} edges -> {sys.argv[3]}")
@@ -0,0 +1,432 @@
+"""
+Visit-order optimisation on a travel time matrix.
+
+The solver builds a tour by nearest neighbour, improves it with 2-opt and
+Or-opt moves, and can follow up with seeded simulated annealing. It keeps
+the start (and optional end) point fixed, waits for opening-hour windows,
+and penalises late arrivals and days longer than the limit. Multi-day plans
+split one optimised tour into days with a shortest-path split, then improve
+each day on its own.
+
+All times are seconds; clock times are seconds after midnight. For a given
+seed the result is deterministic unless the optional wall-clock limit cuts
+annealing short.
+"""
+
+import math
+import random
+import re
+import time
+
+# Stand-in travel time for pairs the router could not connect
+UNREACHABLE_S = 10**7
+# One second of late arrival or overtime costs as much as this much travel
+LATENESS_PENALTY = 100
+OVERTIME_PENALTY = 100
+# Lateness charged for a stop that is closed all day
+CLOSED_PENALTY_S = 4 * 3600
+_EPS = 1e-6
+
+_CLOCK_RE = re.compile(r"^(\d{1,2})(?::(\d{2}))?\s*(am|pm)?$")
+
+
+def _clock(text: str):
+    match = _CLOCK_RE.match(text.strip().lower())
+    if not match:
+        raise ValueError(text)
+    hour, minute, meridiem = int(match[1]), int(match[2] or 0), match[3]
+    return hour, minute, meridiem
+
+
+def _to_seconds(hour: int, minute: int, meridiem: str) -> int:
+    if meridiem == "am" and hour == 12:
+        hour = 0
+    elif meridiem == "pm" and hour != 12:
+        hour += 12
+    return (hour * 60 + minute) * 60
+
+
+def parse_opening_hours(text):
+    """
+    Parse a Google Maps opening-hours string such as "7:30 AM–10 PM" or
+    "10 AM–1 PM, 4–10 PM".
+
+    Returns:
+        Sorted list of (open, close) seconds after midnight, [] when closed,
+        or None when always open or the format is not recognised
+    """
+    if not text:
+        return None
+    text = text.replace("\u202f", " ").replace("\u2009", " ")
+    text = text.replace("\u2013", "-").replace("\u2014", "-").strip().lower()
+    if text == "closed":
+        return []
+    if "24 hours" in text:
+        return None
+    windows = []
+    try:
+        for part in text.split(","):
+            start_text, end_text = part.split("-")
+            end_h, end_m, end_meridiem = _clock(end_text)
+            start_h, start_m, start_meridiem = _clock(start_text)
+            close = _to_seconds(end_h, end_m, end_meridiem)
+            if start_meridiem is None:
+                # "4-10 PM" shares the meridiem unless that puts it after closing
+                opening = _to_seconds(start_h, start_m, end_meridiem)
+                if end_meridiem == "pm" and opening > close:
+                    opening = _to_seconds(start_h, start_m, "am")
+            else:
+                opening = _to_seconds(start_h, start_m, start_meridiem)
+            if close <= opening:
+                close += 24 * 3600
+            windows.append((opening, close))
+    except ValueError:
+        return None
+    return sorted(windows)
+
+
+class RouteProblem:
+    """
+    Args:
+        matrix: Travel durations between all points, None where unreachable
+        service: Time spent at each point
+        windows: Opening windows per point as from parse_opening_hours
+        start: Index of the fixed first point
+        end: Index of the fixed last point (may equal start), None for open
+        day_start: Departure time from the start point
+        max_day: Longest allowed day from departure to the last arrival
+    """
+
+    def __init__(
+        self,
+        matrix,
+        service=None,
+        windows=None,
+        start=0,
+        end=None,
+        day_start=0,
+        max_day=None,
+    ):
+        n = len(matrix)
+        self.matrix = [
+            [UNREACHABLE_S if v is None else float(v) for v in row] for row in matrix
+        ]
+        self.service = list(service) if service else [0] * n
+        self.windows = list(windows) if windows else [None] * n
+        self.start = start
+        self.end = end
+        self.day_start = day_start
+        self.max_day = max_day
+        self.customers = [i for i in range(n) if i != start and i != end]
+        # Without windows or a day limit a move's cost change is local
+        self.time_free = max_day is None and all(w is None for w in self.windows)
+
+    def path(self, stops):
+        return [self.start, *stops] + ([self.end] if self.end is not None else [])
+
+    def schedule(self, path):
+        """
+        Simulate a day along a full path.
+
+        Returns:
+            (travel, arrivals, finish, lateness, overtime)
+        """
+        m = self.matrix
+        t = self.day_start
+        travel = 0.0
+        lateness = 0.0
+        arrivals = [t]
+        for prev, node in zip(path, path[1:]):
+            d = m[prev][node]
+            travel += d
+            t += d
+            arrivals.append(t)
+            windows = self.windows[node]
+            if windows is not None:
+                if not windows:
+                    lateness += CLOSED_PENALTY_S
+                else:
+                    for opening, close in windows:
+                        if t <= close:
+                            t = max(t, opening)
+                            break
+                    else:
+                        lateness += t - windows[-1][1]
+            t += self.service[node]
+        overtime = 0.0
+        if self.max_day is not None:
+            overtime = max(0.0, t - self.day_start - self.max_day)
+        return travel, arrivals, t, lateness, overtime
+
+    def cost(self, path):
+        if self.time_free:
+            m = self.matrix
+            return sum(m[a][b] for a, b in zip(path, path[1:]))
+        travel, _, _, lateness, overtime = self.schedule(path)
+        return travel + LATENESS_PENALTY * lateness + OVERTIME_PENALTY * overtime
+
+
+def nearest_neighbour(problem: RouteProblem, customers):
+    m = problem.matrix
+    remaining = list(customers)
+    stops = []
+    current = problem.start
+    while remaining:
+        nxt = min(remaining, key=lambda j: (m[current][j], j))
+        stops.append(nxt)
+        remaining.remove(nxt)
+        current = nxt
+    return stops
+
+
+def _two_opt_delta(m, path, i, k):
+    """Cost change of reversing path[i..k] on an asymmetric matrix"""
+    segment = path[i : k + 1]
+    old = m[path[i - 1]][segment[0]]
+    new = m[path[i - 1]][segment[-1]]
+    for a, b in zip(segment, segment[1:]):
+        old += m[a][b]
+        new += m[b][a]
+    if k + 1 < len(path):
+        old += m[segment[-1]][path[k + 1]]
+        new += m[segment[0]][path[k + 1]]
+    return new - old
+
+
+def _arc(m, a, b):
+    return 0.0 if b is None else m[a][b]
+
+
+def _or_opt_delta(m, path, i, length, j):
+    """
+    Cost change of moving path[i:i + length] to sit after path[j], where j
+    indexes the path with the segment removed.
+    """
+    seg_first, seg_last = path[i], path[i + length - 1]
+    before = path[i - 1]
+    after = path[i + length] if i + length < len(path) else None
+    removed = _arc(m, seg_last, after) + m[before][seg_first] - _arc(m, before, after)
+    # Map positions in the shortened path back onto path
+    rest_len = len(path) - length
+    x = path[j if j < i else j + length]
+    y = None
+    if j + 1 < rest_len:
+        y = path[j + 1 if j + 1 < i else j + 1 + length]
+    added = m[x][seg_first] + _arc(m, seg_last, y) - _arc(m, x, y)
+    return added - removed
+
+
+def local_search(problem: RouteProblem, stops):
+    """2-opt and Or-opt (segments of 1-3 stops) until no move improves"""
+    m = problem.matrix
+    path = problem.path(stops)
+    # Positions 1..last may move; a fixed end stays at the back
+    last = len(path) - 1 if problem.end is None else len(path) - 2
+    if last < 2:
+        return stops
+    best = problem.cost(path)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, last):
+            for k in range(i + 1, last + 1):
+                if problem.time_free:
+                    if _two_opt_delta(m, path, i, k) >= -_EPS:
+                        continue
+                    candidate = path[:i] + path[i : k + 1][::-1] + path[k + 1 :]
+                    best = problem.cost(candidate)
+                else:
+                    candidate = path[:i] + path[i : k + 1][::-1] + path[k + 1 :]
+                    cost = problem.cost(candidate)
+                    if cost >= best - _EPS:
+                        continue
+                    best = cost
+                path = candidate
+                improved = True
+
+        for length in (1, 2, 3):
+            for i in range(1, last - length + 2):
+                rest_last = last - length
+                for j in range(0, rest_last + 1):
+                    if j == i - 1:
+                        continue
+                    if (
+                        problem.time_free
+                        and _or_opt_delta(m, path, i, length, j) >= -_EPS
+                    ):
+                        continue
+                    segment = path[i : i + length]
+                    rest = path[:i] + path[i + length :]
+                    candidate = rest[: j + 1] + segment + rest[j + 1 :]
+                    cost = problem.cost(candidate)
+                    if cost >= best - _EPS:
+                        continue
+                    best = cost
+                    path = candidate
+                    improved = True
+    return path[1 : last + 1]
+
+
+def anneal(problem: RouteProblem, stops, iterations: int, seed: int = 0, time_limit=None):
+    """
+    Simulated annealing over reversal, relocation and swap moves.
+
+    Returns:
+        The best stop order seen
+    """
+    n = len(stops)
+    if n < 3 or iterations <= 0:
+        return stops
+    rng = random.Random(seed)
+    current = list(stops)
+    current_cost = problem.cost(problem.path(current))
+    best, best_cost = list(current), current_cost
+    # Start hot enough to accept an average uphill move about half the time
+    temp_start = max(current_cost / n / math.log(2), 1.0)
+    temp_end = temp_start * 1e-3
+    deadline = time.perf_counter() + time_limit if time_limit else None
+
+    for step in range(iterations):
+        if deadline and step % 256 == 0 and time.perf_counter() > deadline:
+            break
+        temp = temp_start * (temp_end / temp_start) ** (step / iterations)
+        i, k = sorted(rng.sample(range(n), 2))
+        move = rng.random()
+        candidate = list(current)
+        if move < 0.5:
+            candidate[i : k + 1] = candidate[i : k + 1][::-1]
+        elif move < 0.8:
+            candidate.insert(k, candidate.pop(i))
+        else:
+            candidate[i], candidate[k] = candidate[k], candidate[i]
+        cost = problem.cost(problem.path(candidate))
+        delta = cost - current_cost
+        if delta < 0 or rng.random() < math.exp(-delta / temp):
+            current, current_cost = candidate, cost
+            if cost < best_cost - _EPS:
+                best, best_cost = list(candidate), cost
+    return best
+
+
+def solve_day(problem: RouteProblem, customers, seed=0, anneal_iterations=0, time_limit=None):
+    stops = local_search(problem, nearest_neighbour(problem, customers))
+    if anneal_iterations:
+        stops = local_search(
+            problem, anneal(problem, stops, anneal_iterations, seed, time_limit)
+        )
+    return stops
+
+
+def split_days(problem: RouteProblem, order, days: int):
+    """
+    Cut a tour into at most `days` consecutive runs, each a day from the
+    start point, minimising the summed day cost.
+    """
+    n = len(order)
+    inf = math.inf
+    best = [[inf] * (n + 1) for _ in range(days + 1)]
+    cut = [[0] * (n + 1) for _ in range(days + 1)]
+    best[0][0] = 0.0
+    for d in range(1, days + 1):
+        for j in range(0, n + 1):
+            for i in range(0, j + 1):
+                if best[d - 1][i] == inf:
+                    continue
+                cost = best[d - 1][i] + (
+                    problem.cost(problem.path(order[i:j])) if j > i else 0.0
+                )
+                if cost < best[d][j]:
+                    best[d][j] = cost
+                    cut[d][j] = i
+    runs = []
+    j = n
+    for d in range(days, 0, -1):
+        i = cut[d][j]
+        runs.append(order[i:j])
+        j = i
+    runs.reverse()
+    return runs
+
+
+def relocate_between_days(problem: RouteProblem, runs):
+    """Move single stops to another day while that lowers the total cost"""
+    runs = [list(run) for run in runs]
+    costs = [problem.cost(problem.path(run)) for run in runs]
+    improved = True
+    while improved:
+        improved = False
+        for a in range(len(runs)):
+            for i in range(len(runs[a])):
+                stop = runs[a][i]
+                shrunk = runs[a][:i] + runs[a][i + 1 :]
+                gain = costs[a] - problem.cost(problem.path(shrunk))
+                best = None
+                for b in range(len(runs)):
+                    if b == a:
+                        continue
+                    for j in range(len(runs[b]) + 1):
+                        grown = runs[b][:j] + [stop] + runs[b][j:]
+                        extra = problem.cost(problem.path(grown)) - costs[b]
+                        if extra < gain - _EPS and (best is None or extra < best[0]):
+                            best = (extra, b, grown)
+                if best is not None:
+                    extra, b, grown = best
+                    runs[a], runs[b] = shrunk, grown
+                    costs[a] -= gain
+                    costs[b] += extra
+                    improved = True
+                    break
+            if improved:
+                break
+    return [run for run in runs if run]
+
+
+def optimize(
+    problem: RouteProblem,
+    days: int = 1,
+    seed: int = 0,
+    anneal_iterations: int = 0,
+    time_limit=None,
+):
+    """
+    Returns:
+        {"cost": ..., "days": [{"path", "travel", "arrivals", "finish",
+        "lateness", "overtime"}, ...]}; days with no stops are dropped
+    """
+    if days <= 1:
+        runs = [
+            solve_day(problem, problem.customers, seed, anneal_iterations, time_limit)
+        ]
+    else:
+        # One travel-only tour over everything, cut into days, then repaired
+        # against the windows and the day limit
+        travel_only = RouteProblem(
+            problem.matrix, start=problem.start, end=problem.end
+        )
+        order = solve_day(
+            travel_only, problem.customers, seed, anneal_iterations, time_limit
+        )
+        runs = [
+            local_search(problem, run)
+            for run in split_days(problem, order, days)
+            if run
+        ]
+        runs = [local_search(problem, run) for run in relocate_between_days(problem, runs)]
+
+    result_days = []
+    total = 0.0
+    for stops in runs:
+        path = problem.path(stops)
+        travel, arrivals, finish, lateness, overtime = problem.schedule(path)
+        total += problem.cost(path)
+        result_days.append(
+            {
+                "path": path,
+                "travel": travel,
+                "arrivals": arrivals,
+                "finish": finish,
+                "lateness": lateness,
+                "overtime": overtime,
+            }
+        )
+    return {"cost": total, "days": result_days}
@@ -0,0 +1,349 @@
+"""
+Pluggable routing backends with an OSRM-compatible interface.
+
+    ROUTING_BACKEND     osrm (HTTP, default) or local (in-process road graphs)
+    OSRM_URL            Base URL of the OSRM server for the osrm backend
+    OSRM_TIMEOUT        Request timeout in seconds
+    ROUTING_GRAPH_DIR   Directory of *.graph files for the local backend
+
+Both backends return OSRM /trip and /route response dictionaries, so
+callers parse a single format. Graph files are built with
+``python -m app.services.road_graph build``.
+"""
+
+import glob
+import os
+import threading
+
+import polyline
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .road_graph import RoadGraph
+from .route_optimizer import RouteProblem, optimize
+
+ROUTING_BACKEND = os.getenv("ROUTING_BACKEND", "osrm")
+OSRM_URL = os.getenv("OSRM_URL", "https://router.project-osrm.org")
+OSRM_TIMEOUT = float(os.getenv("OSRM_TIMEOUT", "30"))
+ROUTING_GRAPH_DIR = os.getenv("ROUTING_GRAPH_DIR", os.path.join("app", "graphs"))
+
+# Points further than this from any road are rejected like OSRM's NoSegment
+MAX_SNAP_DISTANCE_M = 2000
+# Coordinates per /table request (the public OSRM server allows 100)
+OSRM_TABLE_CHUNK = 50
+
+
+class RoutingError(Exception):
+    pass
+
+
+class OsrmHttpBackend:
+    """OSRM HTTP API over a pooled keep-alive session"""
+
+    def __init__(self, base_url: str = OSRM_URL, timeout: float = OSRM_TIMEOUT):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=16,
+            max_retries=Retry(
+                total=2, backoff_factor=0.3, status_forcelist=(502, 503, 504)
+            ),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def point_keys(self, points):
+        # OSRM snaps server-side; ~1 m rounding merges repeated lookups
+        return [f"{point['lat']:.5f},{point['lon']:.5f}" for point in points]
+
+    def _get(self, service: str, points, params: dict):
+        coords = ";".join(f"{point['lon']},{point['lat']}" for point in points)
+        r = self.session.get(
+            f"{self.base_url}/{service}/v1/driving/{coords}",
+            params=params,
+            timeout=self.timeout,
+        )
+        r.raise_for_status()
+        return r.json()
+
+    def trip(self, points, source: str = "first", roundtrip: bool = False):
+        return self._get(
+            "trip",
+            points,
+            {
+                "overview": "full",
+                "steps": "true",
+                "source": source,
+                "roundtrip": str(roundtrip).lower(),
+            },
+        )
+
+    def route(self, points):
+        return self._get("route", points, {"overview": "full", "steps": "true"})
+
+    def table(self, sources, destinations):
+        """Many-to-many durations (s) and distances (m), in chunked requests"""
+        durations = [[None] * len(destinations) for _ in sources]
+        distances = [[None] * len(destinations) for _ in sources]
+        for s0 in range(0, len(sources), OSRM_TABLE_CHUNK):
+            src = sources[s0 : s0 + OSRM_TABLE_CHUNK]
+            for d0 in range(0, len(destinations), OSRM_TABLE_CHUNK):
+                dst = destinations[d0 : d0 + OSRM_TABLE_CHUNK]
+                data = self._get(
+                    "table",
+                    src + dst,
+                    {
+                        "sources": ";".join(str(i) for i in range(len(src))),
+                        "destinations": ";".join(
+                            str(len(src) + j) for j in range(len(dst))
+                        ),
+                        "annotations": "duration,distance",
+                    },
+                )
+                if data.get("code") != "Ok":
+                    raise RoutingError(data.get("message") or data.get("code"))
+                for i, row in enumerate(data["durations"]):
+                    durations[s0 + i][d0 : d0 + len(dst)] = row
+                for i, row in enumerate(data["distances"]):
+                    distances[s0 + i][d0 : d0 + len(dst)] = row
+        return {"code": "Ok", "durations": durations, "distances": distances}
+
+
+def _modifier(bearing_before: float, bearing_after: float) -> str:
+    turn = (bearing_after - bearing_before + 540) % 360 - 180
+    magnitude = abs(turn)
+    if magnitude < 20:
+        return "straight"
+    if magnitude > 170:
+        return "uturn"
+    side = "right" if turn > 0 else "left"
+    if magnitude < 60:
+        return f"slight {side}"
+    if magnitude < 130:
+        return side
+    return f"sharp {side}"
+
+
+class LocalGraphBackend:
+    """
+    In-process router over the road graphs in ROUTING_GRAPH_DIR.
+
+    Each request is answered from the one graph whose bounding box holds all
+    of its points. Trip ordering runs one Dijkstra per waypoint for the
+    duration matrix and orders it with route_optimizer, first point fixed;
+    legs for /route use A*.
+    """
+
+    def __init__(self, graph_dir: str = ROUTING_GRAPH_DIR):
+        self.graph_dir = graph_dir
+        self._graphs = None
+        self._lock = threading.Lock()
+
+    @property
+    def graphs(self):
+        """
+        Loaded graphs keyed by file name and build time, so node ids from
+        a rebuilt graph never collide with ones from the previous build
+        """
+        if self._graphs is None:
+            with self._lock:
+                if self._graphs is None:
+                    graphs = {}
+                    for path in sorted(glob.glob(os.path.join(self.graph_dir, "*.graph"))):
+                        name = os.path.splitext(os.path.basename(path))[0]
+                        graphs[f"{name}@{int(os.path.getmtime(path))}"] = RoadGraph.load(path)
+                    self._graphs = graphs
+        return self._graphs
+
+    def _graph_entry(self, points):
+        for name, graph in self.graphs.items():
+            if all(graph.contains(p["lat"], p["lon"]) for p in points):
+                return name, graph
+        raise RoutingError("No road graph covers these points")
+
+    def _graph_for(self, points):
+        return self._graph_entry(points)[1]
+
+    def point_keys(self, points):
+        name, graph = self._graph_entry(points)
+        return [f"{name}:{node}" for node in self._snap(graph, points)]
+
+    def _snap(self, graph, points):
+        nodes = []
+        for point in points:
+            snapped = graph.snap(point["lat"], point["lon"])
+            if snapped is None or snapped[1] > MAX_SNAP_DISTANCE_M:
+                raise RoutingError(
+                    f"Could not find a road near {point['lat']},{point['lon']}"
+                )
+            nodes.append(snapped[0])
+        return nodes
+
+    def _waypoint(self, graph, node, **extra):
+        return {
+            "location": [graph.lon[node], graph.lat[node]],
+            "name": "",
+            **extra,
+        }
+
+    def _leg(self, graph, edges):
+        """Group a path into OSRM steps, one per run of the same road name"""
+        steps = []
+        run = []
+
+        def flush(maneuver_type):
+            first = graph.edge_source(run[0])
+            coords = [(graph.lat[first], graph.lon[first])]
+            coords.extend((graph.lat[graph.targets[e]], graph.lon[graph.targets[e]]) for e in run)
+            bearing_after = graph.bearing(first, graph.targets[run[0]])
+            maneuver = {
+                "type": maneuver_type,
+                "location": [graph.lon[first], graph.lat[first]],
+                "bearing_after": round(bearing_after),
+            }
+            if steps:
+                prev = steps[-1]["_last_edge"]
+                bearing_before = graph.bearing(graph.edge_source(prev), first)
+                maneuver["bearing_before"] = round(bearing_before)
+                maneuver["modifier"] = _modifier(bearing_before, bearing_after)
+            steps.append(
+                {
+                    "geometry": polyline.encode(coords),
+                    "distance": sum(graph.distances[e] for e in run),
+                    "duration": sum(graph.durations[e] for e in run),
+                    "name": graph.names[graph.name_ids[run[0]]],
+                    "maneuver": maneuver,
+                    "_last_edge": run[-1],
+                }
+            )
+
+        for edge in edges:
+            if run and graph.name_ids[edge] != graph.name_ids[run[-1]]:
+                flush("depart" if not steps else "turn")
+                run = []
+            run.append(edge)
+        if run:
+            flush("depart" if not steps else "turn")
+
+        if edges:
+            end = graph.targets[edges[-1]]
+            last = steps[-1]["_last_edge"]
+            steps.append(
+                {
+                    "geometry": polyline.encode([(graph.lat[end], graph.lon[end])] * 2),
+                    "distance": 0,
+                    "duration": 0,
+                    "name": steps[-1]["name"],
+                    "maneuver": {
+                        "type": "arrive",
+                        "location": [graph.lon[end], graph.lat[end]],
+                        "bearing_before": round(graph.bearing(graph.edge_source(last), end)),
+                        "bearing_after": 0,
+                    },
+                }
+            )
+        for step in steps:
+            step.pop("_last_edge", None)
+            if step["maneuver"]["type"] == "turn" and step["maneuver"]["modifier"] == "straight":
+                step["maneuver"]["type"] = "new name"
+        return {
+            "steps": steps,
+            "distance": sum(s["distance"] for s in steps),
+            "duration": sum(s["duration"] for s in steps),
+            "summary": "",
+        }
+
+    def _assemble(self, graph, paths):
+        legs = [self._leg(graph, edges) for edges in paths]
+        coords = []
+        for edges in paths:
+            for edge in edges:
+                if not coords:
+                    source = graph.edge_source(edge)
+                    coords.append((graph.lat[source], graph.lon[source]))
+                target = graph.targets[edge]
+                coords.append((graph.lat[target], graph.lon[target]))
+        return {
+            "legs": legs,
+            "distance": sum(leg["distance"] for leg in legs),
+            "duration": sum(leg["duration"] for leg in legs),
+            "weight": sum(leg["duration"] for leg in legs),
+            "weight_name": "duration",
+            "geometry": polyline.encode(coords) if coords else None,
+        }
+
+    def route(self, points):
+        graph = self._graph_for(points)
+        nodes = self._snap(graph, points)
+        paths = []
+        for a, b in zip(nodes, nodes[1:]):
+            edges = graph.shortest_path(a, b)
+            if edges is None:
+                raise RoutingError("No route found between waypoints")
+            paths.append(edges)
+        return {
+            "code": "Ok",
+            "routes": [self._assemble(graph, paths)],
+            "waypoints": [self._waypoint(graph, n) for n in nodes],
+        }
+
+    def trip(self, points, source: str = "first", roundtrip: bool = False):
+        graph = self._graph_for(points)
+        nodes = self._snap(graph, points)
+        searches = []
+        matrix = []
+        for node in nodes:
+            durations, search = graph.search_from(node, nodes)
+            searches.append(search)
+            matrix.append([durations.get(other) for other in nodes])
+
+        problem = RouteProblem(matrix, start=0, end=0 if roundtrip else None)
+        order = optimize(problem)["days"][0]["path"]
+        paths = []
+        for i, j in zip(order, order[1:]):
+            edges = graph.path_to(searches[i], nodes[j])
+            if edges is None:
+                raise RoutingError("No route found between waypoints")
+            paths.append(edges)
+
+        position = {point: pos for pos, point in enumerate(order[: len(nodes)])}
+        return {
+            "code": "Ok",
+            "trips": [self._assemble(graph, paths)],
+            "waypoints": [
+                self._waypoint(graph, node, waypoint_index=position[i], trips_index=0)
+                for i, node in enumerate(nodes)
+            ],
+        }
+
+    def table(self, sources, destinations):
+        graph = self._graph_for(sources + destinations)
+        source_nodes = self._snap(graph, sources)
+        target_nodes = self._snap(graph, destinations)
+        durations = []
+        distances = []
+        for node in source_nodes:
+            reached, search = graph.search_from(node, target_nodes)
+            durations.append([reached.get(t) for t in target_nodes])
+            row = []
+            for t in target_nodes:
+                edges = graph.path_to(search, t)
+                row.append(None if edges is None else sum(graph.distances[e] for e in edges))
+            distances.append(row)
+        return {"code": "Ok", "durations": durations, "distances": distances}
+
+
+_backend = None
+
+
+def get_routing_backend():
+    global _backend
+    if _backend is None:
+        if ROUTING_BACKEND == "local":
+            _backend = LocalGraphBackend()
+        else:
+            _backend = OsrmHttpBackend()
+    return _backend
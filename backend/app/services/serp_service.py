@@ -1,9 +1,9 @@
-import requests
+from .. import http_client
 
 SERPAPI_URL = "https://serpapi.com/search.json"
 
 
-def search_google_maps(query: str, ll: str, api_key: str):
+async def search_google_maps(query: str, ll: str, api_key: str):
     try:
         params = {
             "engine": "google_maps",
@@ -12,7 +12,7 @@ def search_google_maps(query: str, ll: str, api_key: str):
             "type": "search",
             "api_key": api_key,
         }
-        response = requests.get(SERPAPI_URL, params=params)
+        response = await http_client.get(SERPAPI_URL, params=params, timeout=30)
         response.raise_for_status()
         data = response.json()
         return data.get("local_results", [])
@@ -0,0 +1,116 @@
+"""
+Translation memory seeded from the bilingual columns of the places catalogue:
+type_stats.type_id_en/type_id_vi, places.best_type_id_en/best_type_id_vi,
+places.en_names/vi_names and places.place_detail_en/place_detail_vi.
+
+Paired values are walked in parallel (list items by position, dict values by
+key) and every pair of differing strings is remembered in both directions.
+The index is rebuilt whenever the catalogue file changes.
+"""
+
+import json
+import logging
+import re
+import threading
+import unicodedata
+
+from sqlalchemy import text
+
+from ..place_migrations import table_columns, table_exists
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+# (table, english column, vietnamese column)
+SEED_COLUMNS = [
+    ("type_stats", "type_id_en", "type_id_vi"),
+    ("places", "best_type_id_en", "best_type_id_vi"),
+    ("places", "en_names", "vi_names"),
+    ("places", "place_detail_en", "place_detail_vi"),
+]
+
+
+def normalize_text(value: str) -> str:
+    """Key form of a string: NFC, whitespace collapsed; case is kept"""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", value)).strip()
+
+
+def _decode(value):
+    if isinstance(value, str) and value[:1] in ("[", "{"):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _pairs(en, vi):
+    if isinstance(en, str) and isinstance(vi, str):
+        yield en, vi
+    elif isinstance(en, list) and isinstance(vi, list):
+        for a, b in zip(en, vi):
+            yield from _pairs(a, b)
+    elif isinstance(en, dict) and isinstance(vi, dict):
+        for key in en.keys() & vi.keys():
+            yield from _pairs(en[key], vi[key])
+
+
+class TranslationMemory:
+    def __init__(self, engine, version=None):
+        """
+        Args:
+            engine: Engine for the places catalogue
+            version: Callable returning a value that changes with the data
+        """
+        self.engine = engine
+        self.version = version
+        self._loaded_version = None
+        self._entries = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        entries = {}
+        with self.engine.connect() as conn:
+            for table, en_column, vi_column in SEED_COLUMNS:
+                # Older catalogue snapshots predate the bilingual columns
+                if not table_exists(conn, table):
+                    continue
+                columns = table_columns(conn, table)
+                if en_column not in columns or vi_column not in columns:
+                    continue
+                rows = conn.execute(
+                    text(
+                        f"SELECT DISTINCT {en_column}, {vi_column} FROM {table}"
+                        f" WHERE {en_column} IS NOT NULL AND {vi_column} IS NOT NULL"
+                    )
+                )
+                for en, vi in rows:
+                    for en_text, vi_text in _pairs(_decode(en), _decode(vi)):
+                        en_text = normalize_text(en_text)
+                        vi_text = normalize_text(vi_text)
+                        # Equal values are untranslated fallbacks, not pairs
+                        if en_text and vi_text and en_text != vi_text:
+                            entries.setdefault(("en", "vi", en_text), vi_text)
+                            entries.setdefault(("vi", "en", vi_text), en_text)
+        return entries
+
+    def _ensure_loaded(self):
+        version = self.version() if self.version else None
+        if self._entries is not None and version == self._loaded_version:
+            return
+        with self._lock:
+            if self._entries is None or version != self._loaded_version:
+                self._entries = self._load()
+                self._loaded_version = version
+                logger.info("Translation memory seeded with %d entries", len(self._entries))
+
+    def lookup_many(self, src: str, dest: str, texts):
+        """{text: translation} for the normalised texts the catalogue knows"""
+        self._ensure_loaded()
+        found = {}
+        for value in texts:
+            translation = self._entries.get((src, dest, value))
+            if translation is not None:
+                found[value] = translation
+        return found
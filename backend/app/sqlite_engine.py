@@ -0,0 +1,57 @@
+"""
+Engine factory for the SQLite databases.
+
+Every new DBAPI connection gets the tuning PRAGMAs below. Defaults can be
+overridden through the environment:
+
+    SQLITE_JOURNAL_MODE     WAL
+    SQLITE_SYNCHRONOUS      NORMAL
+    SQLITE_MMAP_SIZE        268435456 (bytes)
+    SQLITE_CACHE_SIZE       -65536 (negative = KiB, i.e. 64 MiB per connection)
+    SQLITE_TEMP_STORE       MEMORY
+    SQLITE_BUSY_TIMEOUT_MS  5000
+"""
+
+import os
+from sqlalchemy import create_engine, event
+
+
+def _setting(name: str, default: str) -> str:
+    return os.getenv(f"SQLITE_{name}", default)
+
+
+def create_sqlite_engine(path: str, read_only: bool = False, immutable: bool = False):
+    """
+    Create an engine for a database file with the tuning PRAGMAs applied.
+
+    Args:
+        path: Database file path, relative to the working directory
+        read_only: Open with mode=ro; writes fail instead of taking locks
+        immutable: Also promise SQLite the file never changes, which skips
+            locking and change detection entirely (implies read_only)
+    """
+    if read_only or immutable:
+        query = "mode=ro&immutable=1" if immutable else "mode=ro"
+        engine = create_engine(f"sqlite:///file:{path}?{query}&uri=true")
+    else:
+        engine = create_engine(f"sqlite:///{path}")
+
+    pragmas = {
+        "mmap_size": _setting("MMAP_SIZE", "268435456"),
+        "cache_size": _setting("CACHE_SIZE", "-65536"),
+        "temp_store": _setting("TEMP_STORE", "MEMORY"),
+        "busy_timeout": _setting("BUSY_TIMEOUT_MS", "5000"),
+    }
+    if not (read_only or immutable):
+        # Journal settings only matter to writers
+        pragmas["journal_mode"] = _setting("JOURNAL_MODE", "WAL")
+        pragmas["synchronous"] = _setting("SYNCHRONOUS", "NORMAL")
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    return engine
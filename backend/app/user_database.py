@@ -1,11 +1,12 @@
 # database.py
-from sqlalchemy import create_engine, MetaData
+from sqlalchemy import MetaData
 from sqlalchemy.orm import sessionmaker
 from .user_models import UserBase
+from .sqlite_engine import create_sqlite_engine
 
-DATABASE_URL = "sqlite:///app/user.db"
+DATABASE_PATH = "app/user.db"
 
-engine = create_engine(DATABASE_URL)
+engine = create_sqlite_engine(DATABASE_PATH)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 metadata = MetaData()
 
@@ -19,3 +20,7 @@ def get_db():
 
 
 UserBase.metadata.create_all(bind=engine)
+# create_all() skips tables that already exist, so add indexes declared since
+for table in UserBase.metadata.sorted_tables:
+    for index in table.indexes:
+        index.create(bind=engine, checkfirst=True)
@@ -7,6 +7,7 @@ from sqlalchemy import (
     Float,
     DateTime,
     ForeignKey,
+    Index,
     Text,
 )
 from sqlalchemy.orm import relationship
@@ -149,3 +150,8 @@ class FoursquarePlace(UserBase):
 
     # Relationship - destinations can reference this place
     destinations = relationship("Destination", back_populates="foursquare_place")
+
+    # Bounding-box range scans for proximity search
+    __table_args__ = (
+        Index("ix_foursquare_places_lat_lng", "latitude", "longitude"),
+    )
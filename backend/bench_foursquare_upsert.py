@@ -0,0 +1,106 @@
+"""
+Benchmark: per-result save (SELECT + commit + refresh each) vs. the bulk
+ON CONFLICT upsert used by POST /api/foursquare/search.
+Runs against a throwaway database with the user.db schema and its PRAGMAs.
+Usage: python bench_foursquare_upsert.py [results_per_search] [searches]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy.orm import sessionmaker
+
+from app.routers.foursquare_router import determine_place_type, save_search_results
+from app.sqlite_engine import create_sqlite_engine
+from app.user_models import FoursquarePlace, UserBase
+
+RESULTS = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+SEARCHES = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+
+def fake_results(search):
+    return [
+        {
+            "fsq_place_id": f"fsq{search % 4}-{i}",
+            "name": f"Place {i}",
+            "latitude": 10.77 + i * 1e-3,
+            "longitude": 106.70 + i * 1e-3,
+            "location": {"formatted_address": f"{i} Le Loi, District 1"},
+            "categories": [{"fsq_category_id": "4bf58dd8d48988d1c4941735", "name": "Restaurant"}],
+            "hours": {"display": "Mon-Sun 07:00-22:00", "open_now": True},
+            "photos": [{"prefix": "https://example.com/", "suffix": f"/{i}.jpg"}] * 3,
+            "tel": "+84 28 0000 0000",
+            "rating": 8.1,
+        }
+        for i in range(RESULTS)
+    ]
+
+
+def legacy_save(results, place_type, db):
+    # The per-result loop previously in routers/foursquare_router.py
+    saved = []
+    for place_data in results:
+        final_type = determine_place_type(place_data.get("categories", [])) or place_type
+        existing = (
+            db.query(FoursquarePlace)
+            .filter(FoursquarePlace.fsq_place_id == place_data["fsq_place_id"])
+            .first()
+        )
+        location = place_data.get("location", {})
+        values = {
+            "fsq_place_id": place_data["fsq_place_id"],
+            "place_type": final_type,
+            "name": place_data.get("name"),
+            "address": location.get("formatted_address") or location.get("address"),
+            "latitude": place_data.get("latitude"),
+            "longitude": place_data.get("longitude"),
+            "rating": place_data.get("rating"),
+            "price_level": place_data.get("price"),
+            "phone": place_data.get("tel"),
+            "website": place_data.get("website"),
+            "description": place_data.get("description"),
+            "hours": json.dumps(place_data["hours"]) if place_data.get("hours") else None,
+            "categories": (
+                json.dumps(place_data["categories"]) if place_data.get("categories") else None
+            ),
+            "photos": json.dumps(place_data["photos"]) if place_data.get("photos") else None,
+            "cached_at": datetime.utcnow(),
+        }
+        if existing:
+            for key, value in values.items():
+                setattr(existing, key, value)
+            place = existing
+        else:
+            place = FoursquarePlace(**values)
+            db.add(place)
+        db.commit()
+        db.refresh(place)
+        saved.append(place)
+    return saved
+
+
+def run(name, save):
+    path = os.path.join(tempfile.mkdtemp(), "user.db")
+    engine = create_sqlite_engine(path)
+    UserBase.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    timings = []
+    for search in range(SEARCHES):
+        results = fake_results(search)
+        with Session() as db:
+            started = time.perf_counter()
+            saved = save(results, "eat", db)
+            timings.append(time.perf_counter() - started)
+            assert [p.fsq_place_id for p in saved] == [r["fsq_place_id"] for r in results]
+    engine.dispose()
+    timings.sort()
+    print(f"{name:<22} median {timings[len(timings) // 2] * 1000:7.1f} ms  "
+          f"max {timings[-1] * 1000:7.1f} ms per {RESULTS}-result search")
+
+
+print(f"{SEARCHES} searches of {RESULTS} results (first 4 insert, the rest update)")
+run("per-result commits", legacy_save)
+run("bulk upsert", lambda results, place_type, db: save_search_results(results, place_type, db))
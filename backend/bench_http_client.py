@@ -0,0 +1,130 @@
+"""
+Benchmark: blocking requests.get per call in a thread pool (the old service
+code under FastAPI's threadpool) vs. the shared async client.
+Runs a local upstream that answers after a fixed delay, so the numbers show
+connection handling and concurrency, not a remote API. With --tls it serves
+HTTPS from a throwaway self-signed certificate, like the real upstreams.
+Usage: python bench_http_client.py [requests] [delay_ms] [--tls]
+       e.g. python bench_http_client.py 200 20 --tls
+"""
+import asyncio
+import multiprocessing
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import uvicorn
+
+from app import http_client
+
+ARGS = [a for a in sys.argv[1:] if not a.startswith("--")]
+TOTAL = int(ARGS[0]) if len(ARGS) > 0 else 200
+DELAY = (int(ARGS[1]) if len(ARGS) > 1 else 20) / 1000
+TLS = "--tls" in sys.argv
+THREADPOOL_SIZE = 40  # AnyIO's default thread limiter for sync endpoints
+
+
+async def upstream(scope, receive, send):
+    if scope["type"] != "http":
+        return
+    await asyncio.sleep(DELAY)
+    await send({"type": "http.response.start", "status": 200,
+                "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": b'{"ok": true}'})
+
+
+def serve(sock, certfile, keyfile):
+    config = uvicorn.Config(
+        upstream,
+        log_level="warning",
+        backlog=4096,
+        ssl_certfile=certfile,
+        ssl_keyfile=keyfile,
+    )
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def self_signed_cert():
+    directory = tempfile.mkdtemp()
+    certfile = os.path.join(directory, "cert.pem")
+    keyfile = os.path.join(directory, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1",
+         "-keyout", keyfile, "-out", certfile],
+        check=True,
+        capture_output=True,
+    )
+    # Trusted by both clients: requests reads REQUESTS_CA_BUNDLE, httpx SSL_CERT_FILE
+    os.environ["REQUESTS_CA_BUNDLE"] = os.environ["SSL_CERT_FILE"] = certfile
+    return certfile, keyfile
+
+
+def start_upstream():
+    # Separate process, so the upstream does not compete for the GIL
+    sock = socket.socket()
+    # Accepted sockets inherit this; without it Nagle and delayed ACKs add
+    # ~40 ms to every response on a kept-alive connection
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    certfile, keyfile = self_signed_cert() if TLS else (None, None)
+    multiprocessing.Process(target=serve, args=(sock, certfile, keyfile), daemon=True).start()
+    url = f"{'https' if TLS else 'http'}://127.0.0.1:{port}/"
+    for _ in range(500):
+        try:
+            requests.get(url, timeout=1)
+            return url
+        except (requests.ConnectionError, requests.exceptions.SSLError):
+            time.sleep(0.01)
+    raise RuntimeError("mock upstream did not start")
+
+
+def report(name, elapsed, latencies):
+    latencies = sorted(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{name:<28} {TOTAL / elapsed:8.0f} req/s  "
+          f"p50 {statistics.median(latencies) * 1000:6.1f} ms  p99 {p99 * 1000:6.1f} ms")
+
+
+# Latency runs from submission, so time spent queued for a worker or a
+# per-host slot counts in both runs
+
+
+def run_blocking(url):
+    def call(_):
+        requests.get(url, timeout=10).json()
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(THREADPOOL_SIZE) as pool:
+        latencies = list(pool.map(call, range(TOTAL)))
+    report("requests.get, 40 threads", time.perf_counter() - started, latencies)
+
+
+async def run_async(url):
+    async def call():
+        (await http_client.get(url)).json()
+        return time.perf_counter() - started
+
+    await http_client.start()
+    await http_client.get(url)  # open the pool outside the measurement
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(call() for _ in range(TOTAL)))
+    report("shared httpx.AsyncClient", time.perf_counter() - started, latencies)
+    await http_client.close()
+
+
+if __name__ == "__main__":
+    url = start_upstream()
+    print(f"{TOTAL} concurrent requests over {url.split(':')[0].upper()}, "
+          f"upstream delay {DELAY * 1000:.0f} ms, "
+          f"{http_client.HTTP_PER_HOST_CONNECTIONS} per-host slots")
+    run_blocking(url)
+    asyncio.run(run_async(url))
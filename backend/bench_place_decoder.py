@@ -0,0 +1,64 @@
+"""
+Micro-benchmark: per-row column loop vs. compiled PLACE_DECODER
+Usage: python bench_place_decoder.py [path/to/places.db] [repeat]
+"""
+import json
+import os
+import sqlite3
+import sys
+import time
+
+from sqlalchemy.types import JSON, Float, Integer
+
+from app.place_models import Place
+from app.place_rows import PLACE_DECODER
+
+DB_PATH = sys.argv[1] if len(sys.argv) > 1 else os.path.join("app", "merged4.db")
+REPEAT = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+
+def legacy_decode(row, columns):
+    # The loop previously inlined in routers/places.py and groq_service.row_to_dict
+    model_columns = [col.name for col in Place.__table__.columns if col.name in columns]
+    types = {col.name: col.type for col in Place.__table__.columns}
+    place = {}
+    for idx, col in enumerate(model_columns):
+        value = row[idx]
+        col_type = types[col]
+        if isinstance(col_type, JSON):
+            try:
+                value = json.loads(value) if value is not None else None
+            except Exception:
+                pass
+        elif isinstance(col_type, Float):
+            value = float(value) if value is not None else None
+        elif isinstance(col_type, Integer):
+            value = int(value) if value is not None else None
+        place[col] = value
+    return place
+
+
+def measure(label, decode, rows):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        for row in rows:
+            decode(row)
+    elapsed = time.perf_counter() - start
+    rate = len(rows) * REPEAT / elapsed
+    print(f"{label:<28} {rate:>12,.0f} rows/sec")
+    return rate
+
+
+conn = sqlite3.connect(DB_PATH)
+# Older snapshots lack some model columns, so benchmark the shared subset
+present = {row[1] for row in conn.execute("PRAGMA table_info(places)")}
+columns = [col.name for col in Place.__table__.columns if col.name in present]
+rows = conn.execute(f"SELECT {', '.join(columns)} FROM places").fetchall()
+print(f"{DB_PATH}: {len(rows)} rows x {len(columns)} columns, {REPEAT} passes")
+
+decoder = PLACE_DECODER.project(columns)
+assert decoder(rows[0]) == legacy_decode(rows[0], set(columns))
+
+before = measure("per-row column loop", lambda r: legacy_decode(r, present), rows)
+after = measure("compiled PLACE_DECODER", decoder, rows)
+print(f"speedup: {after / before:.1f}x")
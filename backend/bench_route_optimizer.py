@@ -0,0 +1,83 @@
+"""
+Benchmark: in-process route optimiser vs. the nearest-neighbour order it
+replaced and, with the osrm backend, OSRM's /trip order. All orders are
+scored on the same duration matrix (first stop fixed, open end). The local
+backend's /trip runs this optimiser itself, so it is not a baseline there.
+Uses the backend selected by ROUTING_BACKEND / OSRM_URL / ROUTING_GRAPH_DIR.
+Usage: python bench_route_optimizer.py [path/to/places.db] [sizes] [seed]
+       e.g. python bench_route_optimizer.py app/merged4.db 10,25,50,100 7
+"""
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+
+from app.services.route_optimizer import RouteProblem, nearest_neighbour, optimize
+from app.services.routing_service import OsrmHttpBackend, get_routing_backend
+
+DB_PATH = sys.argv[1] if len(sys.argv) > 1 else os.path.join("app", "merged4.db")
+SIZES = [int(n) for n in (sys.argv[2] if len(sys.argv) > 2 else "10,25,50").split(",")]
+SEED = int(sys.argv[3]) if len(sys.argv) > 3 else 7
+ANNEAL_ITERATIONS = 20000
+
+
+def load_points():
+    conn = sqlite3.connect(DB_PATH)
+    points = []
+    for (gps,) in conn.execute(
+        "SELECT gps_coordinates FROM places WHERE gps_coordinates IS NOT NULL"
+    ):
+        try:
+            gps = json.loads(gps)
+            points.append({"lat": gps["latitude"], "lon": gps["longitude"]})
+        except (TypeError, ValueError, KeyError):
+            continue
+    conn.close()
+    return points
+
+
+def trip_order(data):
+    waypoints = data["waypoints"]
+    return [i for i, _ in sorted(enumerate(waypoints), key=lambda x: x[1]["waypoint_index"])]
+
+
+backend = get_routing_backend()
+all_points = load_points()
+rng = random.Random(SEED)
+print(f"{type(backend).__name__}, {len(all_points)} candidate points")
+print(f"{'n':>4} {'matrix s':>9} {'NN cost':>10} {'trip cost':>10} {'trip s':>7} "
+      f"{'native cost':>12} {'native s':>9} {'+SA cost':>9} {'+SA s':>7}")
+
+for n in SIZES:
+    points = rng.sample(all_points, n)
+
+    started = time.perf_counter()
+    matrix = backend.table(points, points)["durations"]
+    matrix_s = time.perf_counter() - started
+    problem = RouteProblem(matrix, start=0)
+    nn_cost = problem.cost(problem.path(nearest_neighbour(problem, problem.customers)))
+
+    trip_cost, trip_s = f"{'-':>10}", f"{'-':>7}"
+    if isinstance(backend, OsrmHttpBackend):
+        try:
+            started = time.perf_counter()
+            data = backend.trip(points, source="first", roundtrip=False)
+            trip_s = f"{time.perf_counter() - started:7.2f}"
+            trip_cost = f"{problem.cost(trip_order(data)):10.0f}"
+        except Exception as e:
+            # The public OSRM server rejects trips over its coordinate limit
+            trip_cost = f"{'error':>10}"
+            print(f"     trip failed: {e}")
+
+    started = time.perf_counter()
+    native = optimize(problem, seed=SEED)
+    native_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    annealed = optimize(problem, seed=SEED, anneal_iterations=ANNEAL_ITERATIONS)
+    annealed_s = time.perf_counter() - started
+
+    print(f"{n:>4} {matrix_s:9.2f} {nn_cost:10.0f} {trip_cost} {trip_s} "
+          f"{native['cost']:12.0f} {native_s:9.3f} {annealed['cost']:9.0f} {annealed_s:7.2f}")
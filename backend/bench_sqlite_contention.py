@@ -0,0 +1,149 @@
+"""
+Load benchmark: place/trip reads while trips are being written.
+Compares the default create_engine() setup with create_sqlite_engine().
+Usage: python bench_sqlite_contention.py [path/to/places.db] [seconds]
+"""
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.sqlite_engine import create_sqlite_engine
+from app.user_models import UserBase, User, Trip, Day, Destination
+
+PLACES_DB = sys.argv[1] if len(sys.argv) > 1 else os.path.join("app", "merged4.db")
+DURATION = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+WRITERS = 4
+READERS = 8
+
+
+def write_trips(Session, user_id, stop, stats):
+    while not stop.is_set():
+        db = Session()
+        start = time.perf_counter()
+        try:
+            trip = Trip(name="bench", user_id=user_id)
+            for day_number in range(1, 4):
+                day = Day(day_number=day_number)
+                day.destinations = [
+                    Destination(name=f"stop {i}", latitude=10.7, longitude=106.6)
+                    for i in range(4)
+                ]
+                trip.days.append(day)
+            db.add(trip)
+            db.commit()
+            stats["writes"].append(time.perf_counter() - start)
+        except OperationalError:
+            db.rollback()
+            stats["write_errors"] += 1
+        finally:
+            db.close()
+
+
+def read_mixed(place_engine, user_engine, place_ids, user_id, stop, stats):
+    while not stop.is_set():
+        start = time.perf_counter()
+        with place_engine.connect() as conn:
+            conn.execute(
+                text("SELECT * FROM places WHERE place_id = :id"),
+                {"id": random.choice(place_ids)},
+            ).fetchall()
+        stats["place_reads"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        try:
+            with user_engine.connect() as conn:
+                conn.execute(
+                    text(
+                        "SELECT trips.id, count(destinations.id) FROM trips"
+                        " JOIN days ON days.trip_id = trips.id"
+                        " JOIN destinations ON destinations.day_id = days.id"
+                        " WHERE trips.user_id = :uid"
+                        " GROUP BY trips.id ORDER BY trips.id DESC LIMIT 20"
+                    ),
+                    {"uid": user_id},
+                ).fetchall()
+            stats["trip_reads"].append(time.perf_counter() - start)
+        except OperationalError:
+            stats["read_errors"] += 1
+
+
+def percentile(samples, pct):
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))] * 1000
+
+
+def run(label, make_engine, workdir):
+    places_path = os.path.join(workdir, f"{label}_places.db")
+    user_path = os.path.join(workdir, f"{label}_user.db")
+    shutil.copy(PLACES_DB, places_path)
+    place_engine = make_engine(places_path)
+    user_engine = make_engine(user_path)
+    UserBase.metadata.create_all(bind=user_engine)
+    Session = sessionmaker(bind=user_engine)
+    with Session() as db:
+        user = User(username="bench", email="bench@example.com")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+    with place_engine.connect() as conn:
+        place_ids = [r[0] for r in conn.execute(text("SELECT place_id FROM places"))]
+
+    stats = {
+        "writes": [],
+        "place_reads": [],
+        "trip_reads": [],
+        "write_errors": 0,
+        "read_errors": 0,
+    }
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=write_trips, args=(Session, user_id, stop, stats))
+        for _ in range(WRITERS)
+    ] + [
+        threading.Thread(
+            target=read_mixed,
+            args=(place_engine, user_engine, place_ids, user_id, stop, stats),
+        )
+        for _ in range(READERS)
+    ]
+    for t in threads:
+        t.start()
+    time.sleep(DURATION)
+    stop.set()
+    for t in threads:
+        t.join()
+    place_engine.dispose()
+    user_engine.dispose()
+
+    print(f"== {label}")
+    print(
+        f"  trip commits   {len(stats['writes']) / DURATION:>8.0f}/s"
+        f"  p99 {percentile(stats['writes'], 0.99):7.1f} ms"
+        f"  lock errors {stats['write_errors']}"
+    )
+    for key in ("place_reads", "trip_reads"):
+        samples = stats[key]
+        print(
+            f"  {key:<14} {len(samples) / DURATION:>8.0f}/s"
+            f"  p50 {percentile(samples, 0.5):7.2f} ms"
+            f"  p99 {percentile(samples, 0.99):7.2f} ms"
+        )
+    print(f"  trip read lock errors {stats['read_errors']}")
+
+
+workdir = tempfile.mkdtemp()
+try:
+    run("default", lambda path: create_engine(f"sqlite:///{path}"), workdir)
+    run("tuned", create_sqlite_engine, workdir)
+finally:
+    shutil.rmtree(workdir)
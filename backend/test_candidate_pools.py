@@ -0,0 +1,197 @@
+"""
+CandidatePools against a synthetic catalogue: pool order is checked against
+GET /api/places/search, plus the snapshot and rebuild paths.
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.place_database import get_read_db
+from app.place_migrations import upgrade_places_schema
+from app.place_models import Place, PlaceBase
+from app.routers import places as places_router
+from app.routers.places import router
+from app.services.candidate_pools import POOL_FIELDS, CandidatePools
+from app.sqlite_engine import create_sqlite_engine
+
+PLACE_COUNT = 3000
+POOL_SIZE = 20
+CITIES = {"HCMC, Vietnam": (10.7769, 106.7009), "Hue, Vietnam": (16.4637, 107.5909)}
+TYPES = [f"type_{i:02d}" for i in range(12)]
+
+
+def place_row(i, rng, city, poi_score=None):
+    lat, lon = CITIES[city]
+    latitude = lat + rng.uniform(-0.1, 0.1)
+    longitude = lon + rng.uniform(-0.1, 0.1)
+    return {
+        "id": i + 1,
+        "place_id": f"p{i:05d}",
+        "title": f"Place {i}",
+        "city_name": city,
+        "gps_coordinates": {"latitude": latitude, "longitude": longitude},
+        # Coarse values, so ties have to be broken by id as in the search
+        "POI_score": poi_score if poi_score is not None else rng.choice([None, 1.0, 2.0, 3.0]),
+        "rating": rng.choice([None, 4.0, 4.5]),
+        "type_ids": rng.sample(TYPES, rng.randint(0, 3)),
+    }
+
+
+def make_catalogue():
+    directory = tempfile.mkdtemp()
+    db_path = os.path.join(directory, "merged.db")
+    engine = create_sqlite_engine(db_path)
+    PlaceBase.metadata.create_all(bind=engine)
+    rng = random.Random(3)
+    places = [place_row(i, rng, rng.choice(list(CITIES))) for i in range(PLACE_COUNT)]
+    with engine.begin() as conn:
+        conn.execute(insert(Place.__table__), places)
+    upgrade_places_schema(engine)
+    return engine, db_path, os.path.join(directory, "pools.json")
+
+
+class CountingPools(CandidatePools):
+    builds = 0
+
+    def _build(self):
+        self.builds += 1
+        return super()._build()
+
+
+def search_ids(engine, city, type_id, limit):
+    app = FastAPI()
+    app.include_router(router)
+
+    def read_db():
+        db = Session(engine)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_read_db] = read_db
+    lat, lon = CITIES[city]
+    response = TestClient(app).get(
+        "/api/places/search",
+        params={
+            "type": type_id,
+            "south": lat - 1,
+            "north": lat + 1,
+            "west": lon - 1,
+            "east": lon + 1,
+            "limit": limit,
+            "fields": ",".join(POOL_FIELDS),
+        },
+    )
+    body = response.json()
+    assert body["status"] == "success", body
+    return body["places"]
+
+
+def test_pools_match_search_order():
+    engine, db_path, snapshot_path = make_catalogue()
+    pools = CandidatePools(engine, db_path, snapshot_path, POOL_SIZE)
+    for city in CITIES:
+        for type_id in TYPES:
+            expected = search_ids(engine, city, type_id, POOL_SIZE)
+            assert len(expected) == POOL_SIZE
+            assert pools.get(city, type_id) == expected
+    assert pools.get("Nowhere", TYPES[0]) == []
+    assert pools.get("HCMC, Vietnam", "unknown") == []
+    assert len(pools.get("HCMC, Vietnam", TYPES[0], limit=5)) == 5
+
+
+def test_snapshot_round_trip_and_rejection():
+    engine, db_path, snapshot_path = make_catalogue()
+    built = CountingPools(engine, db_path, snapshot_path, POOL_SIZE)
+    expected = built.get("Hue, Vietnam", TYPES[1])
+    assert built.builds == 1
+
+    loaded = CountingPools(engine, db_path, snapshot_path, POOL_SIZE)
+    assert loaded.get("Hue, Vietnam", TYPES[1]) == expected
+    assert loaded.builds == 0
+
+    # A different pool size never reuses the snapshot
+    resized = CountingPools(engine, db_path, snapshot_path, POOL_SIZE - 1)
+    assert resized.get("Hue, Vietnam", TYPES[1]) == expected[: POOL_SIZE - 1]
+    assert resized.builds == 1
+
+    for key, value in (("checksum", "0" * 64), ("fields", ["place_id"])):
+        CandidatePools(engine, db_path, snapshot_path, POOL_SIZE).refresh()
+        with open(snapshot_path, encoding="utf-8") as f:
+            data = json.load(f)
+        data[key] = value
+        with open(snapshot_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        pools = CountingPools(engine, db_path, snapshot_path, POOL_SIZE)
+        assert pools.get("Hue, Vietnam", TYPES[1]) == expected
+        assert pools.builds == 1, key
+
+
+def test_rebuild_after_catalogue_change():
+    engine, db_path, snapshot_path = make_catalogue()
+    pools = CountingPools(engine, db_path, snapshot_path, POOL_SIZE)
+    before = pools.get("HCMC, Vietnam", TYPES[2])
+
+    rng = random.Random(5)
+    newcomer = place_row(PLACE_COUNT, rng, "HCMC, Vietnam", poi_score=100.0)
+    newcomer["type_ids"] = [TYPES[2]]
+    with engine.begin() as conn:
+        conn.execute(insert(Place.__table__), [newcomer])
+    upgrade_places_schema(engine, rebuild=True)
+
+    # The change is picked up in the background; the old pool is served meanwhile
+    current = search_ids(engine, "HCMC, Vietnam", TYPES[2], POOL_SIZE)
+    assert pools.get("HCMC, Vietnam", TYPES[2]) in (before, current)
+    deadline = time.monotonic() + 30
+    while pools.builds < 2 or pools._refreshing:
+        assert time.monotonic() < deadline, "pools were not rebuilt"
+        time.sleep(0.01)
+    after = pools.get("HCMC, Vietnam", TYPES[2])
+    assert after == current
+    assert after[0]["place_id"] == newcomer["place_id"]
+    assert after[1:] == before[:-1]
+
+
+def test_pool_payload_follows_the_served_pools(monkeypatch):
+    engine, db_path, snapshot_path = make_catalogue()
+    pools = CountingPools(engine, db_path, snapshot_path, POOL_SIZE)
+    monkeypatch.setattr(places_router, "candidate_pools", pools)
+    monkeypatch.setattr(places_router.candidate_pool_memo, "version", pools.version)
+    places_router.candidate_pool_memo._entries.clear()
+
+    def payload():
+        body, etag = places_router._candidate_pool_payload("HCMC, Vietnam", TYPES[2], 5)
+        return json.loads(body), etag
+
+    before, before_etag = payload()
+    assert before["version"] == pools.checksum
+    assert payload()[1] == before_etag
+
+    rng = random.Random(6)
+    newcomer = place_row(PLACE_COUNT, rng, "HCMC, Vietnam", poi_score=100.0)
+    newcomer["type_ids"] = [TYPES[2]]
+    with engine.begin() as conn:
+        conn.execute(insert(Place.__table__), [newcomer])
+    upgrade_places_schema(engine, rebuild=True)
+
+    # Requests during the rebuild may get the old pool, but it is not kept
+    payload()
+    deadline = time.monotonic() + 30
+    while pools.builds < 2 or pools._refreshing:
+        assert time.monotonic() < deadline, "pools were not rebuilt"
+        time.sleep(0.01)
+    after, after_etag = payload()
+    assert after["version"] == pools.checksum != before["version"]
+    assert after["places"][0]["place_id"] == newcomer["place_id"]
+    assert after_etag != before_etag
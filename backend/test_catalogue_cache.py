@@ -0,0 +1,100 @@
+"""
+VersionedMemo and the ETag / 304 handling of the catalogue endpoints.
+"""
+import os
+import sys
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import place_database
+from app.cache import VersionedMemo
+from app.routers.places import CATALOGUE_CACHE_CONTROL, catalogue_response, json_payload
+
+
+def test_memo_dropped_on_version_change():
+    version = [1]
+    calls = []
+    memo = VersionedMemo(lambda: version[0])
+
+    @memo.cached(key=lambda db, city: city)
+    def lookup(db, city):
+        calls.append(city)
+        return {"city": city, "version": version[0]}
+
+    assert lookup("session-a", "Hue") == {"city": "Hue", "version": 1}
+    # The session is not part of the key
+    assert lookup("session-b", "Hue") == {"city": "Hue", "version": 1}
+    lookup(None, "HCMC")
+    assert calls == ["Hue", "HCMC"]
+
+    version[0] = 2
+    assert lookup(None, "Hue") == {"city": "Hue", "version": 2}
+    lookup(None, "HCMC")
+    assert calls == ["Hue", "HCMC", "Hue", "HCMC"]
+    assert lookup.memo is memo
+
+
+def test_memo_skips_results_computed_across_a_change():
+    version = [1]
+    memo = VersionedMemo(lambda: version[0])
+
+    def compute():
+        version[0] += 1
+        return version[0]
+
+    assert memo.get_or_compute("key", compute) == 2
+    assert memo.get_or_compute("key", compute) == 3
+    assert memo.get_or_compute("key", lambda: "fresh") == "fresh"
+    assert memo.get_or_compute("key", lambda: "stale") == "fresh"
+
+
+def test_catalogue_version_follows_the_memory_copy(monkeypatch):
+    class Loaded:
+        version = ("loaded",)
+
+    monkeypatch.setattr(place_database, "memory_catalogue", Loaded())
+    # A newer file does not count until the in-memory copy is reloaded
+    assert place_database.catalogue_version() == ("loaded",)
+    monkeypatch.setattr(place_database, "memory_catalogue", None)
+    assert place_database.catalogue_version() == place_database.file_version(
+        place_database.DATABASE_PATH
+    )
+
+
+def client():
+    app = FastAPI()
+
+    @app.get("/catalogue")
+    def catalogue(request: Request):
+        return catalogue_response(request, json_payload({"types": ["cafe", "phở"]}))
+
+    return TestClient(app)
+
+
+def test_etag_and_cache_control():
+    response = client().get("/catalogue")
+    assert response.status_code == 200
+    assert response.json() == {"types": ["cafe", "phở"]}
+    assert response.headers["cache-control"] == CATALOGUE_CACHE_CONTROL
+    etag = response.headers["etag"]
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag == json_payload({"types": ["cafe", "phở"]})[1]
+    assert etag != json_payload({"types": ["cafe"]})[1]
+
+
+def test_not_modified_on_matching_if_none_match():
+    http = client()
+    etag = http.get("/catalogue").headers["etag"]
+    for header in (etag, f"W/{etag}", '"other", ' + etag, "*"):
+        response = http.get("/catalogue", headers={"If-None-Match": header})
+        assert response.status_code == 304, header
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+        assert response.headers["cache-control"] == CATALOGUE_CACHE_CONTROL
+
+    response = http.get("/catalogue", headers={"If-None-Match": '"other"'})
+    assert response.status_code == 200
+    assert response.json() == {"types": ["cafe", "phở"]}
@@ -0,0 +1,111 @@
+"""
+Proximity search in GET /api/foursquare/places against a synthetic dataset
+of 100k places around Ho Chi Minh City, checked against brute force.
+"""
+import functools
+import os
+import random
+import sys
+import tempfile
+
+from sqlalchemy import insert, text
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.geo import haversine_m
+from app.routers.foursquare_router import get_places
+from app.sqlite_engine import create_sqlite_engine
+from app.user_models import FoursquarePlace, UserBase
+
+PLACE_COUNT = 100_000
+CENTER = (10.7769, 106.7009)
+PLACE_TYPES = ["stay", "eat", "travel"]
+
+
+@functools.lru_cache(maxsize=None)
+def session_factory():
+    path = os.path.join(tempfile.mkdtemp(), "user.db")
+    engine = create_sqlite_engine(path)
+    UserBase.metadata.create_all(bind=engine)
+    rng = random.Random(42)
+    rows = [
+        {
+            "fsq_place_id": f"fsq{i:06d}",
+            "place_type": rng.choice(PLACE_TYPES),
+            "name": f"Place {i}",
+            "latitude": CENTER[0] + rng.uniform(-0.5, 0.5),
+            "longitude": CENTER[1] + rng.uniform(-0.5, 0.5),
+            # Some places have no rating, as in real search results
+            "rating": round(rng.uniform(5, 10), 1) if rng.random() < 0.9 else None,
+            "price_level": rng.randint(1, 4),
+        }
+        for i in range(PLACE_COUNT)
+    ]
+    with engine.begin() as conn:
+        conn.execute(insert(FoursquarePlace.__table__), rows)
+    return sessionmaker(bind=engine)
+
+
+def query(**params):
+    defaults = dict(place_type=None, lat=None, lon=None, radius_km=None,
+                    min_rating=None, max_price=None, limit=50)
+    with session_factory()() as db:
+        return [p.fsq_place_id for p in get_places(db=db, **{**defaults, **params})]
+
+
+def brute_force(lat, lon, radius_km, limit, place_type=None, min_rating=None):
+    with session_factory()() as db:
+        places = db.query(FoursquarePlace).all()
+    matches = []
+    for p in places:
+        if place_type and p.place_type != place_type:
+            continue
+        if min_rating and (p.rating is None or p.rating < min_rating):
+            continue
+        distance = haversine_m(lat, lon, p.latitude, p.longitude)
+        if distance <= radius_km * 1000:
+            matches.append((distance, -(p.rating or 0.0), p.fsq_place_id))
+    return [fsq_place_id for _, _, fsq_place_id in sorted(matches)[:limit]]
+
+
+def test_matches_brute_force():
+    for lat, lon, radius_km, limit in [
+        (*CENTER, 1, 50),
+        (*CENTER, 3, 200),
+        (10.5, 106.4, 2, 20),  # near the dataset's corner
+        (CENTER[0] + 0.2, CENTER[1] - 0.1, 0.3, 1000),  # fewer than limit
+    ]:
+        assert query(lat=lat, lon=lon, radius_km=radius_km, limit=limit) == brute_force(
+            lat, lon, radius_km, limit
+        )
+
+
+def test_filters_apply_before_limit():
+    expected = brute_force(*CENTER, 5, 30, place_type="eat", min_rating=8)
+    got = query(lat=CENTER[0], lon=CENTER[1], radius_km=5, limit=30,
+                place_type="eat", min_rating=8)
+    assert got == expected and len(got) == 30
+
+
+def test_nearby_places_are_not_dropped_by_limit():
+    # Applying LIMIT before the distance filter returned almost nothing here,
+    # since the first rows in table order are spread over the whole area
+    got = query(lat=CENTER[0], lon=CENTER[1], radius_km=3, limit=50)
+    assert len(got) == 50
+
+
+def test_empty_area():
+    assert query(lat=0.0, lon=0.0, radius_km=5) == []
+
+
+def test_bounding_box_uses_index():
+    with session_factory()() as db:
+        plan = db.execute(
+            text(
+                "EXPLAIN QUERY PLAN SELECT fsq_place_id FROM foursquare_places"
+                " WHERE latitude BETWEEN :s AND :n AND longitude BETWEEN :w AND :e"
+            ),
+            {"s": 10.7, "n": 10.8, "w": 106.6, "e": 106.8},
+        ).fetchall()
+    assert any("ix_foursquare_places_lat_lng" in row[-1] for row in plan)
@@ -1,15 +1,16 @@
+import asyncio
 import json
 import sys
 import os
 from dotenv import load_dotenv
 
-# Add the app directory to the path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 # Load environment variables
 load_dotenv()
 
-from services.foursquare_service import (
+from app.services.foursquare_service import (
     search_places,
     get_place_details,
     get_place_tips,
@@ -27,11 +28,11 @@ def save_json(data, filename):
 print("=" * 60)
 print("TEST 1: SEARCH PLACES")
 print("=" * 60)
-result = search_places(
+result = asyncio.run(search_places(
     ll="10.7769,106.7009",  # Ho Chi Minh City
     query="hotel",
     limit=3
-)
+))
 
 if result.get("success"):
     print(f"Success! Found {len(result['data'].get('results', []))} places")
@@ -52,7 +53,7 @@ if result.get("success"):
         input("Press Enter to continue (or Ctrl+C to stop)...")
 
         # Test 2: Get place details
-        details = get_place_details(place_id)
+        details = asyncio.run(get_place_details(place_id))
         if details.get("success"):
             print("Success! Got place details")
             save_json(details, "test_2_details.json")
@@ -0,0 +1,151 @@
+"""
+PlaceRanker (GET /api/places/rank and /api/places/search/types) against a
+synthetic catalogue, checked against brute force over the same rows.
+"""
+import functools
+import math
+import os
+import random
+import sys
+import tempfile
+
+from sqlalchemy import insert
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.geo import haversine_m
+from app.place_models import Place, PlaceBase, PlaceTypeLink, TypeStat
+from app.services.place_ranker import DEFAULT_WEIGHTS, MAX_RATING, PlaceRanker
+from app.sqlite_engine import create_sqlite_engine
+
+PLACE_COUNT = 20_000
+CITIES = {"HCMC, Vietnam": (10.7769, 106.7009), "Hue, Vietnam": (16.4637, 107.5909)}
+# More than 64 types, so the bitsets span several words
+TYPES = [f"type_{i:03d}" for i in range(150)]
+
+
+@functools.lru_cache(maxsize=None)
+def catalogue():
+    engine = create_sqlite_engine(os.path.join(tempfile.mkdtemp(), "merged.db"))
+    PlaceBase.metadata.create_all(bind=engine)
+    rng = random.Random(7)
+    places, links = [], []
+    for i in range(PLACE_COUNT):
+        city = rng.choice(list(CITIES))
+        lat, lon = CITIES[city]
+        places.append(
+            {
+                "id": i + 1,
+                "place_id": f"p{i:05d}",
+                "city_name": city,
+                "latitude": lat + rng.uniform(-0.2, 0.2),
+                "longitude": lon + rng.uniform(-0.2, 0.2),
+                # Coarse values, so ties have to be broken consistently
+                "POI_score": rng.choice([None, 1.0, 2.0, 3.0, 4.0]),
+                "rating": rng.choice([None, 3.5, 4.0, 4.5, 5.0]),
+                "reviews": rng.choice([None, 0, 10, 100, 1000]),
+            }
+        )
+        for type_id in rng.sample(TYPES, rng.randint(0, 4)):
+            links.append({"place_id": f"p{i:05d}", "type_id": type_id})
+    stats = [
+        {"city_name": city, "type_id": t, "type_score": rng.random()}
+        for city in CITIES
+        for t in TYPES
+    ]
+    with engine.begin() as conn:
+        conn.execute(insert(Place.__table__), places)
+        conn.execute(insert(PlaceTypeLink.__table__), links)
+        conn.execute(insert(TypeStat.__table__), stats)
+    types = {}
+    for link in links:
+        types.setdefault(link["place_id"], set()).add(link["type_id"])
+    return PlaceRanker(engine), places, types
+
+
+def in_area(place, latitude, longitude, radius_m, city):
+    if city is not None and place["city_name"] != city:
+        return None
+    distance = haversine_m(latitude, longitude, place["latitude"], place["longitude"])
+    return distance if distance <= radius_m else None
+
+
+def brute_rank(latitude, longitude, radius_m, city, types, weights, limit):
+    _, places, place_types = catalogue()
+    weights = {**DEFAULT_WEIGHTS, **weights}
+    found = []
+    for p in places:
+        distance = in_area(p, latitude, longitude, radius_m, city)
+        if distance is None or (types and not place_types.get(p["place_id"], set()) & set(types)):
+            continue
+        found.append((p, distance))
+    if not found:
+        return []
+    poi_max = max(p["POI_score"] or 0 for p, _ in found)
+    reviews_max = max(math.log1p(p["reviews"] or 0) for p, _ in found)
+    scored = []
+    for p, distance in found:
+        score = weights["rating"] * (p["rating"] or 0) / MAX_RATING
+        score += weights["score"] * (p["POI_score"] or 0) / poi_max if poi_max else 0
+        score += weights["reviews"] * math.log1p(p["reviews"] or 0) / reviews_max if reviews_max else 0
+        score += weights["distance"] * max(0.0, 1 - distance / radius_m)
+        scored.append((-score, distance, p["id"], p["place_id"]))
+    return [(pid, -score) for score, _, _, pid in sorted(scored)[:limit]]
+
+
+def test_rank_matches_brute_force():
+    ranker = catalogue()[0]
+    rng = random.Random(1)
+    for _ in range(50):
+        city = rng.choice([None, *CITIES])
+        latitude, longitude = CITIES[city or "HCMC, Vietnam"]
+        radius_m = rng.choice([1000, 5000, 20000])
+        types = rng.choice([None, rng.sample(TYPES, 1), rng.sample(TYPES, 3)])
+        weights = {name: rng.choice([0.0, 0.5, 1.0]) for name in DEFAULT_WEIGHTS}
+        limit = rng.choice([1, 10, 100])
+        got = ranker.rank(latitude, longitude, radius_m, city, types, weights, limit=limit)
+        expected = brute_rank(latitude, longitude, radius_m, city, types, weights, limit)
+        assert len(got) == len(expected)
+        for (pid, _, score), (expected_pid, expected_score) in zip(got, expected):
+            # Ids may only differ where float rounding reorders equal scores
+            assert pid == expected_pid or math.isclose(score, expected_score, abs_tol=1e-9)
+
+
+def brute_by_types(types, match, latitude, longitude, radius_m, limit):
+    _, places, place_types = catalogue()
+
+    def top(predicate):
+        found = [
+            p
+            for p in places
+            if in_area(p, latitude, longitude, radius_m, None) is not None and predicate(p)
+        ]
+        found.sort(key=lambda p: (-(p["POI_score"] or 0), -p["id"]))
+        return [p["place_id"] for p in found[:limit]]
+
+    if match == "all":
+        return top(lambda p: set(types) <= place_types.get(p["place_id"], set()))
+    return {t: top(lambda p: t in place_types.get(p["place_id"], set())) for t in types}
+
+
+def test_by_types_matches_brute_force():
+    ranker = catalogue()[0]
+    latitude, longitude = CITIES["HCMC, Vietnam"]
+    # Types from different bitset words, and one unknown type
+    types = ["type_000", "type_070", "type_149", "unknown"]
+    got = ranker.by_types(types, "any", latitude, longitude, 10000, limit=25)
+    expected = brute_by_types(types, "any", latitude, longitude, 10000, 25)
+    assert {t: [pid for pid, _ in members] for t, members in got.items()} == expected
+    assert got["unknown"] == []
+
+    got = ranker.by_types(["type_001", "type_100"], "all", latitude, longitude, 30000, limit=50)
+    expected = brute_by_types(["type_001", "type_100"], "all", latitude, longitude, 30000, 50)
+    assert [pid for pid, _ in got] == expected
+    assert ranker.by_types(types, "all", latitude, longitude, 30000) == []
+
+
+def test_empty_results():
+    ranker = catalogue()[0]
+    assert ranker.rank(0.0, 0.0, 1000) == []
+    assert ranker.rank(city="Nowhere") == []
+    assert ranker.rank(10.7769, 106.7009, 5000, types=["unknown"]) == []
@@ -0,0 +1,157 @@
+"""
+Route optimiser on small hand-made matrices: opening-hour parsing, local
+search, time windows, the day split DP and the annealing time budget.
+"""
+import itertools
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.route_optimizer import (
+    RouteProblem,
+    anneal,
+    local_search,
+    nearest_neighbour,
+    optimize,
+    parse_opening_hours,
+    split_days,
+)
+
+HOUR = 3600
+
+
+def line_matrix(positions):
+    return [[abs(a - b) for b in positions] for a in positions]
+
+
+def test_parse_opening_hours():
+    assert parse_opening_hours("7:30 AM–10 PM") == [(7.5 * HOUR, 22 * HOUR)]
+    assert parse_opening_hours("10 AM–1 PM, 4–10 PM") == [
+        (10 * HOUR, 13 * HOUR),
+        (16 * HOUR, 22 * HOUR),
+    ]
+    assert parse_opening_hours("7 AM – 9 AM") == [(7 * HOUR, 9 * HOUR)]
+    # Closing at or after midnight runs into the next day
+    assert parse_opening_hours("11 AM–12 AM") == [(11 * HOUR, 24 * HOUR)]
+    assert parse_opening_hours("6 PM–2 AM") == [(18 * HOUR, 26 * HOUR)]
+    assert parse_opening_hours("Closed") == []
+    assert parse_opening_hours("Open 24 hours") is None
+    assert parse_opening_hours("") is None
+    assert parse_opening_hours(None) is None
+    assert parse_opening_hours("by appointment") is None
+
+
+def test_local_search_fixes_nearest_neighbour():
+    # From 0, nearest neighbour goes 1, -2, 4 (10); the best order is -2, 1, 4 (8)
+    problem = RouteProblem(line_matrix([0, 1, -2, 4]), start=0)
+    greedy = nearest_neighbour(problem, problem.customers)
+    assert greedy == [1, 2, 3]
+    assert problem.cost(problem.path(greedy)) == 10
+    stops = local_search(problem, greedy)
+    assert stops == [2, 1, 3]
+    assert problem.cost(problem.path(stops)) == 8
+
+
+def test_local_search_keeps_a_fixed_end():
+    problem = RouteProblem(line_matrix([0, 5, 1, 4, 2, 3, 6]), start=0, end=6)
+    plan = optimize(problem)
+    assert plan["days"][0]["path"] == [0, 2, 4, 5, 3, 1, 6]
+    assert plan["cost"] == 6
+
+
+def test_optimize_matches_brute_force_on_small_asymmetric_matrices():
+    rng = random.Random(11)
+    for _ in range(20):
+        n = 7
+        matrix = [[0 if i == j else rng.randint(60, 3600) for j in range(n)] for i in range(n)]
+        problem = RouteProblem(matrix, start=0)
+        best = min(
+            problem.cost(problem.path(list(order)))
+            for order in itertools.permutations(problem.customers)
+        )
+        plan = optimize(problem, seed=3, anneal_iterations=5000)
+        assert sorted(plan["days"][0]["path"][1:]) == problem.customers
+        # Local search alone may stop in a local optimum; annealing should not
+        assert plan["cost"] == best
+
+
+def test_time_windows_reorder_stops():
+    travel = [[0 if i == j else 600 for j in range(4)] for i in range(4)]
+    windows = [None, None, None, [(8 * HOUR, 8 * HOUR + 900)]]
+    problem = RouteProblem(travel, windows=windows, start=0, day_start=8 * HOUR)
+    # Without the window the tie-broken greedy order visits stop 3 last
+    assert nearest_neighbour(problem, problem.customers) == [1, 2, 3]
+    day = optimize(problem)["days"][0]
+    assert day["path"][1] == 3
+    assert day["lateness"] == 0
+    assert day["arrivals"][1] == 8 * HOUR + 600
+
+
+def test_closed_stop_is_penalised():
+    travel = [[0, 600], [600, 0]]
+    problem = RouteProblem(travel, windows=[None, []], start=0)
+    assert optimize(problem)["days"][0]["lateness"] > 0
+
+
+def brute_split(problem, order, days):
+    best = None
+    for cuts in itertools.combinations_with_replacement(range(len(order) + 1), days - 1):
+        bounds = [0, *cuts, len(order)]
+        runs = [order[a:b] for a, b in zip(bounds, bounds[1:])]
+        cost = sum(problem.cost(problem.path(run)) for run in runs if run)
+        if best is None or cost < best:
+            best = cost
+    return best
+
+
+def test_split_days_is_optimal():
+    rng = random.Random(5)
+    positions = [0, *sorted(rng.randint(1, 4 * HOUR) for _ in range(8))]
+    problem = RouteProblem(
+        line_matrix(positions),
+        service=[0] + [1800] * 8,
+        start=0,
+        day_start=8 * HOUR,
+        max_day=5 * HOUR,
+    )
+    order = list(range(1, 9))
+    for days in (1, 2, 3, 4):
+        runs = split_days(problem, order, days)
+        assert len(runs) == days
+        assert [stop for run in runs for stop in run] == order
+        cost = sum(problem.cost(problem.path(run)) for run in runs if run)
+        assert abs(cost - brute_split(problem, order, days)) < 1e-6
+
+
+def test_multi_day_plan_respects_the_day_limit():
+    positions = [0, 600, 1200, 1800, 2400, 3000, 3600]
+    problem = RouteProblem(
+        line_matrix(positions),
+        service=[0] + [2 * HOUR] * 6,
+        start=0,
+        day_start=8 * HOUR,
+        max_day=5 * HOUR,
+    )
+    plan = optimize(problem, days=3)
+    assert len(plan["days"]) == 3
+    visited = [stop for day in plan["days"] for stop in day["path"][1:]]
+    assert sorted(visited) == problem.customers
+    assert all(day["overtime"] == 0 for day in plan["days"])
+
+
+def test_anneal_is_seeded_and_time_bounded():
+    rng = random.Random(2)
+    n = 40
+    matrix = [[0 if i == j else rng.randint(60, 3600) for j in range(n)] for i in range(n)]
+    problem = RouteProblem(matrix, start=0)
+    stops = nearest_neighbour(problem, problem.customers)
+    first = anneal(problem, stops, 2000, seed=9)
+    assert first == anneal(problem, stops, 2000, seed=9)
+    assert sorted(first) == problem.customers
+
+    started = time.perf_counter()
+    anneal(problem, stops, 10**9, seed=9, time_limit=0.05)
+    assert time.perf_counter() - started < 2
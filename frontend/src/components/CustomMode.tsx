@@ -32,7 +32,7 @@ import { convertAllDays } from "../utils/exchangerate";
 import { fetchNearbyPlaces, generatePlaces, mapPlaceToDestination } from "../utils/serp";
 import { getOptimizedRoute } from "../utils/geocode";
 import { createTrip, updateTrip } from '../api.js';
-import { getPlaceById } from "../utils/serp";
+import { getPlaceById, getPlacesByIds } from "../utils/serp";
 
 interface CustomModeProps {
   tripData: { name: string; days: DayPlan[], };
@@ -842,11 +842,13 @@ export function CustomMode({
   useEffect(() => {
     async function fetchDetails() {
       const details: Record<string, Place | null> = {};
-      for (const dest of currentDay.destinations) {
-        if (!detailedDestinations[dest.id]) {
-          details[dest.id] = await getPlaceById(dest.id);
-        }
-      }
+      const missingIds = currentDay.destinations
+        .map(dest => dest.id)
+        .filter(id => !detailedDestinations[id]);
+      const places = await getPlacesByIds(missingIds);
+      missingIds.forEach((id, i) => {
+        details[id] = places[i];
+      });
       setDetailedDestinations(prev => ({ ...prev, ...details }));
     }
     fetchDetails();
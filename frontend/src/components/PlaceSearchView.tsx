@@ -5,7 +5,7 @@ import { Destination, Place } from "../types";
 import { t } from "../locales/translations";
 import { useThemeColors } from "../hooks/useThemeColors";
 import { PlaceDetailsModal } from "./PlaceDetailsModal";
-import { handleSearch, getPlaceById, fetchNearbyPlaces } from "../utils/serp";
+import { handleSearch, getPlaceById, getPlacesByIds, fetchNearbyPlaces, fetchCandidatePool } from "../utils/serp";
 import { fetchUniqueTopTypes } from "../utils/serp";
 import { mapPlaceToDestination } from "../utils/serp";
 interface PlaceSearchViewProps {
@@ -56,12 +56,8 @@ export function PlaceSearchView({
     if (value.trim()) {
       setIsSearching(true);
       const results = await handleSearch(value);
-      const fullPlaces = await Promise.all(
-        results.map(async (place: any) => {
-          const fullPlace = await getPlaceById(place.place_id);
-          return fullPlace || place;
-        })
-      );
+      const places = await getPlacesByIds(results.map((place: any) => place.place_id));
+      const fullPlaces = results.map((place: any, i: number) => places[i] || place);
       setSearchResults(fullPlaces);
       setIsSearching(false);
     } else {
@@ -72,6 +68,10 @@ export function PlaceSearchView({
   const handlePlaceClick = async (place: any) => {
     // place here is from the database
     // destination here is mapped to Destination type
+    if (place.gps_coordinates === undefined) {
+      // Candidate pool entries only carry the fields the list shows
+      place = (await getPlaceById(place.place_id)) || place;
+    }
     const destination = mapPlaceToDestination(place, currency, onCurrencyToggle, language);
     setSelectedPlace(destination);
     setDetailedDestination(place);
@@ -143,7 +143,12 @@ export function PlaceSearchView({
         : userLocation;
 
     if (selectedFilter !== "All") {
-      if (coords?.latitude !== undefined && coords?.longitude !== undefined) {
+      if (city) {
+        // Top places of the category in the city, without a database query
+        (async () => {
+          setSearchResults(await fetchCandidatePool(city, selectedFilter, 20));
+        })();
+      } else if (coords?.latitude !== undefined && coords?.longitude !== undefined) {
         (async () => {
           const filteredPlaces = await fetchNearbyPlaces(
             selectedFilter,
@@ -156,7 +161,7 @@ export function PlaceSearchView({
     } else {
       // Show all places
     }
-  }, [selectedFilter, cityCoordinates, userLocation]);
+  }, [selectedFilter, city, cityCoordinates, userLocation]);
   useEffect(() => {
     if (AIMatches && AIMatches.length > 0 && shouldPopUp) {
       const place = mapPlaceToDestination(AIMatches[0], currency, onCurrencyToggle, language);
@@ -10,37 +10,52 @@ export async function convertCurrency(amount: number, source: string, target: st
     return data.amount;
 }
 
+export async function convertBatch(items: { amount: number; source: string }[], target: string) {
+    if (items.length === 0) return [];
+    const res = await fetch(`${API_HOST}/api/exchangerate/batch`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ items, target }),
+    });
+    const data = await res.json();
+    if (data.error) throw new Error(data.error);
+    return data.amounts as number[];
+}
+
 export async function convertAllDays(days, currency) {
-    return Promise.all(days.map(async (day) => ({
+    // Collect every conversion first and send them in one request
+    const items: { amount: number; source: string }[] = [];
+    const pending = days.map((day) => day.destinations.map((dest) => dest.costs.map((cost) => {
+        const sourceCurrency = cost.originalCurrency || currency;
+        if (sourceCurrency === currency) return null;
+        const parsed = parseAmount(cost.originalAmount || "0");
+        const index = items.length;
+        // Convert both min and max if it's a range
+        items.push(
+            { amount: parsed.min, source: sourceCurrency.toLowerCase() },
+            { amount: parsed.max, source: sourceCurrency.toLowerCase() },
+        );
+        return { index, isApprox: parsed.isApprox };
+    })));
+    const converted = await convertBatch(items, currency.toLowerCase());
+
+    return days.map((day, d) => ({
         ...day,
-        destinations: await Promise.all(day.destinations.map(async (dest) => ({
+        destinations: day.destinations.map((dest, i) => ({
             ...dest,
-            costs: await Promise.all(dest.costs.map(async (cost) => {
-                const sourceCurrency = cost.originalCurrency || currency;
-                if (sourceCurrency !== currency) {
-                    const parsed = parseAmount(cost.originalAmount || "0");
-                    // Convert both min and max if it's a range
-                    const convertedMin = await convertCurrency(
-                        parsed.min,
-                        sourceCurrency.toLowerCase(),
-                        currency.toLowerCase()
-                    );
-                    const convertedMax = await convertCurrency(
-                        parsed.max,
-                        sourceCurrency.toLowerCase(),
-                        currency.toLowerCase()
-                    );
-                    // If it's an approximate/range, return as "min-max"
-                    const convertedAmount = parsed.isApprox
-                        ? `${convertedMin}-${convertedMax}`
-                        : String(convertedMin);
-                    return { ...cost, amount: convertedAmount };
-                } else {
-                    return { ...cost, amount: String(cost.originalAmount) };
-                }
-            }))
-        })))
-    })));
+            costs: dest.costs.map((cost, c) => {
+                const entry = pending[d][i][c];
+                if (!entry) return { ...cost, amount: String(cost.originalAmount) };
+                const convertedMin = converted[entry.index];
+                const convertedMax = converted[entry.index + 1];
+                // If it's an approximate/range, return as "min-max"
+                const convertedAmount = entry.isApprox
+                    ? `${convertedMin}-${convertedMax}`
+                    : String(convertedMin);
+                return { ...cost, amount: convertedAmount };
+            })
+        }))
+    }));
 }
 
 export async function convertAllTrips(trips, currency) {
@@ -39,6 +39,25 @@ export async function fetchFilteredPlaces(type: string, latitude: number, longit
     return data.places || [];
 }
 
+// Places for several types in one request, grouped by type
+export async function fetchFilteredPlacesByTypes(types: string[], latitude: number, longitude: number) {
+    const response = await fetch(
+        `${API_HOST}/api/places/search/types?types=${encodeURIComponent(types.join(","))}&latitude=${latitude}&longitude=${longitude}`,
+        {
+            method: "GET",
+            headers: {
+                "Accept": "application/json"
+            }
+        }
+    );
+    if (!response.ok) {
+        console.error("API error:", response.status, await response.text());
+        return {};
+    }
+    const data = await response.json();
+    return data.groups || {};
+}
+
 export async function generatePlaces(result, userLocation) {
     const nonAdditionalItems = result.categories.filter(item => !item.additional);
     const additionalItems = result.categories.filter(item => item.additional);
@@ -61,11 +80,16 @@ export async function generatePlaces(result, userLocation) {
         longitude = userLocation?.longitude || 0;
     }
 
+    // One request for every category, additional ones included
+    const groups = await fetchFilteredPlacesByTypes(
+        result.categories.map(item => item.name), latitude, longitude
+    );
+
     // Fetch for non-additional categories
     for (let i = 0; i < nonAdditionalItems.length; i++) {
         const item = nonAdditionalItems[i];
         const count = i < remainder ? baseLimit + 1 : baseLimit;
-        const places = await fetchFilteredPlaces(item.name, latitude, longitude);
+        const places = groups[item.name] || [];
         if (!Array.isArray(places)) {
             console.error("places is not iterable", places);
             continue; // Skip this iteration if places is not an array
@@ -83,7 +107,7 @@ export async function generatePlaces(result, userLocation) {
     let additionalIndex = 0;
     while (allPlaces.length < totalPlaces && additionalIndex < additionalItems.length) {
         const item = additionalItems[additionalIndex];
-        const places = await fetchFilteredPlaces(item.name, latitude, longitude);
+        const places = groups[item.name] || [];
         if (!Array.isArray(places)) {
             console.error("places is not iterable", places);
             additionalIndex++;
@@ -176,6 +200,22 @@ export async function getPlaceById(id: string) {
     return await res.json();
 }
 
+// Resolves many place ids in one request; result order matches `ids`, null for unknown ids
+export async function getPlacesByIds(ids: string[]) {
+    if (ids.length === 0) return [];
+    const res = await fetch(`${API_HOST}/api/places/batch`, {
+        method: "POST",
+        headers: {
+            "Content-Type": "application/json",
+            "Accept": "application/json"
+        },
+        body: JSON.stringify({ ids })
+    });
+    if (!res.ok) return ids.map(() => null);
+    const data = await res.json();
+    return data.places || ids.map(() => null);
+}
+
 export async function fetchUniqueTopTypes() {
     const response = await fetch(`${API_HOST}/api/places/unique-top-types`, {
         method: "GET",
@@ -231,6 +271,25 @@ export function mapPlaceToDestination(
     };
 }
 
+// Best places of a type in a city with compact fields, served from memory
+export async function fetchCandidatePool(city: string, type: string, limit: number = 20) {
+    const response = await fetch(
+        `${API_HOST}/api/places/pool?city=${encodeURIComponent(city)}&type=${encodeURIComponent(type)}&limit=${limit}`,
+        {
+            method: "GET",
+            headers: {
+                "Accept": "application/json"
+            }
+        }
+    );
+    if (!response.ok) {
+        console.error("API error:", response.status, await response.text());
+        return [];
+    }
+    const data = await response.json();
+    return data.places || [];
+}
+
 export async function fetchNearbyPlaces(type: string, latitude: number, longitude: number, radius_m: number = 1000) {
     const response = await fetch(
         `${API_HOST}/api/places/nearby?type=${encodeURIComponent(type)}&latitude=${latitude}&longitude=${longitude}&radius_m=${radius_m}`,